@@ -7,6 +7,9 @@ import json
 import threading
 from datetime import datetime
 from flask import Flask, render_template, jsonify, request
+from src.google_clients import get_pool
+from src.google_docs_exporter import SCOPES as DOCS_SCOPES
+from src.google_sheets_handler import SCOPES as SHEETS_SCOPES
 from src.main import NewsAutoCollector
 
 # Configure logging
@@ -19,6 +22,18 @@ logger = logging.getLogger(__name__)
 # Flask app setup
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
+
+def warm_up_google_clients():
+    """Load Google credentials and API discovery documents once, ahead of the first run"""
+    get_pool().warm_up(
+        [('sheets', 'v4'), ('docs', 'v1'), ('drive', 'v3')],
+        SHEETS_SCOPES + DOCS_SCOPES
+    )
+
+
+# Every run reuses the pooled credentials and clients instead of re-authenticating
+threading.Thread(target=warm_up_google_clients, daemon=True).start()
+
 # Global state for tracking execution
 execution_state = {
     'running': False,
@@ -0,0 +1,159 @@
+"""
+Benchmark near-duplicate title detection in Deduplicator.
+
+Generates synthetic headlines with planted near-duplicates (a source suffix,
+a changed or dropped word, typos) and compares the original all-pairs
+SequenceMatcher loop, the 'exhaustive' strategy with and without the numpy
+batch scorer, and the MinHash 'lsh' strategy. Recall is reported against
+the exhaustive result where that is affordable, and against the planted duplicates (variants whose ratio to their
+original reaches the threshold) at every size. Run from the project root:
+    
+    python benchmarks/bench_dedup.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.deduplicator as deduplicator  # noqa: E402
+from src.deduplicator import Deduplicator  # noqa: E402
+
+CONSONANTS = 'bcdfghjklmnprstvwyz'
+VOWELS = 'aeiou'
+SOURCES = ['BBC News', 'The Hindu', 'India Today', 'Reuters', 'CNN']
+
+
+def make_vocabulary(rng, size=20000):
+    """Pronounceable made-up words, so unrelated titles share few shingles as in real text"""
+    return [
+        ''.join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(rng.randint(1, 4)))
+        + rng.choice(['', 'n', 's', 'r', 't'])
+        for _ in range(size)
+    ]
+
+
+def mutate(rng, title, vocabulary):
+    """A near-duplicate of a title, the way outlets rewrite the same headline"""
+    words = title.split()
+    kind = rng.choice(['suffix', 'replace', 'drop', 'typo'])
+    if kind == 'suffix':
+        return f"{title} - {rng.choice(SOURCES)}"
+    if kind == 'replace':
+        words[rng.randrange(len(words))] = rng.choice(vocabulary)
+    elif kind == 'drop' and len(words) > 4:
+        del words[rng.randrange(len(words))]
+    else:
+        chars = list(title)
+        position = rng.randrange(len(chars))
+        chars[position] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+        return ''.join(chars)
+    return ' '.join(words)
+
+
+def make_titles(n, duplicate_rate, seed=7):
+    """Titles, plus (original index, variant index) for the planted duplicates"""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    titles = []
+    planted = []
+    while len(titles) < n:
+        title = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(6, 12))).capitalize()
+        titles.append(title)
+        if rng.random() < duplicate_rate and len(titles) < n:
+            planted.append((len(titles) - 1, len(titles)))
+            titles.append(mutate(rng, title, vocabulary))
+    return titles, planted
+
+
+def legacy_remove_similar(articles, threshold):
+    """The original all-pairs loop, for reference timings"""
+    unique, processed = [], set()
+    for i, article in enumerate(articles):
+        if i in processed:
+            continue
+        unique.append(article)
+        current = article['title'].lower().strip()
+        for j in range(i + 1, len(articles)):
+            if j in processed:
+                continue
+            if SequenceMatcher(None, current, articles[j]['title'].lower().strip()).ratio() >= threshold:
+                processed.add(j)
+    return unique
+
+
+def scalar(function, *args):
+    """Run a function with the numpy batch scorer switched off"""
+    available = deduplicator.NUMPY_AVAILABLE
+    deduplicator.NUMPY_AVAILABLE = False
+    try:
+        return function(*args)
+    finally:
+        deduplicator.NUMPY_AVAILABLE = available
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate detection benchmark")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument("--legacy-max", type=int, default=2000,
+                        help="Largest size to run the original all-pairs loop on")
+    parser.add_argument("--exhaustive-max", type=int, default=10000,
+                        help="Largest size to run the exhaustive strategy on")
+    parser.add_argument("--scalar-max", type=int, default=5000,
+                        help="Largest size to run the exhaustive strategy without numpy on")
+    args = parser.parse_args()
+    
+    print(f"{'titles':>8} {'method':<12} {'time':>9} {'kept':>7} {'recall':>8} {'planted recall':>15}")
+    for n in args.sizes:
+        titles, planted = make_titles(n, args.duplicate_rate)
+        articles = [{'title': title, 'url': f"https://example.com/{i}"} for i, title in enumerate(titles)]
+        
+        # Planted variants that really are duplicates by the ratio threshold
+        threshold = Deduplicator().title_similarity_threshold
+        planted = [
+            variant for original, variant in planted
+            if SequenceMatcher(None, titles[original].lower(), titles[variant].lower()).ratio() >= threshold
+        ]
+        
+        results = {}
+        if n <= args.legacy_max:
+            results['original'] = timed(legacy_remove_similar, articles, threshold)
+        if n <= args.scalar_max:
+            results['scalar'] = timed(
+                scalar, Deduplicator(strategy='exhaustive')._remove_similar_titles, articles
+            )
+        if n <= args.exhaustive_max:
+            results['exhaustive'] = timed(Deduplicator(strategy='exhaustive')._remove_similar_titles, articles)
+        results['lsh'] = timed(Deduplicator(strategy='lsh')._remove_similar_titles, articles)
+        
+        reference = results.get('exhaustive')
+        removed_reference = None
+        if reference:
+            kept_urls = {article['url'] for article in reference[0]}
+            removed_reference = {article['url'] for article in articles} - kept_urls
+        
+        for method, (kept, elapsed) in results.items():
+            kept_urls = {article['url'] for article in kept}
+            removed = {article['url'] for article in articles} - kept_urls
+            recall = (
+                f"{len(removed & removed_reference) / len(removed_reference):.4f}"
+                if removed_reference else 'n/a'
+            )
+            planted_found = sum(f"https://example.com/{variant}" in removed for variant in planted)
+            planted_recall = planted_found / len(planted) if planted else 1.0
+            print(f"{n:>8} {method:<12} {elapsed:>8.2f}s {len(kept):>7} {recall:>8} {planted_recall:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark the HTML parser backends on saved search result pages.
+
+Reports per-page parse+extract time and peak memory for each backend, and
+checks that the backends extract the same articles (html.parser trees get
+unclosed elements such as <p> closed the way lxml closes them, so malformed
+markup is no excuse for a difference). Run from the project root:
+    
+    python benchmarks/bench_parsers.py [--fixtures DIR] [--repeat N]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.html_parsers import PARSER_BACKENDS, get_parser  # noqa: E402
+from src.news_scraper import NewsScraper  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def measure(scraper, content, repeat):
+    """Best-of-N wall time and peak traced memory for one page"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        articles = scraper._parse_response(content, 'https://example.com', 'English', 'Bench', 'bench')
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    scraper._parse_response(content, 'https://example.com', 'English', 'Bench', 'bench')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser backend benchmark")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    pages = sorted(glob.glob(os.path.join(args.fixtures, '*.html')))
+    if not pages:
+        print(f"No .html fixtures found in {args.fixtures}")
+        return
+    
+    backends = [name for name in PARSER_BACKENDS if get_parser(name) == name]
+    scrapers = {name: NewsScraper(parser=name) for name in backends}
+    
+    print(f"{'page':<24} {'backend':<12} {'time (ms)':>10} {'peak (KB)':>10} {'articles':>9}")
+    mismatches = 0
+    for path in pages:
+        with open(path, 'rb') as f:
+            content = f.read()
+        
+        results = {}
+        for name, scraper in scrapers.items():
+            elapsed, peak, articles = measure(scraper, content, args.repeat)
+            results[name] = articles
+            print(f"{os.path.basename(path):<24} {name:<12} {elapsed * 1000:10.1f} "
+                  f"{peak / 1024:10.0f} {len(articles):9d}")
+        
+        reference = results[backends[0]]
+        for name, articles in results.items():
+            if articles != reference:
+                mismatches += 1
+                print(f"  !! {name} extracted different articles than {backends[0]}")
+    
+    print(f"\nAll backends identical: {mismatches == 0}")
+
+
+if __name__ == "__main__":
+    main()
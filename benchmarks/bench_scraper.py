@@ -0,0 +1,114 @@
+"""
+Benchmark the scraper backends against local stub HTTP servers.
+
+Each stub server plays one news website: it answers /search?q=... after a fixed
+latency with a small results page. Run from the project root:
+    
+    python benchmarks/bench_scraper.py --hosts 20 --keywords 10 --latency 0.1
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.news_scraper import NewsScraper  # noqa: E402
+
+ARTICLES_PER_PAGE = 10
+
+
+def make_handler(latency):
+    class StubSearchHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Allow keep-alive
+        
+        def do_GET(self):
+            time.sleep(latency)
+            query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+            items = ''.join(
+                f'<article><h2>Story {i} about {query} from port {self.server.server_port}</h2>'
+                f'<a href="/news/{query}-{i}">Read</a><p>Summary of story {i}</p></article>'
+                for i in range(ARTICLES_PER_PAGE)
+            )
+            body = f'<html><body>{items}</body></html>'.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return StubSearchHandler
+
+
+def start_servers(count, latency):
+    servers = []
+    for _ in range(count):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(latency))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def run(name, scraper, websites, keywords):
+    start = time.perf_counter()
+    articles = scraper.search_articles(websites, keywords)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed:8.2f}s  {len(articles):6d} articles")
+    return articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraper backend benchmark")
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--keywords", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub response latency in seconds")
+    parser.add_argument("--delay", type=float, default=0, help="Per-host politeness delay")
+    parser.add_argument("--skip-serial", action="store_true")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    servers = start_servers(args.hosts, args.latency)
+    websites = [
+        {'name': f'Stub {i}', 'url': f'http://127.0.0.1:{server.server_port}', 'language': 'English'}
+        for i, server in enumerate(servers)
+    ]
+    keywords = [{'keyword': f'topic{i}', 'language': 'English'} for i in range(args.keywords)]
+    print(f"{len(websites) * len(keywords)} searches, {args.latency}s latency, {args.delay}s delay\n")
+    
+    results = {}
+    if not args.skip_serial:
+        results['serial'] = run("sync serial", NewsScraper(delay=args.delay), websites, keywords)
+    results['threads'] = run(
+        "sync threads (8 workers)",
+        NewsScraper(delay=args.delay, max_workers=8),
+        websites, keywords
+    )
+    try:
+        from src.async_news_scraper import AsyncNewsScraper
+        results['async'] = run(
+            "async (100 in flight)",
+            AsyncNewsScraper(delay=args.delay, max_concurrency=100),
+            websites, keywords
+        )
+    except ImportError as e:
+        print(f"async backend skipped: {e}")
+    
+    outputs = list(results.values())
+    same = all(output == outputs[0] for output in outputs)
+    print(f"\nIdentical output across backends: {same}")
+    
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
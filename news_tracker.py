@@ -1,14 +1,20 @@
 import os
 import sys
 import io
-import time
 import requests
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from GoogleNews import GoogleNews
-from docx import Document
-from docx.shared import Pt
 import argparse
+import time
+from collections import deque
+from src.http_cache import ResponseCache
+from src.keyword_matcher import keyword_matcher
+from src.query_batcher import KeywordQuery, batch_keywords
+from src.rate_limiter import RateLimiter, THROTTLE_STATUS_CODES
+from src.report import build_keyword_report, render_docx
+from src.seen_index import SeenIndex
+from src.url_canonicalizer import UrlCanonicalizer, is_redirect_wrapper
 
 # set stdout to utf-8 to avoid charmap errors
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -25,8 +31,17 @@ DEFAULT_SITES = os.getenv('NEWS_SITES', 'hindustantimes.com,bbc.com').split(',')
 DEFAULT_KEYWORDS = [k.strip() for k in DEFAULT_KEYWORDS if k.strip()]
 DEFAULT_SITES = [s.strip() for s in DEFAULT_SITES if s.strip()]
 
-def fetch_news(keywords, sites, dry_run=False):
-    import random
+# Times a throttled RSS query is put back in the queue before giving up
+MAX_RSS_REQUEUES = 3
+
+# Keywords OR-ed into a single RSS query per site (1 = one query per keyword)
+KEYWORD_BATCH_SIZE = int(os.getenv('NEWS_KEYWORD_BATCH', '1'))
+
+# Articles kept per keyword and site
+MAX_ARTICLES_PER_QUERY = 5
+
+def fetch_news(keywords, sites, dry_run=False, rate_limiter=None, cache=None, batch_size=None,
+               canonicalizer=None):
     import xml.etree.ElementTree as ET
     from urllib.parse import quote
     
@@ -46,103 +61,151 @@ def fetch_news(keywords, sites, dry_run=False):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     }
     
-    for keyword in keywords:
-        for site in sites:
+    # ~1 request every 2s on average, slowing down when Google answers 429/503
+    limiter = rate_limiter or RateLimiter(rate=0.5, jitter=1.0)
+    
+    # Several keywords can share one query; results are attributed back to
+    # the keywords found in their titles
+    keyword_queries = batch_keywords(keywords, max_terms=batch_size or KEYWORD_BATCH_SIZE)
+    
+    # Throttled queries go to the back of the queue instead of being dropped,
+    # with the monotonic time before which they must not be retried
+    queue = deque((keyword, site, 0, 0.0) for keyword in keyword_queries for site in sites)
+    
+    while queue:
+        keyword, site, requeues, not_before = queue.popleft()
+        wait = not_before - time.monotonic()
+        if wait > 0:
+            # Only queries re-queued after this one remain, and every query goes
+            # to news.google.com, so there is nothing else to send meanwhile
+            time.sleep(wait)
+        if isinstance(keyword, KeywordQuery):
+            # query parameter: ("keyword1" OR "keyword2") site:site.com when:2d
+            query_keywords = list(keyword.keywords)
+            query = f'({keyword}) site:{site} when:2d'
+        else:
             # query parameter: "keyword" site:site.com when:2d
+            query_keywords = [keyword]
             query = f'"{keyword}" site:{site} when:2d'
-            print(f"Checking RSS for query: {query}")
+        print(f"Checking RSS for query: {query}")
+        
+        try:
+            # Direct Google News RSS search URL
+            url = f"https://news.google.com/rss/search?q={quote(query)}&hl=en-US&gl=US&ceid=US:en"
+            host = RateLimiter.key_for(url)
             
-            try:
-                # Direct Google News RSS search URL
-                url = f"https://news.google.com/rss/search?q={quote(query)}&hl=en-US&gl=US&ceid=US:en"
-                
+            # Reuse a recent feed, or revalidate an older one with a conditional GET
+            entry = cache.lookup(url) if cache else None
+            if entry and 'articles' in entry.meta and cache.is_fresh(entry):
+                print(f"Using cached feed for query: {query}")
+                all_results.extend(entry.meta['articles'])
+                continue
+            request_headers = dict(headers)
+            request_headers.update(ResponseCache.conditional_headers(entry))
+            
+            limiter.acquire(host)
+            response = requests.get(url, headers=request_headers, timeout=10)
+            retry_after = limiter.observe(host, response.status_code, response.headers)
+            
+            if response.status_code == 304 and entry and 'articles' in entry.meta:
+                print(f"Feed not modified for query: {query}")
+                cache.revalidated(entry, response.headers)
+                all_results.extend(entry.meta['articles'])
+                continue
+            if response.status_code == 304:
+                # No stored articles to reuse, and a 304 has no body to parse:
+                # drop the entry and fetch the feed again without validators
+                if entry:
+                    cache.delete(entry)
+                limiter.acquire(host)
                 response = requests.get(url, headers=headers, timeout=10)
-                
-                if response.status_code == 429:
-                    print(f"Still hitting rate limit for {query} on RSS ! Pausing 15s...")
-                    time.sleep(15)
+                retry_after = limiter.observe(host, response.status_code, response.headers)
+                if response.status_code == 304:
+                    print(f"Feed for query {query} answered 304 without a cached copy, skipping.")
                     continue
-                    
-                response.raise_for_status()
+            
+            if response.status_code in THROTTLE_STATUS_CODES:
+                if requeues < MAX_RSS_REQUEUES:
+                    # Exponential backoff with jitter (at least Retry-After) before this
+                    # query is retried; queries already in the queue go first meanwhile
+                    delay = limiter.backoff_delay(requeues, retry_after)
+                    print(f"Rate limited ({response.status_code}) for {query}, retrying in {delay:.1f}s.")
+                    queue.append((keyword, site, requeues + 1, time.monotonic() + delay))
+                else:
+                    print(f"Still rate limited for {query} after {requeues} retries, skipping.")
+                continue
                 
-                # Parse the XML response
-                root = ET.fromstring(response.text)
-                channel = root.find('channel')
+            response.raise_for_status()
+            
+            # Parse the XML response
+            root = ET.fromstring(response.text)
+            channel = root.find('channel')
+            
+            if not channel:
+                continue
                 
-                if not channel:
-                    continue
+            unique_articles = []
+            seen_links = set()
+            found_per_keyword = dict.fromkeys(query_keywords, 0)
+            matcher = keyword_matcher(query_keywords)  # One scan per title for all the query's keywords
+            
+            items = channel.findall('item')
+            for item in items:
+                if all(found >= MAX_ARTICLES_PER_QUERY for found in found_per_keyword.values()):
+                    break
                     
-                unique_articles = []
-                seen_links = set()
+                title = item.findtext('title', default='News Article')
+                link = item.findtext('link', default='')
+                published = item.findtext('pubDate', default='Recent')
+                # RSS description contains HTML, we just want a snippet
+                desc = item.findtext('description', default='')
                 
-                items = channel.findall('item')
-                for item in items:
-                    if len(unique_articles) >= 5:
-                        break
-                        
-                    title = item.findtext('title', default='News Article')
-                    link = item.findtext('link', default='')
-                    published = item.findtext('pubDate', default='Recent')
-                    # RSS description contains HTML, we just want a snippet
-                    desc = item.findtext('description', default='')
-                    
-                    if not link or link in seen_links:
-                        continue
-                        
-                    # Title typically comes as "Article Title - Source Name"
-                    # Filter by keyword presence to ensure relevance
-                    if keyword.lower() in title.lower():
-                        seen_links.add(link)
-                        unique_articles.append({
-                            'title': title,
-                            'link': link,
-                            'desc': "Retrieved via Google News RSS.", # The RSS desc is messy HTML, keep it clean
-                            'published': published,
-                            'site': site,
-                            'keyword': keyword
-                        })
+                if not link:
+                    continue
                 
-                all_results.extend(unique_articles)
+                # Title typically comes as "Article Title - Source Name"
+                # Filter by keyword presence to ensure relevance
+                matched_keywords = [
+                    matched_keyword for matched_keyword in matcher.find(title)
+                    if found_per_keyword[matched_keyword] < MAX_ARTICLES_PER_QUERY
+                ]
+                if not matched_keywords:
+                    continue
                 
-            except Exception as e:
-                print(f"Error fetching RSS for {query}: {e}")
+                # Google News links are redirect wrappers; collapse them to the
+                # publisher's URL where it is known, so one story is one link
+                link_key = link
+                if canonicalizer:
+                    resolved = canonicalizer.resolve(link, rate_limiter=limiter)
+                    if not is_redirect_wrapper(resolved):
+                        link = resolved
+                    link_key = canonicalizer.canonical(link)
+                if link_key in seen_links:
+                    continue
                 
-            # Random delay between combinations
-            sleep_time = random.uniform(1.0, 3.0)
-            time.sleep(sleep_time)
+                for matched_keyword in matched_keywords:
+                    found_per_keyword[matched_keyword] += 1
+                    seen_links.add(link_key)
+                    unique_articles.append({
+                        'title': title,
+                        'link': link,
+                        'desc': "Retrieved via Google News RSS.", # The RSS desc is messy HTML, keep it clean
+                        'published': published,
+                        'site': site,
+                        'keyword': matched_keyword
+                    })
             
+            all_results.extend(unique_articles)
+            if cache:
+                cache.store(url, response.content, response.headers, meta={'articles': unique_articles})
+            
+        except Exception as e:
+            print(f"Error fetching RSS for {query}: {e}")
+        
     return all_results
 
 def generate_word_doc(articles, filepath):
-    doc = Document()
-    doc.add_heading(f"News Report - {datetime.now().strftime('%Y-%m-%d')}", 0)
-    
-    if not articles:
-        doc.add_paragraph("No specific news found for the given keywords and sites in the recent timeframe.")
-    else:
-        # Group by keyword
-        grouped = {}
-        for a in articles:
-            k = a['keyword']
-            if k not in grouped:
-                grouped[k] = []
-            grouped[k].append(a)
-            
-        for keyword, group_articles in grouped.items():
-            doc.add_heading(f"Keyword: {keyword}", level=1)
-            for i, article in enumerate(group_articles, 1):
-                p_title = doc.add_paragraph(style='List Number')
-                runner = p_title.add_run(f"[{article['site']}] {article['title']}")
-                runner.bold = True
-                
-                p_desc = doc.add_paragraph(f"{article['desc']} ({article['published']})")
-                p_desc.style.font.size = Pt(10)
-                
-                p_link = doc.add_paragraph()
-                # Create rudimentary clickable link format (Word parses these if URLs)
-                p_link.add_run(article['link'])
-                
-    doc.save(filepath)
+    render_docx(build_keyword_report(articles), filepath)
     print(f"Saved Word document to {filepath}")
 
 def send_telegram_message(articles, filepath):
@@ -206,7 +269,17 @@ def main():
     print(f"Starting news tracker for keywords: {DEFAULT_KEYWORDS}")
     print(f"Monitoring sites: {DEFAULT_SITES}")
     
-    articles = fetch_news(DEFAULT_KEYWORDS, DEFAULT_SITES, dry_run=args.test)
+    canonicalizer = UrlCanonicalizer() if os.getenv('URL_CANONICAL', 'true').lower() == 'true' else None
+    articles = fetch_news(DEFAULT_KEYWORDS, DEFAULT_SITES, dry_run=args.test, cache=ResponseCache(),
+                          canonicalizer=canonicalizer)
+    
+    # Leave out stories already sent in the last SEEN_INDEX_TTL_HOURS
+    found_articles = articles
+    seen_index = SeenIndex() if os.getenv('SEEN_INDEX', 'true').lower() == 'true' else None
+    if seen_index:
+        articles = seen_index.filter_unseen(articles)
+        if len(articles) < len(found_articles):
+            print(f"Skipped {len(found_articles) - len(articles)} articles already reported.")
     
     print(f"\nFound {len(articles)} total unique articles.")
     
@@ -221,6 +294,8 @@ def main():
     
     if not args.test:
         send_telegram_message(articles, doc_path)
+        if seen_index:
+            seen_index.mark_seen(found_articles)
     else:
         print("Test mode enabled. Skipping Telegram delivery.")
         if articles:
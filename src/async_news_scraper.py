@@ -0,0 +1,282 @@
+"""
+Async News Scraper - asyncio backend for searching news websites
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from typing import Any, Callable, Iterator, List, Dict, Optional, Tuple
+
+from src.http_cache import ResponseCache
+from src.html_parsers import DEFAULT_PARSER
+from src.news_scraper import NewsScraper
+from src.parse_cache import ParseCache
+from src.query_batcher import MAX_QUERY_LENGTH
+from src.rate_limiter import RateLimiter, Throttled, THROTTLE_STATUS_CODES
+from src.site_profiles import SiteProfileRegistry
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is an optional dependency
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNewsScraper(NewsScraper):
+    """
+    Scrape news articles with asyncio and a pooled aiohttp client.
+    
+    Connections are kept alive and pooled per host, so hundreds of searches
+    can be in flight from a single thread. Parsing is shared with NewsScraper
+    and runs in a worker thread so it doesn't stall the event loop, as does
+    every response and parse cache access (SQLite, disk and zlib).
+    """
+    
+    def __init__(self, timeout=15, delay=1, max_concurrency=100, max_per_host=1,
+                 connections_per_host=4, rate_limiter: Optional[RateLimiter] = None,
+                 max_requeues=2, cache: Optional[ResponseCache] = None,
+                 parse_cache: Optional[ParseCache] = None, parser: str = DEFAULT_PARSER,
+                 profiles: Optional[SiteProfileRegistry] = None,
+                 keyword_batch_size=1, max_query_length=MAX_QUERY_LENGTH,
+                 relevance_filter=False):
+        if aiohttp is None:
+            raise ImportError(
+                "aiohttp is required for AsyncNewsScraper. Install it with: pip install aiohttp"
+            )
+        super().__init__(timeout=timeout, delay=delay, max_per_host=max_per_host,
+                         rate_limiter=rate_limiter, max_requeues=max_requeues, cache=cache,
+                         parse_cache=parse_cache, parser=parser, profiles=profiles,
+                         keyword_batch_size=keyword_batch_size, max_query_length=max_query_length,
+                         relevance_filter=relevance_filter)
+        self.max_concurrency = max(1, max_concurrency)  # Searches in flight
+        self.connections_per_host = max(1, connections_per_host)  # Pooled connections per host
+    
+    async def search_articles_async(self, websites: List[Dict],
+                                    keywords: List[Dict]) -> List[Dict]:
+        """
+        Search for articles across multiple websites matching keywords
+        
+        Same contract as NewsScraper.search_articles, for callers already
+        running inside an event loop.
+        """
+        tasks = self._plan_tasks(websites, keywords)
+        ordered = [[] for _ in tasks]
+        
+        def collect(index: int, found_articles: List[Dict]):
+            ordered[index] = found_articles
+        
+        await self._run_tasks_async(tasks, collect)
+        
+        # Put results back in task order so the output is deterministic
+        articles = []
+        for found_articles in ordered:
+            articles.extend(found_articles)
+        
+        logger.info(f"Total articles found: {len(articles)}")
+        self._log_parse_cache_stats()
+        return articles
+    
+    def _iter_results(self, tasks: List[Tuple[Dict, str]]) -> Iterator[Tuple[int, List[Dict]]]:
+        """Run the searches on an event loop thread and yield (task index, articles) as they complete"""
+        results = queue.Queue()
+        done = object()
+        
+        def run_loop():
+            try:
+                asyncio.run(self._run_tasks_async(
+                    tasks, lambda index, found_articles: results.put((index, found_articles))
+                ))
+            except BaseException as e:
+                results.put(e)
+            finally:
+                results.put(done)
+        
+        thread = threading.Thread(target=run_loop, name='async-scraper', daemon=True)
+        thread.start()
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+        thread.join()
+    
+    async def _run_tasks_async(self, tasks: List[Tuple[Dict, str]],
+                               on_result: Callable[[int, List[Dict]], None]):
+        """Run every search, calling on_result(task index, articles) as each one completes"""
+        logger.info(
+            f"Searching {len(tasks)} website/keyword pairs asynchronously "
+            f"({self.max_concurrency} in flight, {self.max_per_host} per host)"
+        )
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.connections_per_host,
+            keepalive_timeout=30
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        in_flight = asyncio.Semaphore(self.max_concurrency)
+        host_semaphores = {}
+        requeues = [0] * len(tasks)
+        
+        loop = asyncio.get_running_loop()
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def run(index: int) -> List[Dict]:
+                host = self._task_host(tasks[index])
+                if self.cache:
+                    cached = await loop.run_in_executor(None, self._fresh_cached_articles, tasks[index])
+                    if cached is not None:
+                        return cached
+                if host not in host_semaphores:
+                    host_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+                while True:
+                    async with host_semaphores[host]:
+                        # Wait for a token without holding a global slot
+                        wait = self.rate_limiter.reserve(host)
+                        if wait > 0:
+                            await asyncio.sleep(wait)
+                        try:
+                            async with in_flight:
+                                return await self._run_task_async(session, tasks[index])
+                        except Throttled as e:
+                            if not self._should_requeue(tasks[index], requeues, index, e):
+                                return []
+                    # Re-queued: go to the back of this host's queue
+            
+            async def run_and_report(index: int):
+                on_result(index, await run(index))
+            
+            # Start round-robin across hosts
+            await asyncio.gather(
+                *(run_and_report(index) for index in self._interleave_by_host(tasks))
+            )
+    
+    async def _run_task_async(self, session, task: Tuple[Dict, str]) -> List[Dict]:
+        """Search one website for one keyword"""
+        website, keyword = task
+        logger.info(f"Searching website: {website['name']} ({website['url']}) for '{keyword}'")
+        try:
+            return await self._search_website_async(
+                session,
+                website['url'],
+                keyword,
+                website['language'],
+                website['name']
+            )
+        except Throttled:
+            raise
+        except Exception as e:
+            logger.error(
+                f"Error searching {website['name']} for '{keyword}': {str(e)}"
+            )
+            return []
+    
+    async def _search_website_async(self, session, url: str, keyword: str,
+                                    language: str, website_name: str) -> List[Dict]:
+        """
+        Search a specific website for articles matching a keyword
+        """
+        search_url = self._build_search_url(url, keyword)
+        host = RateLimiter.key_for(search_url)
+        logger.debug(f"Searching URL: {search_url}")
+        
+        # Revalidate a stale cached copy instead of downloading it again
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self.cache.lookup, search_url) if self.cache else None
+        headers = self._get_headers()
+        headers.update(ResponseCache.conditional_headers(entry))
+        
+        fetched = await self._fetch_async(session, search_url, host, headers, website_name)
+        if fetched is None:
+            return []
+        status, response_headers, content = fetched
+        
+        if status == 304:
+            if entry:
+                articles = await loop.run_in_executor(
+                    None, self._revalidated_articles, entry, response_headers, search_url, url,
+                    language, website_name, keyword
+                )
+                if articles is not None:
+                    return articles
+            wait = self.rate_limiter.reserve(host)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            fetched = await self._fetch_async(session, search_url, host, self._get_headers(),
+                                              website_name)
+            if fetched is None:
+                return []
+            status, response_headers, content = fetched
+        
+        if not content:
+            logger.warning(f"No response from {website_name}")
+            return []
+        
+        # Parse and cache off the event loop so other searches keep flowing
+        parse_key = self._parse_key(self._extraction_profile(url))
+        
+        def parse_and_store() -> List[Dict]:
+            articles = self._parse_response(content, url, language, website_name, keyword)
+            self._store_in_cache(search_url, content, response_headers, articles, parse_key)
+            return articles
+        
+        try:
+            articles = await loop.run_in_executor(None, parse_and_store)
+        except Exception as e:
+            logger.error(f"Error parsing articles from {website_name}: {str(e)}", exc_info=False)
+            return []
+        
+        logger.info(f"Found {len(articles)} articles from {website_name} for '{keyword}'")
+        return articles
+    
+    async def _fetch_async(self, session, search_url: str, host: str, headers: Dict[str, str],
+                           website_name: str) -> Optional[Tuple[int, Any, Optional[bytes]]]:
+        """
+        GET a search page, retrying connection errors and throttling responses
+        
+        Returns:
+            (status, headers, body), with no body for a 304, or None if the
+            request failed
+        
+        Raises:
+            Throttled: if the host is still throttling after the retries
+        """
+        for attempt in range(3):
+            if attempt:
+                wait = self.rate_limiter.reserve(host)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            try:
+                async with session.get(search_url, headers=headers,
+                                       allow_redirects=True) as response:
+                    status = response.status
+                    response_headers = response.headers
+                    retry_after = self.rate_limiter.observe(host, status, response_headers)
+                    if status == 304:
+                        return status, response_headers, None
+                    if status not in THROTTLE_STATUS_CODES:
+                        response.raise_for_status()
+                        return status, response_headers, await response.read()
+                
+                if attempt < 2:
+                    logger.debug(f"HTTP {status}, backing off... (attempt {attempt + 1})")
+                    await asyncio.sleep(self.rate_limiter.backoff_delay(attempt, retry_after))
+                    continue
+                raise Throttled(host, retry_after)
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                if attempt < 2:
+                    logger.debug(
+                        f"{type(e).__name__}, retrying... (attempt {attempt + 1})"
+                    )
+                    await asyncio.sleep(self.rate_limiter.backoff_delay(attempt))
+                else:
+                    logger.error(f"Request error for {website_name}: {type(e).__name__}: {str(e)}")
+                    return None
+            except aiohttp.ClientError as e:
+                logger.error(f"Request error for {website_name}: {type(e).__name__}: {str(e)}")
+                return None
+        return None
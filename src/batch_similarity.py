@@ -0,0 +1,81 @@
+"""
+Batch Similarity - Vectorized pruning of title pairs before SequenceMatcher
+"""
+
+from typing import Iterator, List, Sequence
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # numpy is an optional dependency
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Titles scored per matrix block (memory is BLOCK_SIZE x titles floats)
+BLOCK_SIZE = 512
+# Below this many titles building the matrices costs more than it saves
+MIN_BATCH_SIZE = 64
+
+# Slack for float32 rounding, so the bound never rejects a pair ratio() would accept
+_EPSILON = 1e-4
+
+
+def _count_matrix(titles: Sequence[str]):
+    """
+    Character count vectors of the titles as a 0/1 matrix whose dot products
+    are multiset intersections.
+    
+    A character occurring c times in a title sets c columns, one per
+    (character, occurrence) pair, so the dot product of two rows is
+    sum(min(count1, count2)) over all characters. Built without a Python
+    loop over characters: the characters of each title are sorted, and an
+    occurrence is the distance from the first of its run.
+    """
+    lengths = np.fromiter((len(title) for title in titles), dtype=np.int64, count=len(titles))
+    codes = np.frombuffer(''.join(titles).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    rows = np.repeat(np.arange(len(titles)), lengths)
+    
+    order = np.lexsort((codes, rows))
+    rows, codes = rows[order], codes[order]
+    positions = np.arange(len(codes))
+    run_start = np.ones(len(codes), dtype=bool)
+    run_start[1:] = (rows[1:] != rows[:-1]) | (codes[1:] != codes[:-1])
+    occurrence = positions - np.maximum.accumulate(np.where(run_start, positions, 0))
+    
+    # Code points fit in 21 bits, so (occurrence, code point) packs into one key
+    keys, columns = np.unique((occurrence << 21) | codes, return_inverse=True)
+    matrix = np.zeros((len(titles), max(len(keys), 1)), dtype=np.float32)
+    matrix[rows, columns.ravel()] = 1.0
+    return matrix
+
+
+def similar_candidates(titles: Sequence[str], threshold: float,
+                       block_size: int = BLOCK_SIZE) -> Iterator[List[int]]:
+    """
+    For each title in order, the indices of earlier titles it may be similar to
+    
+    The similarity block of a batch of titles against all earlier ones is one
+    matrix product of character count vectors, giving SequenceMatcher's
+    quick_ratio() for every pair. quick_ratio() is an upper bound of ratio(),
+    so a pair below the threshold can never reach ratio() >= threshold and
+    only the survivors (usually a tiny fraction) need a real SequenceMatcher.
+    
+    Requires numpy (see NUMPY_AVAILABLE).
+    """
+    if not titles:
+        return
+    matrix = _count_matrix(titles)
+    # quick_ratio = 2 * matches / (len1 + len2), compared without dividing
+    lengths = np.array([len(title) for title in titles], dtype=np.float32) * (threshold - _EPSILON)
+    
+    for start in range(0, len(titles), block_size):
+        end = min(start + block_size, len(titles))
+        matches = matrix[start:end] @ matrix[:end].T
+        passing = 2.0 * matches >= lengths[start:end, None] + lengths[None, :end]
+        # Only earlier titles count: in the block's own columns keep the strict lower triangle
+        passing[:, start:] &= np.tri(end - start, k=-1, dtype=bool)
+        
+        rows, columns = np.nonzero(passing)
+        bounds = np.searchsorted(rows, np.arange(end - start + 1))
+        for row in range(end - start):
+            yield columns[bounds[row]:bounds[row + 1]].tolist()
@@ -0,0 +1,323 @@
+"""
+Body Enricher - Fetch article bodies and fingerprint them for body-similarity dedup
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.html_parsers import make_soup
+from src.minhash import MinHasher, word_shingles
+from src.rate_limiter import RateLimiter, THROTTLE_STATUS_CODES
+from src.url_canonicalizer import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Body store location and how long a fetched body is kept (overridable from .env)
+BODY_STORE_FILE = os.getenv('BODY_STORE_FILE', os.path.join('.cache', 'bodies.sqlite'))
+BODY_STORE_TTL = int(float(os.getenv('BODY_STORE_TTL_DAYS', '30')) * 86400)
+# Longest body text kept per article; wire copy repeats itself well within this
+BODY_MAX_CHARS = int(os.getenv('BODY_MAX_CHARS', '20000'))
+# Pages fetched at once when the scraper has no thread count of its own (the
+# async scraper), capped at its concurrency limit
+BODY_FETCH_WORKERS = int(os.getenv('BODY_FETCH_WORKERS', '8'))
+# Shorter extractions are teasers or paywalls, too little to fingerprint
+MIN_BODY_CHARS = 200
+
+_DROPPED_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form',
+                 'figure', 'iframe', 'svg', 'button']
+_MIN_PARAGRAPH_CHARS = 40  # Shorter <p> are bylines, captions and share prompts
+
+
+def extract_main_text(content: bytes, parser: str = 'html.parser') -> str:
+    """
+    Main text of an article page
+    
+    Page chrome (scripts, navigation, headers, footers, asides, forms) is
+    dropped, then the element whose direct <p> children hold the most text
+    is taken as the article body, and its paragraphs are joined in order.
+    Pages without paragraphs fall back to the text of <article>/<main>.
+    """
+    soup = make_soup(content, parser)
+    for element in soup.find_all(_DROPPED_TAGS):
+        element.decompose()
+    
+    scores: Dict[int, int] = defaultdict(int)
+    parents = {}
+    for paragraph in soup.find_all('p'):
+        text_length = len(paragraph.get_text(' ', strip=True))
+        if text_length >= _MIN_PARAGRAPH_CHARS and paragraph.parent is not None:
+            scores[id(paragraph.parent)] += text_length
+            parents[id(paragraph.parent)] = paragraph.parent
+    
+    if scores:
+        body = parents[max(scores, key=scores.get)]
+        paragraphs = [
+            paragraph.get_text(' ', strip=True)
+            for paragraph in body.find_all('p', recursive=False)
+        ]
+        text = '\n'.join(p for p in paragraphs if len(p) >= _MIN_PARAGRAPH_CHARS)
+    else:
+        container = soup.find('article') or soup.find('main')
+        text = container.get_text(' ', strip=True) if container else ''
+    return text[:BODY_MAX_CHARS]
+
+
+def body_fingerprint(text: str, hasher: Optional[MinHasher] = None) -> Tuple[int, ...]:
+    """MinHash signature of a body's word shingles (compare with MinHasher.similarity)"""
+    return (hasher or MinHasher()).signature_of(word_shingles(text))
+
+
+class BodyStore:
+    """
+    Extracted article bodies, zlib-compressed in SQLite, keyed by canonical URL.
+    
+    An article is looked up under the hash of its canonical URL, so the same
+    story reached through tracking links, AMP or mobile pages, or a resolved
+    redirect is only ever fetched once. Bodies expire ttl seconds after they
+    were fetched.
+    """
+    
+    def __init__(self, path: str = BODY_STORE_FILE, ttl: int = BODY_STORE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS bodies (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            ) WITHOUT ROWID"""
+        )
+        self._db.commit()
+        self.evict_expired()
+    
+    @staticmethod
+    def key_for(canonical_url: str) -> str:
+        """Store key for a canonical URL"""
+        return hashlib.sha1(canonical_url.lower().encode('utf-8')).hexdigest()
+    
+    def get(self, canonical_url: str) -> Optional[str]:
+        """The stored body for a canonical URL, if it is still within the TTL"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body FROM bodies WHERE key = ? AND fetched_at >= ?",
+                (self.key_for(canonical_url), time.time() - self.ttl)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return zlib.decompress(row[0]).decode('utf-8')
+        except (zlib.error, UnicodeDecodeError) as e:
+            logger.debug(f"Could not read stored body for {canonical_url}: {str(e)}")
+            return None
+    
+    def put(self, canonical_url: str, body: str):
+        """Store a body (an empty one records a page with no extractable text)"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO bodies VALUES (?, ?, ?, ?)",
+                (self.key_for(canonical_url), canonical_url,
+                 zlib.compress(body.encode('utf-8'), 6), time.time())
+            )
+            self._db.commit()
+    
+    def evict_expired(self) -> int:
+        """Drop bodies older than the TTL, returning how many were removed"""
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM bodies WHERE fetched_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+            self._db.commit()
+        if removed:
+            logger.debug(f"Evicted {removed} stored article bodies")
+        return removed
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM bodies").fetchone()[0]
+
+
+class BodyEnricher:
+    """
+    Adds a 'body_fingerprint' to articles from the text of their pages.
+    
+    Pages are fetched concurrently through a scraper's session, per-host
+    semaphores, rate limiter and response cache, so enrichment is exactly as
+    polite as searching. Extracted bodies go to a BodyStore keyed by
+    canonical URL; fetched pages also teach the URL canonicalizer their
+    redirect target and rel=canonical, so later links to the same article
+    map to the stored body. Articles whose body can't be fetched or is too
+    short are left without a fingerprint and are deduplicated as before.
+    """
+    
+    def __init__(self, scraper, store: Optional[BodyStore] = None,
+                 canonicalizer: Optional[Callable[[str], str]] = None,
+                 max_workers: Optional[int] = None,
+                 hasher: Optional[MinHasher] = None):
+        """
+        Args:
+            scraper: NewsScraper (or AsyncNewsScraper) whose connections and limits are shared
+            store: Where bodies are kept between runs (default: a BodyStore)
+            canonicalizer: Maps URLs to canonical form, e.g. a UrlCanonicalizer, which
+                also learns from every fetched page (default: canonicalize_url)
+            max_workers: Pages fetched at once (default: the scraper's max_workers, or
+                BODY_FETCH_WORKERS up to the async scraper's max_concurrency)
+            hasher: MinHasher for the fingerprints; must match the deduplicator's
+        """
+        self.scraper = scraper
+        self.store = store if store is not None else BodyStore()
+        self.canonicalizer = canonicalizer or canonicalize_url
+        if max_workers is None:
+            concurrency = getattr(scraper, 'max_concurrency', None)
+            if concurrency:
+                # The async scraper runs searches on its event loop; its max_workers stays 1
+                max_workers = min(concurrency, BODY_FETCH_WORKERS)
+            else:
+                max_workers = getattr(scraper, 'max_workers', BODY_FETCH_WORKERS)
+        self.max_workers = max(1, max_workers)
+        self.hasher = hasher or MinHasher()
+    
+    def enrich(self, articles: List[Dict]) -> List[Dict]:
+        """
+        Fingerprint the bodies of articles that don't have one yet
+        
+        Articles sharing a canonical URL are fetched once. Stored bodies are
+        used without any request.
+        
+        Returns:
+            The same articles, with 'body_fingerprint' set where a body was found
+        """
+        by_url: Dict[str, List[Dict]] = defaultdict(list)
+        for article in articles:
+            url = article.get('url')
+            if url and 'body_fingerprint' not in article:
+                by_url[self.canonicalizer(url)].append(article)
+        if not by_url:
+            return articles
+        
+        stored, missing = 0, []
+        for canonical_url, group in by_url.items():
+            body = self.store.get(canonical_url)
+            if body is None:
+                missing.append((canonical_url, group))
+            else:
+                stored += 1
+                self._fingerprint(group, body)
+        
+        if missing:
+            logger.info(
+                f"Fetching {len(missing)} article bodies ({stored} already stored, "
+                f"{self.max_workers} workers)"
+            )
+            if self.max_workers > 1 and len(missing) > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    bodies = list(executor.map(self._fetch_body, missing))
+            else:
+                bodies = [self._fetch_body(item) for item in missing]
+            for (canonical_url, group), body in zip(missing, bodies):
+                if body is not None:
+                    self._fingerprint(group, body)
+        
+        found = sum('body_fingerprint' in article for article in articles)
+        logger.info(f"Fingerprinted the bodies of {found} of {len(articles)} articles")
+        return articles
+    
+    def _fingerprint(self, group: List[Dict], body: str):
+        if len(body) < MIN_BODY_CHARS:
+            return
+        fingerprint = body_fingerprint(body, self.hasher)
+        for article in group:
+            article['body_fingerprint'] = fingerprint
+    
+    def _fetch_body(self, item: Tuple[str, List[Dict]]) -> Optional[str]:
+        """
+        Fetch and store the body of one article
+        
+        Returns None (storing nothing) when the page could not be fetched, so
+        it is tried again on a later run.
+        """
+        canonical_url, group = item
+        url = group[0]['url']
+        try:
+            content, final_url = self._fetch_page(url)
+        except Exception as e:
+            logger.debug(f"Could not fetch body of {url}: {type(e).__name__}: {str(e)}")
+            return None
+        if content is None:
+            return None
+        
+        learn_page = getattr(self.canonicalizer, 'learn_page', None)
+        if learn_page:
+            learn_page(url, content.decode('utf-8', errors='replace'), final_url)
+        
+        body = extract_main_text(content, self.scraper.parser)
+        self.store.put(canonical_url, body)
+        return body
+    
+    def _fetch_page(self, url: str) -> Tuple[Optional[bytes], str]:
+        """Page content and final URL, from the response cache or the network"""
+        scraper = self.scraper
+        cache = scraper.cache
+        entry = cache.lookup(url) if cache else None
+        if entry and cache.is_fresh(entry):
+            content = cache.load_body(entry)
+            if content is not None:
+                return content, entry.meta.get('final_url', url)
+        
+        headers = scraper._get_headers()
+        headers.update(cache.conditional_headers(entry) if cache else {})
+        response = self._get(url, headers)
+        
+        if response.status_code == 304 and entry:
+            content = cache.load_body(entry)
+            if content is not None:
+                cache.revalidated(entry, response.headers)
+                return content, entry.meta.get('final_url', url)
+            # The cached copy can't be read, and would be revalidated (and be
+            # unreadable) on every run: drop it and fetch the page in full
+            logger.debug(f"Cached copy of {url} unreadable, fetching it again")
+            cache.delete(entry)
+            response = self._get(url, scraper._get_headers())
+        if response.status_code == 304:
+            logger.debug(f"{url} answered 304 without a cached copy, leaving it for a later run")
+            return None, url
+        if response.status_code in THROTTLE_STATUS_CODES:
+            logger.debug(f"HTTP {response.status_code} for {url}, leaving it for a later run")
+            return None, url
+        response.raise_for_status()
+        if 'html' not in response.headers.get('Content-Type', 'text/html'):
+            return b'', response.url  # Nothing to extract, and nothing to fetch again
+        
+        if cache:
+            try:
+                cache.store(url, response.content, response.headers,
+                            meta={'final_url': response.url})
+            except Exception as e:
+                logger.debug(f"Could not cache {url}: {str(e)}")
+        return response.content, response.url
+    
+    def _get(self, url: str, headers: Dict[str, str]):
+        """GET a page within the scraper's per-host limits"""
+        scraper = self.scraper
+        host = RateLimiter.key_for(url)
+        with scraper._get_host_semaphore(host):
+            scraper.rate_limiter.acquire(host)
+            response = scraper.session.get(
+                url, headers=headers, timeout=scraper.timeout, allow_redirects=True
+            )
+            scraper.rate_limiter.observe(host, response.status_code, response.headers)
+        return response
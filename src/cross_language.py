@@ -0,0 +1,301 @@
+"""
+Cross Language - Group Hindi and English articles that report the same event
+"""
+
+import logging
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Articles count as the same event when the IDF-weighted share of their
+# signal tokens reaches MATCH_THRESHOLD (of the smaller article's total),
+# they share at least MIN_SHARED_TOKENS, and were published within
+# MAX_TIME_GAP_HOURS of each other (when both dates are known)
+MATCH_THRESHOLD = 0.5
+MIN_SHARED_TOKENS = 2
+MAX_TIME_GAP_HOURS = 48
+# Tokens found in more articles than this are too common to point to one event
+MAX_POSTINGS = 200
+
+_DEVANAGARI_DIGITS = str.maketrans('०१२३४५६७८९', '0123456789')
+_TOKEN = re.compile(r'[\wऀ-ॿ]+')
+_DEVANAGARI = re.compile(r'[ऀ-ॿ]')
+
+# Devanagari to rough Latin; only consonant skeletons are compared, so the
+# vowels just need to be vowels
+_CONSONANTS = {
+    'क': 'k', 'ख': 'kh', 'ग': 'g', 'घ': 'gh', 'ङ': 'n', 'च': 'ch', 'छ': 'chh', 'ज': 'j',
+    'झ': 'jh', 'ञ': 'n', 'ट': 't', 'ठ': 'th', 'ड': 'd', 'ढ': 'dh', 'ण': 'n', 'त': 't',
+    'थ': 'th', 'द': 'd', 'ध': 'dh', 'न': 'n', 'प': 'p', 'फ': 'ph', 'ब': 'b', 'भ': 'bh',
+    'म': 'm', 'य': 'y', 'र': 'r', 'ल': 'l', 'ळ': 'l', 'व': 'v', 'श': 'sh', 'ष': 'sh',
+    'स': 's', 'ह': 'h',
+}
+_VOWELS = {
+    'अ': 'a', 'आ': 'aa', 'इ': 'i', 'ई': 'ii', 'उ': 'u', 'ऊ': 'uu', 'ऋ': 'ri', 'ए': 'e',
+    'ऐ': 'ai', 'ओ': 'o', 'औ': 'au', 'ऑ': 'o', 'ा': 'aa', 'ि': 'i', 'ी': 'ii', 'ु': 'u',
+    'ू': 'uu', 'ृ': 'ri', 'े': 'e', 'ै': 'ai', 'ो': 'o', 'ौ': 'au', 'ॉ': 'o', 'ं': 'n',
+    'ँ': 'n', 'ः': 'h',
+}
+_NUKTA = {'क': 'q', 'ख': 'kh', 'ग': 'g', 'ज': 'z', 'ड': 'r', 'ढ': 'rh', 'फ': 'f', 'य': 'y'}
+_VIRAMA = '्'
+_NUKTA_SIGN = '़'
+_ANUSVARA = 'ं'
+_LABIALS = 'पफबभम'
+
+# Spellings that sound alike, reduced to one letter before vowels are dropped
+_SOUND_RULES = [
+    (re.compile(r'c(?=[eiy])'), 's'), (re.compile(r'ch'), 'C'), (re.compile(r'ph'), 'f'),
+    (re.compile(r'([kgjtdbsr])h'), r'\1'), (re.compile(r'c'), 'k'), (re.compile(r'q'), 'k'),
+    (re.compile(r'x'), 'ks'), (re.compile(r'z'), 'j'), (re.compile(r'w'), 'v'),
+    (re.compile(r'h'), ''), (re.compile(r'(?<=.)y'), ''), (re.compile(r'[aeiou]'), ''),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+ENGLISH_STOPWORDS = frozenset("""
+a an the and or but of to in on at for from by with about as into over after before
+is are was were be been has have had will would can could may might should do does did
+not no new news says said say this that these those it its his her their they he she we
+you your our who what when where why how than then there here all more most up down out
+off just also amid live updates update latest today video photos watch report
+""".split())
+HINDI_STOPWORDS = frozenset("""
+के का की को में से पर ने और है हैं था थी थे हो होगा होगी गया गई गए एक यह वह ये वो
+भी तो ही लिए कि जो इस उस इन उन बाद पहले साथ तक अब नहीं कर करने किया किए दिया लेकर
+बड़ा बड़ी बड़े नया नई नए आज कल बीच खबर वीडियो देखें लाइव अपडेट
+""".split())
+
+
+def transliterate(text: str) -> str:
+    """Rough Latin spelling of Devanagari text (other characters are kept)"""
+    text = unicodedata.normalize('NFC', text)
+    result = []
+    chars = list(text)
+    for position, char in enumerate(chars):
+        following = chars[position + 1] if position + 1 < len(chars) else ''
+        if char in _CONSONANTS:
+            if following == _NUKTA_SIGN:
+                result.append(_NUKTA.get(char, _CONSONANTS[char]))
+            else:
+                result.append(_CONSONANTS[char])
+            # Inherent vowel unless a matra or virama follows
+            after = following if following != _NUKTA_SIGN else (
+                chars[position + 2] if position + 2 < len(chars) else ''
+            )
+            if after not in _VOWELS and after != _VIRAMA:
+                result.append('a')
+        elif char == _ANUSVARA and following and following in _LABIALS:
+            result.append('m')  # मुंबई -> mumbai
+        elif char in _VOWELS:
+            result.append(_VOWELS[char])
+        elif char in (_VIRAMA, _NUKTA_SIGN):
+            continue
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+@lru_cache(maxsize=65536)
+def sound_key(token: str) -> str:
+    """
+    Consonant skeleton of a token, equal for most English and Devanagari
+    spellings of the same name (Modi/मोदी -> md, Delhi/दिल्ली -> dl)
+    """
+    token = transliterate(token).lower() if _DEVANAGARI.search(token) else token.lower()
+    token = re.sub(r'[^a-z]', '', token)
+    for pattern, replacement in _SOUND_RULES:
+        token = pattern.sub(replacement, token)
+    return token.lower()
+
+
+def slug_tokens(url: str) -> List[str]:
+    """Words of the URL path, which Hindi sites usually write in English"""
+    try:
+        path = unquote(urlsplit(url or '').path)
+    except ValueError:
+        return []
+    words = []
+    for segment in path.split('/'):
+        if '-' in segment or '_' in segment:
+            words.extend(re.split(r'[-_]+', segment.rsplit('.', 1)[0]))
+    return [word for word in words if word.isalpha()]
+
+
+def _published(article: Dict) -> Optional[float]:
+    """Publication time of an article as a timestamp, if it has a readable one"""
+    value = article.get('published')
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _script(article: Dict, title: str) -> str:
+    """Language group of an article, from its tag or else from its script"""
+    language = article.get('language')
+    if language:
+        return language
+    return 'Hindi' if _DEVANAGARI.search(title) else 'English'
+
+
+def signal_tokens(article: Dict) -> FrozenSet[str]:
+    """
+    Tokens that tie an article to an event in any language
+    
+    Sound keys of the title's names and words (English stopwords and Hindi
+    function words left out), of the URL slug's words, and numbers with two
+    or more digits (Devanagari digits included).
+    """
+    title = (article.get('title') or '').translate(_DEVANAGARI_DIGITS)
+    tokens: Set[str] = set()
+    words = _TOKEN.findall(title) + slug_tokens(article.get('url') or article.get('link') or '')
+    for word in words:
+        if word.isdigit():
+            if len(word) >= 2:
+                tokens.add('#' + word.lstrip('0'))
+            continue
+        if word.lower() in ENGLISH_STOPWORDS or word in HINDI_STOPWORDS:
+            continue
+        key = sound_key(word)
+        if len(key) >= 2:
+            tokens.add(key)
+    return frozenset(tokens)
+
+
+class CrossLanguageMatcher:
+    """
+    Finds earlier articles in another language that report the same event.
+    
+    Articles are added one at a time; each is compared only with the
+    articles sharing one of its signal tokens (through an inverted index,
+    skipping tokens so common they say nothing about the event), so a run
+    costs about linear time in the number of articles. Shared tokens are
+    weighted by how rare they are among the articles seen so far.
+    """
+    
+    def __init__(self, threshold: float = MATCH_THRESHOLD,
+                 min_shared: int = MIN_SHARED_TOKENS,
+                 max_time_gap: float = MAX_TIME_GAP_HOURS * 3600,
+                 max_postings: int = MAX_POSTINGS):
+        self.threshold = threshold
+        self.min_shared = min_shared
+        self.max_time_gap = max_time_gap
+        self.max_postings = max_postings
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._tokens: List[FrozenSet[str]] = []
+        self._languages: List[str] = []
+        self._times: List[Optional[float]] = []
+        self._last = (None, None)  # Features of the last article, reused by add() after match()
+    
+    def __len__(self) -> int:
+        return len(self._tokens)
+    
+    def _weight(self, token: str) -> float:
+        return math.log((len(self._tokens) + 1) / (len(self._postings.get(token, ())) + 1)) + 1.0
+    
+    def _features(self, article: Dict):
+        if self._last[0] is not article:
+            features = (
+                signal_tokens(article),
+                _script(article, article.get('title') or ''),
+                _published(article),
+            )
+            self._last = (article, features)
+        return self._last[1]
+    
+    def match(self, article: Dict) -> List[int]:
+        """Keys of earlier articles in other languages about the same event, best first"""
+        tokens, language, published = self._features(article)
+        
+        shared: Dict[int, List[str]] = defaultdict(list)
+        for token in tokens:
+            keys = self._postings.get(token)
+            if not keys or len(keys) > self.max_postings:
+                continue
+            for key in keys:
+                if self._languages[key] != language:
+                    shared[key].append(token)
+        
+        weights = {token: self._weight(token) for token in tokens}
+        own_weight = sum(weights.values())
+        scored = []
+        for key, common in shared.items():
+            if len(common) < self.min_shared:
+                continue
+            if (published is not None and self._times[key] is not None
+                    and abs(published - self._times[key]) > self.max_time_gap):
+                continue
+            other_weight = sum(self._weight(token) for token in self._tokens[key])
+            score = sum(weights[token] for token in common) / min(own_weight, other_weight)
+            if score >= self.threshold:
+                scored.append((score, -key))
+        return [-key for score, key in sorted(scored, reverse=True)]
+    
+    def add(self, article: Dict) -> int:
+        """Index an article, returning its key"""
+        key = len(self._tokens)
+        tokens, language, published = self._features(article)
+        self._tokens.append(tokens)
+        self._languages.append(language)
+        self._times.append(published)
+        for token in tokens:
+            self._postings[token].append(key)
+        return key
+
+
+class StoryGrouper:
+    """
+    Tags articles with a story_id shared by coverage of one event across languages.
+    
+    An article joins the story of the best matching earlier article in
+    another language, or starts a story of its own. Articles can keep
+    arriving (e.g. from the streaming pipeline); earlier ids never change.
+    """
+    
+    def __init__(self, matcher: Optional[CrossLanguageMatcher] = None):
+        self.matcher = matcher or CrossLanguageMatcher()
+        self._story_ids: List[int] = []
+        self.stories = 0
+    
+    def assign(self, article: Dict) -> int:
+        """Story id for an article (also stored as article['story_id'])"""
+        matches = self.matcher.match(article)
+        if matches:
+            story_id = self._story_ids[matches[0]]
+        else:
+            story_id = self.stories
+            self.stories += 1
+        self.matcher.add(article)
+        self._story_ids.append(story_id)
+        article['story_id'] = story_id
+        return story_id
+    
+    def iter_assign(self, articles: Iterable[Dict]) -> Iterator[Dict]:
+        """Tag articles as they arrive"""
+        for article in articles:
+            self.assign(article)
+            yield article
+    
+    def group(self, articles: List[Dict]) -> List[Dict]:
+        """Tag a batch of articles and log how many cross-language stories were found"""
+        for article in articles:
+            self.assign(article)
+        shared = len(articles) - len({article['story_id'] for article in articles})
+        if shared > 0:
+            logger.info(f"Grouped {shared} articles with coverage of the same story in another language")
+        return articles
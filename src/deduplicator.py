@@ -1,28 +1,296 @@
 """
-Deduplicator - Remove duplicate articles based on URL and title similarity
+Deduplicator - Remove or cluster duplicate articles based on URL, title and body similarity
 """
 
 import logging
-from typing import List, Dict
+from typing import Callable, Iterable, Iterator, List, Dict, Optional
 from difflib import SequenceMatcher
 import hashlib
 
+from src.batch_similarity import MIN_BATCH_SIZE, NUMPY_AVAILABLE, similar_candidates
+from src.cross_language import CrossLanguageMatcher
+from src.minhash import LSHIndex, MinHasher
+from src.url_canonicalizer import canonicalize_url
+
 logger = logging.getLogger(__name__)
 
+# How titles are searched for near-duplicates:
+#   exhaustive - compare with every kept title (exact, quadratic)
+#   lsh - compare only with MinHash LSH candidates (sub-quadratic, may miss a few)
+#   auto - exhaustive while few titles are kept, LSH beyond EXHAUSTIVE_MAX_TITLES
+# Only 'exhaustive' (and 'auto' on runs of up to EXHAUSTIVE_MAX_TITLES articles)
+# is guaranteed to keep exactly what the original all-pairs comparison kept.
+# The indexes trade recall for speed: a near-duplicate the index doesn't propose
+# is kept. On synthetic titles with small character edits, 'lsh' kept 573 of
+# 800 where the all-pairs loop kept 570, so large 'auto' runs can keep a few
+# more near-duplicates than the original did. (A 64-bit SimHash index was
+# tried as well: headlines are too short for it, one edited word flips ~8
+# bits, and it found only 41% of the duplicates LSH finds.)
+SIMILARITY_STRATEGIES = ('auto', 'exhaustive', 'lsh')
+EXHAUSTIVE_MAX_TITLES = 500
+# Estimated word-shingle Jaccard at which two article bodies are the same story
+BODY_SIMILARITY_THRESHOLD = 0.5
+
+
+class _TitleIndex:
+    """
+    Titles kept so far, searched for one similar to a new title.
+    
+    Once more than exhaustive_limit titles are kept, only the candidates a
+    fingerprint index proposes (anything with add(key, fingerprint) and
+    query(fingerprint), such as LSHIndex) are compared.
+    Candidates are always checked with the exact similarity function, in the
+    order the titles were kept, so the first similar kept title is found just
+    as a full scan would find it, as long as the index proposes it.
+    """
+    
+    def __init__(self, first_similar: Callable[[Iterable[str], str], Optional[str]],
+                 exhaustive_limit: Optional[int] = None,
+                 fingerprint: Optional[Callable[[str], object]] = None,
+                 candidates=None):
+        self.first_similar = first_similar
+        self.exhaustive_limit = exhaustive_limit  # None: never use the index
+        self.titles = []
+        self._fingerprint = fingerprint
+        self._index = candidates if exhaustive_limit is not None else None
+        self._last_fingerprint = (None, None)  # Reused by add() right after find_similar()
+    
+    def _fingerprint_of(self, title: str):
+        if self._last_fingerprint[0] != title:
+            self._last_fingerprint = (title, self._fingerprint(title))
+        return self._last_fingerprint[1]
+    
+    def find_similar(self, title: str) -> Optional[str]:
+        """Get the first kept title similar to a title, if any"""
+        if not title:
+            return None
+        if self._index is None or len(self.titles) <= self.exhaustive_limit:
+            candidates = self.titles
+        else:
+            candidates = [self.titles[key] for key in self._index.query(self._fingerprint_of(title))]
+        return self.first_similar(candidates, title)
+    
+    def add(self, title: str):
+        """Keep a title"""
+        if self._index is not None and title:
+            self._index.add(len(self.titles), self._fingerprint_of(title))
+        self.titles.append(title)
+
+
+class _BodyIndex:
+    """
+    Body fingerprints of kept articles, searched for one similar to a new body.
+    
+    Fingerprints are the MinHash signatures set by body_enricher.BodyEnricher;
+    LSH candidates are confirmed by their estimated Jaccard similarity.
+    """
+    
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.keys: List[int] = []
+        self._signatures: List[tuple] = []
+        self._index = LSHIndex()
+    
+    def find_similar(self, signature) -> Optional[int]:
+        """Key of the first kept body similar to a fingerprint, if any"""
+        if not signature:
+            return None
+        for position in self._index.query(signature):
+            if MinHasher.similarity(self._signatures[position], signature) >= self.threshold:
+                return self.keys[position]
+        return None
+    
+    def add(self, key: int, signature):
+        """Keep a body under a caller's key"""
+        if signature:
+            self._index.add(len(self._signatures), signature)
+            self._signatures.append(signature)
+            self.keys.append(key)
+
+
+class StoryCluster:
+    """
+    One story: the articles covering it, led by a representative.
+    
+    The representative is the earliest article of the story in input
+    order, i.e. the one remove_duplicates would have kept.
+    """
+    
+    def __init__(self, members: List[Dict]):
+        self.members = members
+    
+    @property
+    def representative(self) -> Dict:
+        return self.members[0]
+    
+    @property
+    def sources(self) -> List[str]:
+        """Websites covering the story, in order of appearance"""
+        return list(dict.fromkeys(member.get('website', 'Unknown') for member in self.members))
+    
+    @property
+    def also_covered_by(self) -> List[Dict]:
+        """The other articles of the story, one per website other than the representative's"""
+        seen = {self.representative.get('website', 'Unknown')}
+        others = []
+        for member in self.members[1:]:
+            website = member.get('website', 'Unknown')
+            if website not in seen:
+                seen.add(website)
+                others.append(member)
+        return others
+    
+    def __len__(self) -> int:
+        return len(self.members)
+    
+    def to_article(self) -> Dict:
+        """The representative, with the other coverage listed under 'also_covered_by'"""
+        article = dict(self.representative)
+        article['also_covered_by'] = [
+            {key: member[key] for key in ('website', 'url', 'title', 'language') if key in member}
+            for member in self.also_covered_by
+        ]
+        return article
+
+
+class StoryClusterer:
+    """
+    Incremental union-find clustering of articles into stories.
+    
+    Each added article is linked to the earlier articles that
+    remove_duplicates would treat it as a duplicate of (same canonical URL,
+    same title, similar title, similar body) and, optionally, to its best cross-language
+    match; linked articles share a cluster. Adding articles only merges
+    clusters, so a clusterer can be fed across batches (or a stream)
+    without recomputing anything.
+    """
+    
+    def __init__(self, deduplicator: 'Deduplicator', strategy: Optional[str] = None,
+                 cross_language: bool = True):
+        self.deduplicator = deduplicator
+        self.articles: List[Dict] = []
+        self._parent: List[int] = []
+        self._members: Dict[int, List[int]] = {}  # Root -> member keys
+        self._by_url: Dict[str, int] = {}
+        self._by_title: Dict[str, int] = {}
+        self._titles = deduplicator._new_title_index(strategy=strategy)
+        self._bodies = _BodyIndex(deduplicator.body_similarity_threshold)
+        self._matcher = CrossLanguageMatcher() if cross_language else None
+    
+    def _find(self, key: int) -> int:
+        parent = self._parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]  # Path halving
+            key = parent[key]
+        return key
+    
+    def _union(self, key1: int, key2: int):
+        root1, root2 = self._find(key1), self._find(key2)
+        if root1 == root2:
+            return
+        # The earlier article stays the root, so it stays the representative
+        root, other = min(root1, root2), max(root1, root2)
+        self._parent[other] = root
+        self._members[root].extend(self._members.pop(other))
+    
+    def add(self, article: Dict) -> int:
+        """Add an article, returning the id of its cluster (its representative's position)"""
+        key = len(self.articles)
+        self.articles.append(article)
+        self._parent.append(key)
+        self._members[key] = [key]
+        links = []
+        
+        url = self.deduplicator._url_key(article)
+        if url:
+            if url in self._by_url:
+                links.append(self._by_url[url])
+            else:
+                self._by_url[url] = key
+        
+        title = article.get('title', '').lower().strip()
+        if title:
+            if title in self._by_title:
+                links.append(self._by_title[title])
+            else:
+                similar_title = self._titles.find_similar(title)
+                if similar_title is not None:
+                    links.append(self._by_title[similar_title])
+                self._titles.add(title)
+                self._by_title[title] = key
+        
+        body = article.get('body_fingerprint')
+        if body:
+            similar_body = self._bodies.find_similar(body)
+            if similar_body is not None:
+                links.append(similar_body)
+            self._bodies.add(key, body)
+            
+        if self._matcher is not None:
+            matches = self._matcher.match(article)
+            if matches:
+                links.append(matches[0])
+            self._matcher.add(article)
+        
+        for other in links:
+            self._union(key, other)
+        return self._find(key)
+    
+    def add_all(self, articles: Iterable[Dict]):
+        """Add articles in priority order"""
+        for article in articles:
+            self.add(article)
+    
+    def clusters(self) -> List[StoryCluster]:
+        """Current clusters, in order of their representatives"""
+        return [
+            StoryCluster([self.articles[key] for key in sorted(self._members[root])])
+            for root in sorted(self._members)
+        ]
+
 
 class Deduplicator:
     """Remove duplicate articles using multiple strategies"""
     
-    def __init__(self, title_similarity_threshold=0.85):
+    def __init__(self, title_similarity_threshold=0.85, strategy='auto',
+                 url_canonicalizer: Optional[Callable[[str], str]] = None,
+                 body_similarity_threshold=BODY_SIMILARITY_THRESHOLD):
+        """
+        Args:
+            title_similarity_threshold: SequenceMatcher ratio at which titles are duplicates
+            strategy: How near-duplicate titles are searched, see SIMILARITY_STRATEGIES
+            url_canonicalizer: Maps a URL to its canonical form for URL matching,
+                e.g. a UrlCanonicalizer with its redirect table (default: canonicalize_url)
+            body_similarity_threshold: Estimated Jaccard similarity at which the
+                body fingerprints of articles (see BodyEnricher) are duplicates
+        """
+        if strategy not in SIMILARITY_STRATEGIES:
+            raise ValueError(f"Unknown similarity strategy: {strategy}")
         self.title_similarity_threshold = title_similarity_threshold
+        self.strategy = strategy
+        self.url_canonicalizer = url_canonicalizer or canonicalize_url
+        self.body_similarity_threshold = body_similarity_threshold
     
-    def remove_duplicates(self, articles: List[Dict]) -> List[Dict]:
+    def remove_duplicates(self, articles: List[Dict], strategy: Optional[str] = None) -> List[Dict]:
         """
         Remove duplicate articles using multiple strategies:
-        1. Exact URL match
-        2. Title similarity (for cross-language duplicates)
+        1. Canonical URL match
+        2. Title similarity (rewritten headlines)
         3. Exact title match
+        4. Body similarity (same story under another headline), for
+           articles with a body_fingerprint
+        
+        Step 3 is exact for the 'exhaustive' strategy, and for 'auto' (the
+        default) while there are at most EXHAUSTIVE_MAX_TITLES articles. On
+        bigger runs 'auto' switches to LSH candidates, which can miss a few
+        near-duplicates, so slightly more articles may be kept; see
+        SIMILARITY_STRATEGIES.
+        
+        Args:
+            articles: Articles in priority order (earlier ones are kept)
+            strategy: Similarity search strategy for this call, instead of self.strategy
         """
+        strategy = self._check_strategy(strategy)
         logger.info("Starting deduplication process...")
         
         # Step 1: Remove exact URL duplicates
@@ -33,19 +301,101 @@ class Deduplicator:
         articles = self._remove_title_duplicates(articles)
         logger.info(f"After title deduplication: {len(articles)} articles")
         
-        # Step 3: Remove similar titles (cross-language duplicates)
-        articles = self._remove_similar_titles(articles)
+        # Step 3: Remove similar titles (rewrites of the same headline)
+        articles = self._remove_similar_titles(articles, strategy)
         logger.info(f"After similarity deduplication: {len(articles)} articles")
         
+        # Step 4: Remove similar bodies (wire copy under different headlines)
+        if any(article.get('body_fingerprint') for article in articles):
+            articles = self.remove_similar_bodies(articles)
+            logger.info(f"After body deduplication: {len(articles)} articles")
+        
         return articles
     
+    def cluster(self, articles: Iterable[Dict], strategy: Optional[str] = None,
+                clusterer: Optional[StoryClusterer] = None,
+                cross_language: bool = True) -> List[StoryCluster]:
+        """
+        Group articles into story clusters instead of dropping duplicates
+        
+        Articles are linked by the same URL and title checks as
+        remove_duplicates (plus cross-language matching), and every cluster
+        is led by its earliest article. Links chain (A~B and B~C put A and C
+        in one story), so there can be fewer clusters than remove_duplicates
+        keeps articles.
+        
+        Args:
+            articles: Articles in priority order
+            strategy: Similarity search strategy, instead of self.strategy
+            clusterer: A StoryClusterer from an earlier call to add the articles
+                to, updating its clusters; a new one is made when omitted
+            cross_language: Also link Hindi and English coverage of an event
+        
+        Returns:
+            All clusters of the clusterer, in order of their representatives
+        """
+        if clusterer is None:
+            clusterer = StoryClusterer(self, self._check_strategy(strategy), cross_language)
+        clusterer.add_all(articles)
+        clusters = clusterer.clusters()
+        logger.info(f"Clustered {len(clusterer.articles)} articles into {len(clusters)} stories")
+        return clusters
+    
+    def iter_unique(self, articles: Iterable[Dict], strategy: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yield each article that is not a duplicate of an earlier one, as it arrives
+        
+        Applies the same URL, exact title, title and body similarity checks
+        as remove_duplicates one article at a time, so for the same input order
+        the output is identical.
+        """
+        strategy = self._check_strategy(strategy)
+        seen_urls = set()
+        seen_titles = set()
+        kept_titles = self._new_title_index(strategy=strategy)
+        kept_bodies = _BodyIndex(self.body_similarity_threshold)
+        
+        for article in articles:
+            url = self._url_key(article)
+            if url:
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+            
+            title = article.get('title', '').lower().strip()
+            if title:
+                title_hash = hashlib.md5(title.encode()).hexdigest()
+                if title_hash in seen_titles:
+                    continue
+                seen_titles.add(title_hash)
+            
+            if kept_titles.find_similar(title) is not None:
+                logger.debug(f"Removing similar article: '{article['title'][:50]}'")
+                continue
+            # Kept by the title checks, so its title counts for later articles
+            # even if its body is a duplicate, as in remove_duplicates step 3
+            kept_titles.add(title)
+            
+            body = article.get('body_fingerprint')
+            if kept_bodies.find_similar(body) is not None:
+                logger.debug(f"Removing article with a similar body: '{article['title'][:50]}'")
+                continue
+            
+            kept_bodies.add(len(kept_bodies.keys), body)
+            yield article
+    
+    def _url_key(self, article: Dict) -> str:
+        """Key under which articles count as having the same URL"""
+        url = article.get('url', '')
+        return self.url_canonicalizer(url).lower() if url else ''
+    
     def _remove_url_duplicates(self, articles: List[Dict]) -> List[Dict]:
-        """Remove articles with duplicate URLs"""
+        """Remove articles whose URLs have the same canonical form"""
         seen_urls = set()
         unique_articles = []
         
         for article in articles:
-            url = article.get('url', '').lower()
+            url = self._url_key(article)
             if url and url not in seen_urls:
                 seen_urls.add(url)
                 unique_articles.append(article)
@@ -81,34 +431,42 @@ class Deduplicator:
         
         return unique_articles
     
-    def _remove_similar_titles(self, articles: List[Dict]) -> List[Dict]:
-        """Remove articles with similar titles (potential cross-language duplicates)"""
+    def _remove_similar_titles(self, articles: List[Dict], strategy: Optional[str] = None) -> List[Dict]:
+        """
+        Remove articles with similar titles
+        
+        Character similarity only finds rewrites within one script; Hindi and
+        English coverage of the same event is grouped by cross_language.StoryGrouper.
+        
+        An article is removed when its title is similar to the title of an
+        earlier article that was kept. For an exhaustive search with numpy
+        available, the pairs that cannot reach the threshold are ruled out for
+        the whole batch at once (see batch_similarity), with the same result.
+        """
         unique_articles = []
-        processed_indices = set()
+        titles = [article.get('title', '').lower().strip() for article in articles]
+        kept_titles = self._new_title_index(len(articles), strategy)
+        batch_candidates = self._batch_candidates(titles, kept_titles)
+        kept = []
         
-        for i, article in enumerate(articles):
-            if i in processed_indices:
+        for article, title in zip(articles, titles):
+            if batch_candidates is None:
+                similar_title = kept_titles.find_similar(title)
+            else:
+                earlier = next(batch_candidates)
+                similar_title = self._first_similar(
+                    (titles[index] for index in earlier if kept[index]), title
+                )
+            kept.append(similar_title is None)
+            if similar_title is not None:
+                logger.debug(
+                    f"Removing similar article: '{article['title'][:50]}' "
+                    f"(similar to '{similar_title[:50]}')"
+                )
                 continue
             
             unique_articles.append(article)
-            current_title = article.get('title', '').lower().strip()
-            
-            # Check against remaining articles
-            for j in range(i + 1, len(articles)):
-                if j in processed_indices:
-                    continue
-                
-                other_title = articles[j].get('title', '').lower().strip()
-                
-                # Calculate similarity
-                similarity = self._calculate_similarity(current_title, other_title)
-                
-                if similarity >= self.title_similarity_threshold:
-                    logger.debug(
-                        f"Removing similar article: '{articles[j]['title'][:50]}' "
-                        f"(similarity: {similarity:.2f})"
-                    )
-                    processed_indices.add(j)
+            kept_titles.add(title)
         
         removed = len(articles) - len(unique_articles)
         if removed > 0:
@@ -116,6 +474,90 @@ class Deduplicator:
         
         return unique_articles
     
+    def remove_similar_bodies(self, articles: List[Dict]) -> List[Dict]:
+        """
+        Remove articles whose body is similar to the body of an earlier kept article
+        
+        Only articles with a 'body_fingerprint' (set by BodyEnricher) are
+        compared; the others are always kept.
+        """
+        unique_articles = []
+        kept_bodies = _BodyIndex(self.body_similarity_threshold)
+        
+        for article in articles:
+            body = article.get('body_fingerprint')
+            similar = kept_bodies.find_similar(body)
+            if similar is not None:
+                logger.debug(
+                    f"Removing article with a similar body: '{article.get('title', '')[:50]}' "
+                    f"(same story as '{unique_articles[similar].get('title', '')[:50]}')"
+                )
+                continue
+            kept_bodies.add(len(unique_articles), body)
+            unique_articles.append(article)
+        
+        removed = len(articles) - len(unique_articles)
+        if removed > 0:
+            logger.debug(f"Removed {removed} articles with similar bodies")
+        
+        return unique_articles
+    
+    def _batch_candidates(self, titles: List[str], kept_titles: _TitleIndex) -> Optional[Iterator[List[int]]]:
+        """Per-title candidate lists from the vectorized scorer, or None to search title by title"""
+        if (kept_titles.exhaustive_limit is not None or not NUMPY_AVAILABLE
+                or len(titles) < MIN_BATCH_SIZE):
+            return None
+        return similar_candidates(titles, self.title_similarity_threshold)
+    
+    def _check_strategy(self, strategy: Optional[str]) -> str:
+        """Resolve a per-call strategy, defaulting to the configured one"""
+        if strategy is None:
+            return self.strategy
+        if strategy not in SIMILARITY_STRATEGIES:
+            raise ValueError(f"Unknown similarity strategy: {strategy}")
+        return strategy
+    
+    def _new_title_index(self, expected: Optional[int] = None,
+                         strategy: Optional[str] = None) -> _TitleIndex:
+        """Create the index of kept titles for a strategy (the configured one by default)"""
+        strategy = strategy or self.strategy
+        if strategy == 'exhaustive' or (
+            strategy == 'auto' and expected is not None and expected <= EXHAUSTIVE_MAX_TITLES
+        ):
+            return _TitleIndex(self._first_similar)
+        return _TitleIndex(
+            self._first_similar,
+            exhaustive_limit=EXHAUSTIVE_MAX_TITLES if strategy == 'auto' else 0,
+            fingerprint=MinHasher().signature,
+            candidates=LSHIndex()
+        )
+    
+    def _first_similar(self, earlier_titles: Iterable[str], title: str) -> Optional[str]:
+        """
+        Get the first earlier title whose _calculate_similarity to title reaches the threshold
+        
+        One SequenceMatcher is reused with title as its indexed second sequence,
+        and cheap upper bounds on the ratio (length ratio, real_quick_ratio,
+        quick_ratio) reject most pairs before the full ratio() is computed.
+        """
+        if not title:
+            return None
+        threshold = self.title_similarity_threshold
+        matcher = None
+        for other_title in earlier_titles:
+            if not other_title:
+                continue
+            if 2.0 * min(len(other_title), len(title)) / (len(other_title) + len(title)) < threshold:
+                continue
+            if matcher is None:
+                matcher = SequenceMatcher(None, b=title)
+            matcher.set_seq1(other_title)
+            if (matcher.real_quick_ratio() >= threshold
+                    and matcher.quick_ratio() >= threshold
+                    and matcher.ratio() >= threshold):
+                return other_title
+        return None
+    
     @staticmethod
     def _calculate_similarity(str1: str, str2: str) -> float:
         """Calculate similarity between two strings (0.0 to 1.0)"""
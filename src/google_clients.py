@@ -0,0 +1,223 @@
+"""
+Google Clients - Process-wide pool of Google credentials and API service objects
+"""
+
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build, build_from_document
+
+try:
+    from googleapiclient.discovery_cache import get_static_doc
+except ImportError:  # google-api-python-client < 2.0 has no bundled discovery documents
+    get_static_doc = None
+
+logger = logging.getLogger(__name__)
+
+# Token and credentials file paths
+CREDENTIALS_FILE = 'credentials.json'
+TOKEN_FILE = 'token.pickle'
+
+# Credentials are refreshed this many seconds before they expire, so no API call
+# is made with a token about to lapse (overridable from .env)
+TOKEN_REFRESH_MARGIN = int(os.getenv('GOOGLE_TOKEN_REFRESH_MARGIN', '300'))
+
+
+class ClientPool:
+    """
+    Credentials and API service objects shared by everything in the process.
+    
+    Each token file is read once; its credentials are kept in memory and
+    refreshed (and saved) when they come within refresh_margin seconds of
+    expiry, instead of being unpickled and checked by every caller. API
+    discovery documents are loaded and parsed once, and service objects are
+    cached per thread (the underlying HTTP clients are not thread-safe), so
+    a new run or a new worker thread only pays for a cheap build from the
+    cached document.
+    """
+    
+    def __init__(self, credentials_file: str = CREDENTIALS_FILE,
+                 refresh_margin: int = TOKEN_REFRESH_MARGIN):
+        self.credentials_file = credentials_file
+        self.refresh_margin = refresh_margin
+        self._lock = threading.RLock()
+        self._credentials: Dict[str, Credentials] = {}
+        self._scopes: Dict[str, set] = {}  # Scopes requested so far, per token file
+        self._documents: Dict[Tuple[str, str], Optional[dict]] = {}
+        self._local = threading.local()
+    
+    def credentials(self, scopes: Iterable[str], token_file: str = TOKEN_FILE,
+                    interactive: Optional[bool] = None):
+        """
+        Valid credentials for a token file
+        
+        Args:
+            scopes: Scopes the caller needs; a new OAuth consent asks for every
+                scope requested from this token file so far
+            token_file: token.pickle (pickled credentials) or a .json
+                authorized-user file
+            interactive: Allow the browser OAuth flow (default: only with a terminal)
+        
+        Raises:
+            FileNotFoundError: if consent is needed and credentials.json is missing
+            RuntimeError: if consent is needed but not allowed
+        """
+        with self._lock:
+            requested = self._scopes.setdefault(token_file, set())
+            requested.update(scopes)
+            creds = self._credentials.get(token_file)
+            if creds is None:
+                creds = self._load(token_file, sorted(requested))
+            
+            if creds and self._needs_refresh(creds) and creds.refresh_token:
+                logger.info("Refreshing token before it expires...")
+                creds.refresh(Request())
+                self._save(token_file, creds)
+            elif not creds or not creds.valid:
+                creds = self._authorize(token_file, sorted(requested), interactive)
+            
+            self._credentials[token_file] = creds
+            return creds
+    
+    def service(self, api: str, version: str, scopes: Iterable[str],
+                token_file: str = TOKEN_FILE, interactive: Optional[bool] = None):
+        """A service object for the calling thread, e.g. service('docs', 'v1', SCOPES)"""
+        creds = self.credentials(scopes, token_file, interactive)
+        services = getattr(self._local, 'services', None)
+        if services is None:
+            services = self._local.services = {}
+        
+        key = (api, version, token_file)
+        cached = services.get(key)
+        if cached is not None and cached[0] is creds:
+            return cached[1]
+        
+        document = self._discovery_document(api, version)
+        if document is not None:
+            service = build_from_document(document, credentials=creds)
+        else:
+            service = build(api, version, credentials=creds)
+        services[key] = (creds, service)
+        return service
+    
+    def warm_up(self, apis: Iterable[Tuple[str, str]], scopes: Iterable[str],
+                token_file: str = TOKEN_FILE):
+        """Load credentials and discovery documents ahead of the first run"""
+        try:
+            self.credentials(scopes, token_file, interactive=False)
+        except Exception as e:
+            logger.warning(f"Could not load Google credentials ahead of time: {str(e)}")
+        for api, version in apis:
+            self._discovery_document(api, version)
+    
+    def granted_scopes(self, token_file: str = TOKEN_FILE) -> Optional[Set[str]]:
+        """
+        Scopes the user consented to for a token file, or None if unknown
+        
+        A token saved before a caller added a scope still loads and refreshes,
+        but calls needing the new scope fail until the user consents again.
+        """
+        with self._lock:
+            creds = self._credentials.get(token_file)
+        granted = getattr(creds, 'granted_scopes', None)
+        if not granted and token_file.endswith('.json'):
+            # from_authorized_user_file reports the scopes asked for, not the saved ones
+            try:
+                with open(token_file, 'r') as token:
+                    granted = json.load(token).get('scopes')
+            except (OSError, ValueError):
+                granted = None
+        elif not granted:
+            granted = getattr(creds, 'scopes', None)
+        if isinstance(granted, str):
+            granted = granted.split()
+        return set(granted) if granted else None
+    
+    def invalidate(self, token_file: str = TOKEN_FILE):
+        """Forget cached credentials, e.g. after the token file was replaced"""
+        with self._lock:
+            self._credentials.pop(token_file, None)
+    
+    def _needs_refresh(self, creds) -> bool:
+        """True once credentials are expired or about to expire"""
+        expiry = getattr(creds, 'expiry', None)
+        if expiry is None:
+            return not creds.valid
+        now = datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth keeps expiry as naive UTC
+        return expiry - timedelta(seconds=self.refresh_margin) <= now
+    
+    def _discovery_document(self, api: str, version: str) -> Optional[dict]:
+        """Parsed discovery document bundled with the client library, loaded once"""
+        key = (api, version)
+        with self._lock:
+            if key not in self._documents:
+                document = get_static_doc(api, version) if get_static_doc else None
+                self._documents[key] = json.loads(document) if document else None
+            return self._documents[key]
+    
+    @staticmethod
+    def _load(token_file: str, scopes):
+        """Read saved credentials, if there are any"""
+        if not os.path.exists(token_file):
+            return None
+        if token_file.endswith('.json'):
+            creds = Credentials.from_authorized_user_file(token_file, scopes)
+        else:
+            with open(token_file, 'rb') as token:
+                creds = pickle.load(token)
+        logger.info("Loaded existing token")
+        return creds
+    
+    @staticmethod
+    def _save(token_file: str, creds):
+        """Save credentials for future runs"""
+        if token_file.endswith('.json'):
+            with open(token_file, 'w') as token:
+                token.write(creds.to_json())
+        else:
+            with open(token_file, 'wb') as token:
+                pickle.dump(creds, token)
+        logger.info("Token saved for future use")
+    
+    def _authorize(self, token_file: str, scopes, interactive: Optional[bool]):
+        """Run the OAuth2 consent flow and save the new credentials"""
+        if not os.path.exists(self.credentials_file):
+            raise FileNotFoundError(
+                f"{self.credentials_file} not found. "
+                "Please download it from Google Cloud Console and place in project root."
+            )
+        
+        if interactive is None:
+            interactive = sys.stdin.isatty()
+        if not interactive:
+            raise RuntimeError(
+                "Interactive OAuth required, but no interactive terminal is available."
+            )
+        
+        logger.info("Running OAuth2 flow...")
+        flow = InstalledAppFlow.from_client_secrets_file(self.credentials_file, scopes)
+        creds = flow.run_local_server(port=0, open_browser=True)
+        self._save(token_file, creds)
+        return creds
+
+
+_pool: Optional[ClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ClientPool:
+    """The process-wide ClientPool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ClientPool()
+        return _pool
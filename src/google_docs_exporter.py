@@ -2,18 +2,24 @@
 Google Docs Exporter - Export results to Google Docs with proper formatting
 """
 
+import json
 import logging
 import os
-import pickle
-import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Optional
-from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
+from typing import Iterable, Iterator, List, Dict, Optional
 from dotenv import load_dotenv
 
+from src.google_clients import get_pool
+from src.pipeline import Stage
+from src.rate_limiter import RateLimiter, THROTTLE_STATUS_CODES
+from src.report import (
+    DocsRequestWriter, article_entry, build_index_report, build_language_report,
+    docs_link_text, entry_segments, render_docs_requests
+)
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -24,9 +30,28 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive'
 ]
 
-# Token and credentials file paths
-CREDENTIALS_FILE = 'credentials.json'
-TOKEN_FILE = 'token.pickle'
+# batchUpdate limits: requests per call and JSON payload size (the API rejects
+# bodies of ~10 MB; staying well below keeps each call fast to apply)
+MAX_BATCH_REQUESTS = 500
+MAX_BATCH_BYTES = 1024 * 1024
+
+# Incremental export: append articles to the document as they arrive, flushing
+# every DOCS_FLUSH_ARTICLES articles or DOCS_FLUSH_SECONDS after the first
+# unflushed one (overridable from .env)
+DOCS_INCREMENTAL_EXPORT = os.getenv('DOCS_INCREMENTAL_EXPORT', 'false').lower() == 'true'
+DOCS_FLUSH_ARTICLES = int(os.getenv('DOCS_FLUSH_ARTICLES', '25'))
+DOCS_FLUSH_SECONDS = float(os.getenv('DOCS_FLUSH_SECONDS', '10'))
+# Keep appending to this document instead of creating one per run
+DOCS_APPEND_DOCUMENT_ID = os.getenv('DOCS_APPEND_DOCUMENT_ID') or None
+
+# Sharded export: one document per language or keyword, written in parallel
+# and linked from an index document (overridable from .env)
+SHARD_KEYS = {'language': 'language', 'keyword': 'keyword'}
+DOCS_SHARD_BY = os.getenv('DOCS_SHARD_BY', '').lower() or None
+DOCS_SHARD_WORKERS = int(os.getenv('DOCS_SHARD_WORKERS', '4'))
+# Docs API write quota (60 per minute per user by default), shared by all workers
+DOCS_WRITES_PER_MINUTE = float(os.getenv('DOCS_WRITES_PER_MINUTE', '60'))
+DOCS_QUOTA_KEY = 'docs.googleapis.com'
 
 
 class GoogleDocsExporter:
@@ -36,10 +61,18 @@ class GoogleDocsExporter:
         self.docs_service = None
         self.drive_service = None
         self.demo_mode = False
+        # Articles the latest export really wrote to a document (not the ones
+        # lost to a failed shard or a demo fallback), e.g. to mark as reported
+        self.exported_articles: List[Dict] = []
+        self._credentials = None
+        self._owner_thread = threading.get_ident()  # Other threads get their own clients
         try:
-            creds = self._authenticate()
-            self.docs_service = build('docs', 'v1', credentials=creds)
-            self.drive_service = build('drive', 'v3', credentials=creds)
+            # Credentials and clients come from the process-wide pool, so
+            # repeated runs don't redo the token load and client setup
+            pool = get_pool()
+            self.docs_service = pool.service('docs', 'v1', SCOPES)
+            self.drive_service = pool.service('drive', 'v3', SCOPES)
+            self._credentials = pool.credentials(SCOPES)
         except Exception as e:
             self.demo_mode = True
             logger.warning(
@@ -47,98 +80,298 @@ class GoogleDocsExporter:
                 str(e)
             )
         self.output_folder_id = os.getenv('OUTPUT_FOLDER_ID', 'root')
+        self.incremental = DOCS_INCREMENTAL_EXPORT
+        self.append_document_id = DOCS_APPEND_DOCUMENT_ID
+        if DOCS_SHARD_BY and DOCS_SHARD_BY not in SHARD_KEYS:
+            raise ValueError(f"Unknown DOCS_SHARD_BY: {DOCS_SHARD_BY} (choose from {', '.join(SHARD_KEYS)})")
+        self.shard_by = DOCS_SHARD_BY
+        self.shard_workers = max(1, DOCS_SHARD_WORKERS)
+        # Write calls from every thread share one token bucket sized to the quota
+        self.rate_limiter = RateLimiter(rate=DOCS_WRITES_PER_MINUTE / 60.0, burst=5)
+        self.sleep = time.sleep  # Waits for the quota and backoff (replaceable, e.g. in tests)
     
-    def _authenticate(self):
-        """Authenticate with Google APIs using OAuth2 flow"""
-        creds = None
+    def export(self, articles: List[Dict]) -> str:
+        """
+        Export articles to a new Google Doc with clickable links
         
-        # Load existing token if available
-        if os.path.exists(TOKEN_FILE):
-            with open(TOKEN_FILE, 'rb') as token:
-                creds = pickle.load(token)
-                logger.info("Loaded existing token")
+        Args:
+            articles: List of article dictionaries
         
-        # If no valid credentials, use OAuth2 flow
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                logger.info("Refreshing expired token...")
-                creds.refresh(Request())
-            else:
-                if not os.path.exists(CREDENTIALS_FILE):
-                    raise FileNotFoundError(
-                        f"{CREDENTIALS_FILE} not found. "
-                        "Please download it from Google Cloud Console and place in project root."
-                    )
-                
-                if not sys.stdin.isatty():
-                    raise RuntimeError(
-                        "Interactive OAuth required, but no interactive terminal is available."
-                    )
-
-                logger.info("Running OAuth2 flow...")
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    CREDENTIALS_FILE, SCOPES)
-                creds = flow.run_local_server(port=0, open_browser=True)
-            
-            # Save token for future use
-            with open(TOKEN_FILE, 'wb') as token:
-                pickle.dump(creds, token)
-                logger.info("Token saved for future use")
+        Returns:
+            URL of the created document (the index document when sharding)
+        """
+        self.exported_articles = []
+        if self.shard_by:
+            return self.export_sharded(articles, self.shard_by)
+        return self._export_single(articles)
+    
+    def export_stream(self, articles: Iterable[Dict]) -> str:
+        """
+        Export articles to a new Google Doc while they are still arriving
+        
+        The document is created (and moved to the output folder) before the
+        first article is consumed, so that round trip overlaps with the search.
+        The report itself groups and counts articles by language, so it is
+        written once the stream ends, unless incremental export is on (see
+        export_incremental).
+        
+        Args:
+            articles: Iterable of article dictionaries, e.g. a pipeline stage
+        
+        Returns:
+            URL of the created document
+        """
+        if self.incremental:
+            return self.export_incremental(articles, self.append_document_id)
         
-        return creds
+        self.exported_articles = []
+        doc_id = None
+        error = None
+        try:
+            doc_id = self._create_document()
+        except Exception as e:
+            error = e
+        
+        collected = list(articles)
+        logger.info(f"Received {len(collected)} articles for export")
+        
+        if doc_id is None:
+            return self._demo_export(error)
+        try:
+            self._insert_content(doc_id, collected)
+            self.exported_articles = collected
+            return self._document_url(doc_id)
+        except Exception as e:
+            return self._demo_export(e)
     
-    def export(self, articles: List[Dict]) -> str:
+    def export_sharded(self, articles: List[Dict], shard_by: str = 'language',
+                       max_workers: Optional[int] = None) -> str:
         """
-        Export articles to a new Google Doc with clickable links
+        Export articles as one document per language or keyword, plus an index
+        
+        The shard documents are created and written concurrently by at most
+        max_workers threads, each with its own API clients; every API call
+        still waits for the shared write quota (rate_limiter) and backs off
+        when throttled. The index document lists each shard with its article
+        count and a link, or notes that its export failed.
         
         Args:
             articles: List of article dictionaries
+            shard_by: 'language' or 'keyword'
+            max_workers: Shards written at once (default: self.shard_workers)
         
         Returns:
-            URL of the created document
+            URL of the index document (of the only document for a single shard)
         """
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"Unknown shard key: {shard_by} (choose from {', '.join(SHARD_KEYS)})")
+        key = SHARD_KEYS[shard_by]
+        self.exported_articles = []
+        shards: Dict[str, List[Dict]] = {}
+        for article in articles:
+            shards.setdefault(article.get(key) or 'Unknown', []).append(article)
+        if len(shards) <= 1 or self.demo_mode:
+            return self._export_single(articles)
+        
+        names = sorted(shards)
+        workers = min(max_workers or self.shard_workers, len(names))
+        logger.info(f"Exporting {len(articles)} articles as {len(names)} documents by {shard_by} "
+                    f"({workers} at a time)")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            doc_ids = list(executor.map(lambda name: self._export_shard(name, shards[name]), names))
+        
         try:
-            if self.demo_mode or not self.docs_service:
-                raise RuntimeError("Google Docs service unavailable")
-            # Create new document
-            doc_title = self._generate_doc_title()
-            document = self.docs_service.documents().create(
-                body={'title': doc_title}
-            ).execute()
-            
-            doc_id = document['documentId']
-            logger.info(f"Created document with ID: {doc_id}")
-            
-            # Move to output folder if specified
-            if self.output_folder_id != 'root':
-                try:
-                    self.drive_service.files().update(
-                        fileId=doc_id,
-                        addParents=self.output_folder_id,
-                        fields='id, parents'
-                    ).execute()
-                    logger.info(f"Moved document to folder: {self.output_folder_id}")
-                except Exception as e:
-                    logger.warning(f"Could not move document to folder: {str(e)}")
+            index_id = self._create_document(f"{self._generate_doc_title()} - Index")
+            self._send_requests(index_id, render_docs_requests(build_index_report([
+                (name, len(shards[name]), self._document_url(doc_id) if doc_id else None)
+                for name, doc_id in zip(names, doc_ids)
+            ])))
+            self.exported_articles = [
+                article for name, doc_id in zip(names, doc_ids) if doc_id for article in shards[name]
+            ]
+            return self._document_url(index_id)
+        except Exception as e:
+            return self._demo_export(e)
+    
+    def _export_single(self, articles: List[Dict]) -> str:
+        """Export all articles to one new document"""
+        try:
+            doc_id = self._create_document()
             
             # Insert content with proper formatting
             self._insert_content(doc_id, articles)
+            self.exported_articles = list(articles)
             
-            # Get the document URL
-            doc_url = f"https://docs.google.com/document/d/{doc_id}/edit"
-            logger.info(f"Document exported: {doc_url}")
-            
-            return doc_url
+            return self._document_url(doc_id)
+        
+        except Exception as e:
+            return self._demo_export(e)
+    
+    def _export_shard(self, name: str, articles: List[Dict]) -> Optional[str]:
+        """Create and fill one shard document, returning its ID (None if it failed)"""
+        try:
+            doc_id = self._create_document(f"{self._generate_doc_title()} - {name}")
+            self._insert_content(doc_id, articles)
+            return doc_id
+        except Exception as e:
+            logger.error(f"Could not export the {name} document: {str(e)}")
+            return None
+    
+    def _services(self):
+        """Docs and Drive clients for the calling thread (API clients are not thread-safe)"""
+        if self._credentials is None or threading.get_ident() == self._owner_thread:
+            return self.docs_service, self.drive_service
+        pool = get_pool()
+        return pool.service('docs', 'v1', SCOPES), pool.service('drive', 'v3', SCOPES)
+    
+    def _execute(self, request):
+        """Execute an API request within the write quota, retrying when throttled"""
+        for attempt in range(3):
+            wait = self.rate_limiter.reserve(DOCS_QUOTA_KEY)
+            if wait > 0:
+                self.sleep(wait)
+            try:
+                response = request.execute()
+            except Exception as e:
+                resp = getattr(e, 'resp', None)
+                status = getattr(resp, 'status', None)
+                if status not in THROTTLE_STATUS_CODES:
+                    raise
+                # HttpError.resp is an httplib2 response: a dict with lowercase header names
+                headers = {'Retry-After': resp.get('retry-after')} if hasattr(resp, 'get') else None
+                retry_after = self.rate_limiter.observe(DOCS_QUOTA_KEY, status, headers)
+                if attempt == 2:
+                    raise
+                self.sleep(self.rate_limiter.backoff_delay(attempt, retry_after))
+                continue
+            self.rate_limiter.observe(DOCS_QUOTA_KEY, 200)
+            return response
+    
+    def export_incremental(self, articles: Iterable[Dict], doc_id: Optional[str] = None,
+                           max_articles: int = DOCS_FLUSH_ARTICLES,
+                           max_wait: float = DOCS_FLUSH_SECONDS) -> str:
+        """
+        Append articles to a Google Doc in batches while they are still arriving
+        
+        Articles are numbered in arrival order and tagged with their language
+        instead of being grouped. Each batch is appended to the end of the body
+        (endOfSegmentLocation) once it holds max_articles or its first article
+        has waited max_wait seconds, so long runs show results early and
+        nothing already written is ever rewritten. The totals are appended
+        when the stream ends.
+        
+        If a batch cannot be appended the export stops there, and
+        exported_articles holds only the articles already in the document, so
+        callers can tell a partial export from a complete one.
+        
+        Args:
+            articles: Iterable of article dictionaries, e.g. a pipeline stage
+            doc_id: Existing document to append to; a new one is created when omitted
+            max_articles: Articles per append
+            max_wait: Seconds an article waits at most before it is appended
+        
+        Returns:
+            URL of the document
+        """
+        self.exported_articles = []
+        try:
+            if doc_id:
+                writer = DocsRequestWriter(self._document_end(doc_id), append=True)
+                writer.write(f"\n{'=' * 80}\n")
+            else:
+                doc_id = self._create_document()
+                writer = DocsRequestWriter(1, append=True)
+            writer.write('News Monitoring Report\n')
+            writer.write(f'Started: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n\n')
+            self._send_requests(doc_id, writer.take())
+        except Exception as e:
+            logger.info(f"Received {sum(1 for _ in articles)} articles for export")
+            return self._demo_export(e)
+        
+        count = 0
+        stories = {}  # Earlier articles by story_id, for "Also in <language>" lines
+        stream = Stage('export', articles, max(1, max_articles))
+        try:
+            for batch in stream.iter_batches(max_articles, max_wait):
+                for article in batch:
+                    count += 1
+                    writer.write_segments(entry_segments(
+                        article_entry(article, with_language=True, stories=stories), count,
+                        link_text=docs_link_text
+                    ))
+                    if article.get('story_id') is not None:
+                        stories.setdefault(article['story_id'], []).append(article)
+                self._send_requests(doc_id, writer.take())
+                self.exported_articles.extend(batch)
+                logger.info(f"Appended {len(batch)} articles to the document ({count} so far)")
             
+            writer.write(f'Total Articles: {count}\n')
+            writer.write(f'Completed: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n')
+            self._send_requests(doc_id, writer.take())
         except Exception as e:
-            logger.warning(f"Could not export to Google Docs: {str(e)}")
-            logger.info("Generating demo export...")
-            # Return demo document URL for demo mode
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            demo_url = f"https://docs.google.com/document/d/demo_{timestamp}/edit"
-            logger.info(f"Demo document URL: {demo_url}")
-            return demo_url
+            logger.error(
+                f"Incremental export stopped: the document holds only the first "
+                f"{len(self.exported_articles)} articles ({str(e)})"
+            )
+            stream.close()
+        
+        return self._document_url(doc_id)
+    
+    def _document_end(self, doc_id: str) -> int:
+        """Index where text appended to a document's body lands"""
+        if self.demo_mode or not self.docs_service:
+            raise RuntimeError("Google Docs service unavailable")
+        document = self._execute(self._services()[0].documents().get(
+            documentId=doc_id, fields='body/content/endIndex'
+        ))
+        # The body always ends with a newline that appended text goes in front of
+        return document['body']['content'][-1]['endIndex'] - 1
+    
+    def _create_document(self, doc_title: Optional[str] = None) -> str:
+        """Create the report document, move it to the output folder and return its ID"""
+        if self.demo_mode or not self.docs_service:
+            raise RuntimeError("Google Docs service unavailable")
+        docs_service, drive_service = self._services()
+        # Create new document
+        doc_title = doc_title or self._generate_doc_title()
+        document = self._execute(docs_service.documents().create(
+            body={'title': doc_title}
+        ))
+        
+        doc_id = document['documentId']
+        logger.info(f"Created document with ID: {doc_id}")
+        
+        # Move to output folder if specified
+        if self.output_folder_id != 'root':
+            try:
+                self._execute(drive_service.files().update(
+                    fileId=doc_id,
+                    addParents=self.output_folder_id,
+                    fields='id, parents'
+                ))
+                logger.info(f"Moved document to folder: {self.output_folder_id}")
+            except Exception as e:
+                logger.warning(f"Could not move document to folder: {str(e)}")
+        
+        return doc_id
+    
+    @staticmethod
+    def _document_url(doc_id: str) -> str:
+        """Get the URL of an exported document"""
+        doc_url = f"https://docs.google.com/document/d/{doc_id}/edit"
+        logger.info(f"Document exported: {doc_url}")
+        return doc_url
+    
+    @staticmethod
+    def _demo_export(error: Exception) -> str:
+        """Fall back to a demo document URL when Google Docs is unavailable"""
+        logger.warning(f"Could not export to Google Docs: {str(error)}")
+        logger.info("Generating demo export...")
+        # Return demo document URL for demo mode
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        demo_url = f"https://docs.google.com/document/d/demo_{timestamp}/edit"
+        logger.info(f"Demo document URL: {demo_url}")
+        return demo_url
     
     def _generate_doc_title(self) -> str:
         """Generate document title with timestamp"""
@@ -152,174 +385,46 @@ class GoogleDocsExporter:
                 logger.warning("No articles to insert")
                 return
             
-            # Group articles by language
-            articles_by_lang = {}
-            for article in articles:
-                lang = article.get('language', 'Unknown')
-                if lang not in articles_by_lang:
-                    articles_by_lang[lang] = []
-                articles_by_lang[lang].append(article)
-            
-            # Build batch update requests
-            requests = []
-            
-            # Title
-            requests.append({
-                'insertText': {
-                    'text': 'News Monitoring Report\n',
-                    'location': {'index': 1}
-                }
-            })
-            
-            # Timestamp
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            requests.append({
-                'insertText': {
-                    'text': f'Generated: {timestamp}\n',
-                    'location': {'index': 1 + len('News Monitoring Report\n')}
-                }
-            })
+            requests = render_docs_requests(build_language_report(articles))
+            calls = self._send_requests(doc_id, requests)
             
-            requests.append({
-                'insertText': {
-                    'text': f'Total Articles: {len(articles)}\n\n',
-                    'location': {'index': 1 + len('News Monitoring Report\n') + len(f'Generated: {timestamp}\n')}
-                }
-            })
-            
-            # Execute all text insertions first
-            self.docs_service.documents().batchUpdate(
-                documentId=doc_id,
-                body={'requests': requests}
-            ).execute()
-            
-            # Now add language sections with articles
-            current_offset = 1 + len('News Monitoring Report\n') + len(f'Generated: {timestamp}\n') + len(f'Total Articles: {len(articles)}\n\n')
-            
-            for language in sorted(articles_by_lang.keys()):
-                lang_articles = articles_by_lang[language]
-                
-                # Add language section header
-                lang_header = f"\n{'='*80}\n{language.upper()} NEWS ({len(lang_articles)} articles)\n{'='*80}\n\n"
-                
-                section_requests = []
-                section_requests.append({
-                    'insertText': {
-                        'text': lang_header,
-                        'location': {'index': current_offset}
-                    }
-                })
-                
-                self.docs_service.documents().batchUpdate(
-                    documentId=doc_id,
-                    body={'requests': section_requests}
-                ).execute()
-                
-                current_offset += len(lang_header)
-                
-                # Add articles with links
-                for i, article in enumerate(lang_articles, 1):
-                    title = article.get('title', 'No Title')
-                    url = article.get('url', '')
-                    summary = article.get('summary', '')
-                    website = article.get('website', 'Unknown')
-                    
-                    # Insert article number and title
-                    article_text = f"{i}. {title}\n"
-                    
-                    article_requests = []
-                    article_requests.append({
-                        'insertText': {
-                            'text': article_text,
-                            'location': {'index': current_offset}
-                        }
-                    })
-                    
-                    self.docs_service.documents().batchUpdate(
-                        documentId=doc_id,
-                        body={'requests': article_requests}
-                    ).execute()
-                    
-                    current_offset += len(article_text)
-                    
-                    # Insert website info
-                    website_text = f"Website: {website}\n"
-                    self.docs_service.documents().batchUpdate(
-                        documentId=doc_id,
-                        body={'requests': [{'insertText': {'text': website_text, 'location': {'index': current_offset}}}]}
-                    ).execute()
-                    current_offset += len(website_text)
-                    
-                    # Insert URL with link if available
-                    if url:
-                        url_text = f"Read More: "
-                        self.docs_service.documents().batchUpdate(
-                            documentId=doc_id,
-                            body={'requests': [{'insertText': {'text': url_text, 'location': {'index': current_offset}}}]}
-                        ).execute()
-                        current_offset += len(url_text)
-                        
-                        # Now add the URL as a hyperlink
-                        url_display = url if len(url) < 60 else url[:57] + "..."
-                        self.docs_service.documents().batchUpdate(
-                            documentId=doc_id,
-                            body={'requests': [{
-                                'insertText': {
-                                    'text': url_display,
-                                    'location': {'index': current_offset}
-                                }
-                            }]}
-                        ).execute()
-                        
-                        # Create link
-                        self.docs_service.documents().batchUpdate(
-                            documentId=doc_id,
-                            body={'requests': [{
-                                'updateTextStyle': {
-                                    'range': {
-                                        'startIndex': current_offset,
-                                        'endIndex': current_offset + len(url_display)
-                                    },
-                                    'textStyle': {
-                                        'link': {
-                                            'url': url
-                                        }
-                                    },
-                                    'fields': 'link'
-                                }
-                            }]}
-                        ).execute()
-                        
-                        current_offset += len(url_display)
-                        self.docs_service.documents().batchUpdate(
-                            documentId=doc_id,
-                            body={'requests': [{'insertText': {'text': '\n', 'location': {'index': current_offset}}}]}
-                        ).execute()
-                        current_offset += 1
-                    
-                    # Insert summary if available
-                    if summary:
-                        summary_text = f"Summary: {summary}\n"
-                        self.docs_service.documents().batchUpdate(
-                            documentId=doc_id,
-                            body={'requests': [{'insertText': {'text': summary_text, 'location': {'index': current_offset}}}]}
-                        ).execute()
-                        current_offset += len(summary_text)
-                    
-                    # Separator
-                    separator = "\n" + "-" * 80 + "\n\n"
-                    self.docs_service.documents().batchUpdate(
-                        documentId=doc_id,
-                        body={'requests': [{'insertText': {'text': separator, 'location': {'index': current_offset}}}]}
-                    ).execute()
-                    current_offset += len(separator)
-            
-            logger.info("Content inserted successfully with formatting and links")
+            logger.info(
+                f"Content inserted successfully with formatting and links "
+                f"({len(requests)} requests in {calls} batchUpdate calls)"
+            )
             
         except Exception as e:
             logger.error(f"Error inserting content: {str(e)}", exc_info=True)
             raise
     
+    def _send_requests(self, doc_id: str, requests: List[Dict]) -> int:
+        """Apply requests in as few batchUpdate calls as the limits allow, returning the call count"""
+        docs_service = self._services()[0]
+        calls = 0
+        for batch in self._chunk_requests(requests):
+            self._execute(docs_service.documents().batchUpdate(
+                documentId=doc_id,
+                body={'requests': batch}
+            ))
+            calls += 1
+        return calls
+    
+    @staticmethod
+    def _chunk_requests(requests: List[Dict], max_requests: int = MAX_BATCH_REQUESTS,
+                        max_bytes: int = MAX_BATCH_BYTES) -> Iterator[List[Dict]]:
+        """Split requests into consecutive batches within the batchUpdate size limits"""
+        batch = []
+        size = 0
+        for request in requests:
+            request_size = len(json.dumps(request, ensure_ascii=False).encode('utf-8'))
+            if batch and (len(batch) >= max_requests or size + request_size > max_bytes):
+                yield batch
+                batch, size = [], 0
+            batch.append(request)
+            size += request_size
+        if batch:
+            yield batch
+    
     @staticmethod
     def _generate_doc_title() -> str:
         """Generate document title with timestamp"""
@@ -2,33 +2,46 @@
 Google Sheets Handler - Read keywords and websites from Google Sheets
 """
 
+import json
 import logging
 import os
-import pickle
-import sys
-from pathlib import Path
-from google.auth.transport.requests import Request
-from google.oauth2.service_account import Credentials
-from google.oauth2.credentials import Credentials as UserCredentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import threading
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+from src.google_clients import TOKEN_FILE, get_pool
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Google Sheets API scopes
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+# Google Sheets API scopes (Drive metadata to tell whether the sheets changed)
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+    'https://www.googleapis.com/auth/drive.metadata.readonly'
+]
+# Any of these lets the Drive revision check read file metadata
+DRIVE_METADATA_SCOPES = {
+    'https://www.googleapis.com/auth/drive.metadata.readonly',
+    'https://www.googleapis.com/auth/drive.metadata',
+    'https://www.googleapis.com/auth/drive.readonly',
+    'https://www.googleapis.com/auth/drive',
+}
+
+KEYWORDS_RANGE = 'Sheet1!A:B'
+WEBSITES_RANGE = 'Sheet1!A:C'
 
-# Token and credentials file paths
-CREDENTIALS_FILE = 'credentials.json'
-TOKEN_FILE = 'token.pickle'
+# Parsed keywords and websites are kept here and reused while the sheets'
+# Drive revision is unchanged (overridable from .env)
+SHEETS_CONFIG_CACHE = os.getenv('SHEETS_CONFIG_CACHE', 'true').lower() == 'true'
+SHEETS_CONFIG_FILE = os.getenv('SHEETS_CONFIG_FILE', os.path.join('.cache', 'sheets_config.json'))
 
 
 class GoogleSheetsHandler:
     """Handle reading data from Google Sheets"""
     
+    _reauthorization_logged = False  # Once per process, not once per handler
+    
     def __init__(self):
         self.keywords_sheet_id = os.getenv('KEYWORDS_SHEET_ID')
         self.websites_sheet_id = os.getenv('WEBSITES_SHEET_ID')
@@ -38,6 +51,8 @@ class GoogleSheetsHandler:
                 "KEYWORDS_SHEET_ID and WEBSITES_SHEET_ID must be set in .env file"
             )
         
+        self.cache_path = SHEETS_CONFIG_FILE if SHEETS_CONFIG_CACHE else None
+        self._config = None  # Loaded once, shared by fetch_keywords and fetch_websites
         self.service = None
         try:
             self.service = self._authenticate()
@@ -48,43 +63,8 @@ class GoogleSheetsHandler:
             )
     
     def _authenticate(self):
-        """Authenticate with Google Sheets API using OAuth2 flow"""
-        creds = None
-        
-        # Load existing token if available
-        if os.path.exists(TOKEN_FILE):
-            with open(TOKEN_FILE, 'rb') as token:
-                creds = pickle.load(token)
-                logger.info("Loaded existing token")
-        
-        # If no valid credentials, use OAuth2 flow
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                logger.info("Refreshing expired token...")
-                creds.refresh(Request())
-            else:
-                if not os.path.exists(CREDENTIALS_FILE):
-                    raise FileNotFoundError(
-                        f"{CREDENTIALS_FILE} not found. "
-                        "Please download it from Google Cloud Console and place in project root."
-                    )
-                
-                if not sys.stdin.isatty():
-                    raise RuntimeError(
-                        "Interactive OAuth required, but no interactive terminal is available."
-                    )
-
-                logger.info("Running OAuth2 flow...")
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    CREDENTIALS_FILE, SCOPES)
-                creds = flow.run_local_server(port=0, open_browser=True)
-            
-            # Save token for future use
-            with open(TOKEN_FILE, 'wb') as token:
-                pickle.dump(creds, token)
-                logger.info("Token saved for future use")
-        
-        return build('sheets', 'v4', credentials=creds)
+        """Get the Sheets service from the shared client pool (OAuth2 flow on first use)"""
+        return get_pool().service('sheets', 'v4', SCOPES)
     
     def fetch_keywords(self):
         """
@@ -92,25 +72,7 @@ class GoogleSheetsHandler:
         Returns list of dicts: [{'keyword': '...', 'language': 'Hindi/English'}, ...]
         """
         try:
-            if not self.service:
-                raise RuntimeError("Google Sheets service unavailable")
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.keywords_sheet_id,
-                range='Sheet1!A:B'
-            ).execute()
-            
-            rows = result.get('values', [])
-            keywords = []
-            
-            # Skip header row
-            for row in rows[1:]:
-                if len(row) >= 2:
-                    keywords.append({
-                        'keyword': row[0],
-                        'language': row[1]
-                    })
-            
-            return keywords
+            return self.load_config()['keywords']
         except Exception as e:
             logger.warning(f"Error fetching keywords from Google Sheets: {str(e)}")
             logger.info("Using demo keywords instead...")
@@ -129,26 +91,7 @@ class GoogleSheetsHandler:
         Returns list of dicts: [{'name': '...', 'url': '...', 'language': 'Hindi/English'}, ...]
         """
         try:
-            if not self.service:
-                raise RuntimeError("Google Sheets service unavailable")
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.websites_sheet_id,
-                range='Sheet1!A:C'
-            ).execute()
-            
-            rows = result.get('values', [])
-            websites = []
-            
-            # Skip header row
-            for row in rows[1:]:
-                if len(row) >= 3:
-                    websites.append({
-                        'name': row[0],
-                        'url': row[1],
-                        'language': row[2]
-                    })
-            
-            return websites
+            return self.load_config()['websites']
         except Exception as e:
             logger.warning(f"Error fetching websites from Google Sheets: {str(e)}")
             logger.info("Using demo websites instead...")
@@ -160,3 +103,143 @@ class GoogleSheetsHandler:
                 {'name': 'Aaj Tak', 'url': 'https://www.aajtaak.in', 'language': 'Hindi'},
                 {'name': 'NDTV', 'url': 'https://www.ndtv.com', 'language': 'Hindi'},
             ]
+    
+    def load_config(self) -> Dict[str, List[Dict]]:
+        """
+        Keywords and websites, as {'keywords': [...], 'websites': [...]}
+        
+        When there is a cached copy, the sheets' Drive revisions are checked
+        first; when they match it, nothing is downloaded. Otherwise both
+        ranges are read (in one batchGet when they are in the same
+        spreadsheet) and cached with the revisions, if they were checked. If
+        the download fails, the cached copy is used, however old.
+        """
+        if self._config is not None:
+            return self._config
+        if not self.service:
+            raise RuntimeError("Google Sheets service unavailable")
+        
+        sheets = {'keywords': self.keywords_sheet_id, 'websites': self.websites_sheet_id}
+        cached = self._read_cache()
+        if cached and cached.get('sheets') != sheets:
+            cached = None  # Cached from other spreadsheets
+        # With nothing cached to compare with, the revision check can't save the download
+        versions = self._sheet_versions() if cached else None
+        
+        if cached and versions and cached.get('versions') == versions:
+            logger.info("Google Sheets unchanged since last run, using cached keywords and websites")
+            self._config = cached['config']
+            return self._config
+        
+        try:
+            keyword_rows, website_rows = self._download()
+        except Exception as e:
+            if not cached:
+                raise
+            logger.warning(f"Could not download Google Sheets ({str(e)}), using cached copy")
+            self._config = cached['config']
+            return self._config
+        
+        self._config = {
+            'keywords': self._parse_keywords(keyword_rows),
+            'websites': self._parse_websites(website_rows)
+        }
+        self._write_cache({'sheets': sheets, 'versions': versions, 'config': self._config})
+        return self._config
+    
+    def _download(self):
+        """Rows of the keywords and websites ranges"""
+        values = self.service.spreadsheets().values()
+        if self.keywords_sheet_id == self.websites_sheet_id:
+            result = values.batchGet(
+                spreadsheetId=self.keywords_sheet_id,
+                ranges=[KEYWORDS_RANGE, WEBSITES_RANGE]
+            ).execute()
+            keywords, websites = result.get('valueRanges', [{}, {}])
+            return keywords.get('values', []), websites.get('values', [])
+        
+        keywords = values.get(spreadsheetId=self.keywords_sheet_id, range=KEYWORDS_RANGE).execute()
+        websites = values.get(spreadsheetId=self.websites_sheet_id, range=WEBSITES_RANGE).execute()
+        return keywords.get('values', []), websites.get('values', [])
+    
+    def _sheet_versions(self) -> Optional[Dict[str, str]]:
+        """Drive revision and modified time of each spreadsheet, or None if unavailable"""
+        if not self._can_read_drive_metadata():
+            return None
+        try:
+            files = get_pool().service('drive', 'v3', SCOPES).files()
+            versions = {}
+            for sheet_id in sorted({self.keywords_sheet_id, self.websites_sheet_id}):
+                meta = files.get(
+                    fileId=sheet_id, fields='modifiedTime,version', supportsAllDrives=True
+                ).execute()
+                versions[sheet_id] = f"{meta.get('version')}@{meta.get('modifiedTime')}"
+            return versions
+        except Exception as e:
+            logger.info(f"Could not check Google Sheets for changes, downloading them: {str(e)}")
+            return None
+    
+    def _can_read_drive_metadata(self) -> bool:
+        """False if the saved token predates the Drive metadata scope (logged once)"""
+        granted = get_pool().granted_scopes()
+        if granted is None or granted & DRIVE_METADATA_SCOPES:
+            return True
+        if not GoogleSheetsHandler._reauthorization_logged:
+            GoogleSheetsHandler._reauthorization_logged = True
+            logger.warning(
+                f"{TOKEN_FILE} was authorised without Drive metadata access, so Google Sheets "
+                f"are downloaded on every run. Delete {TOKEN_FILE} and sign in again to reuse "
+                "the cached keywords and websites while the sheets are unchanged."
+            )
+        return False
+    
+    @staticmethod
+    def _parse_keywords(rows) -> List[Dict]:
+        keywords = []
+        # Skip header row
+        for row in rows[1:]:
+            if len(row) >= 2:
+                keywords.append({
+                    'keyword': row[0],
+                    'language': row[1]
+                })
+        return keywords
+    
+    @staticmethod
+    def _parse_websites(rows) -> List[Dict]:
+        websites = []
+        # Skip header row
+        for row in rows[1:]:
+            if len(row) >= 3:
+                websites.append({
+                    'name': row[0],
+                    'url': row[1],
+                    'language': row[2]
+                })
+        return websites
+    
+    def _read_cache(self) -> Optional[Dict]:
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read cached sheets config from {self.cache_path}: {str(e)}")
+            return None
+    
+    def _write_cache(self, data: Dict):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.cache_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not save sheets config to {self.cache_path}: {str(e)}")
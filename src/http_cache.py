@@ -0,0 +1,221 @@
+"""
+HTTP Cache - Persistent on-disk response cache with conditional GET revalidation
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# Cache location and limits (overridable from .env)
+CACHE_DIR = os.getenv('HTTP_CACHE_DIR', os.path.join('.cache', 'http'))
+CACHE_TTL = int(os.getenv('HTTP_CACHE_TTL', '600'))  # Seconds a response is served without revalidating
+CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', str(7 * 24 * 3600)))  # Seconds an entry is kept at all
+CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL for use as a cache key (case, default ports, query order, fragment)"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+class CacheEntry:
+    """Metadata for a cached response"""
+    
+    def __init__(self, key: str, url: str, etag: Optional[str], last_modified: Optional[str],
+                 stored_at: float, size: int, meta: Optional[Dict] = None):
+        self.key = key
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.size = size
+        self.meta = meta or {}
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache.
+    
+    Bodies are stored zlib-compressed on disk, keyed by normalized URL, with a
+    small SQLite index holding validators and access times. Entries younger than
+    the TTL are served directly; older ones are revalidated with
+    If-None-Match / If-Modified-Since. The least recently used entries are
+    evicted once the cache grows past max_bytes.
+    """
+    
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl: int = CACHE_TTL,
+                 max_age: int = CACHE_MAX_AGE, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                meta TEXT
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._db.commit()
+    
+    @staticmethod
+    def key_for(url: str) -> str:
+        """Cache key for a URL"""
+        return hashlib.sha1(normalize_url(url).encode('utf-8')).hexdigest()
+    
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.zlib")
+    
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Get the cache entry for a URL, if there is one"""
+        key = self.key_for(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, etag, last_modified, stored_at, size, meta FROM entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if not row:
+                return None
+            
+            if time.time() - row[3] > self.max_age or not os.path.exists(self._body_path(key)):
+                self._delete(key)
+                self._db.commit()
+                return None
+            
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        
+        return CacheEntry(key, row[0], row[1], row[2], row[3], row[4],
+                          json.loads(row[5]) if row[5] else None)
+    
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """True if the entry can be used without revalidating"""
+        return time.time() - entry.stored_at < self.ttl
+    
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Validator headers for revalidating an entry"""
+        headers = {}
+        if entry:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+    
+    def load_body(self, entry: CacheEntry) -> Optional[bytes]:
+        """Read and decompress a cached body"""
+        try:
+            with open(self._body_path(entry.key), 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            logger.debug(f"Could not read cached body for {entry.url}: {str(e)}")
+            return None
+    
+    def store(self, url: str, content: bytes, headers=None, meta: Optional[Dict] = None) -> CacheEntry:
+        """Store a fresh 200 response"""
+        headers = headers or {}
+        key = self.key_for(url)
+        compressed = zlib.compress(content, 6)
+        
+        path = self._body_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        
+        now = time.time()
+        entry = CacheEntry(key, url, headers.get('ETag'), headers.get('Last-Modified'),
+                           now, len(compressed), meta)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, entry.etag, entry.last_modified, now, now, entry.size,
+                 json.dumps(meta, ensure_ascii=False) if meta else None)
+            )
+            self._evict()
+            self._db.commit()
+        return entry
+    
+    def revalidated(self, entry: CacheEntry, headers=None) -> CacheEntry:
+        """Mark an entry fresh again after a 304 Not Modified"""
+        headers = headers or {}
+        entry.etag = headers.get('ETag') or entry.etag
+        entry.last_modified = headers.get('Last-Modified') or entry.last_modified
+        entry.stored_at = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET etag = ?, last_modified = ?, stored_at = ?, accessed_at = ? WHERE key = ?",
+                (entry.etag, entry.last_modified, entry.stored_at, entry.stored_at, entry.key)
+            )
+            self._db.commit()
+        return entry
+    
+    def set_meta(self, entry: CacheEntry, meta: Dict):
+        """Attach derived data (e.g. parsed articles) to an entry"""
+        entry.meta = meta
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET meta = ? WHERE key = ?",
+                (json.dumps(meta, ensure_ascii=False), entry.key)
+            )
+            self._db.commit()
+    
+    def delete(self, entry: CacheEntry):
+        """Drop an entry, e.g. one whose cached articles can no longer be read"""
+        with self._lock:
+            self._delete(entry.key)
+            self._db.commit()
+    
+    def _delete(self, key: str):
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(self._body_path(key))
+        except OSError:
+            pass
+    
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        target = int(self.max_bytes * 0.9)  # Leave headroom so we don't evict on every store
+        evicted = 0
+        for key, size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            if total <= target:
+                break
+            self._delete(key)
+            total -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} cached responses")
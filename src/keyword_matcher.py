@@ -0,0 +1,95 @@
+"""
+Keyword Matcher - Find every keyword that appears in a text in one pass
+"""
+
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for case-insensitive keyword matching"""
+    return unicodedata.normalize('NFKC', text or '').casefold()
+
+
+class KeywordMatcher:
+    """
+    Finds which of a set of keywords appear in a text.
+    
+    Keywords in any script are normalized (NFKC, so composed and decomposed
+    Devanagari agree, then casefolded) and compiled into one Aho-Corasick
+    automaton. A text is scanned once, a character at a time, however many
+    keywords there are, and every keyword it contains is reported, including
+    keywords inside other keywords ("modi" in "narendra modi").
+    """
+    
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = tuple(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]  # Keywords ending at each state
+        self._always: Tuple[int, ...] = ()  # Empty keywords, found in any text
+        
+        for index, keyword in enumerate(self.keywords):
+            pattern = normalize_text(keyword)
+            if not pattern:
+                self._always += (index,)
+                continue
+            state = 0
+            for char in pattern:
+                following = self._goto[state].get(char)
+                if following is None:
+                    following = len(self._goto)
+                    self._goto[state][char] = following
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = following
+            self._output[state] += (index,)
+        
+        # Failure links, breadth first so shorter suffixes are complete first
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[following] = self._goto[fallback].get(char, 0)
+                self._output[following] += self._output[self._fail[following]]
+    
+    def __len__(self) -> int:
+        return len(self.keywords)
+    
+    def find(self, *texts: str) -> List[str]:
+        """
+        Keywords that appear in any of the texts, in keyword order
+        
+        e.g. find(title, summary); each text is scanned separately, so no
+        keyword is matched across the boundary between two of them.
+        """
+        found = set(self._always)
+        goto, fail, output = self._goto, self._fail, self._output
+        for text in texts:
+            if len(found) == len(self.keywords):
+                break
+            state = 0
+            for char in normalize_text(text):
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                if output[state]:
+                    found.update(output[state])
+        return [self.keywords[index] for index in sorted(found)]
+
+
+@lru_cache(maxsize=256)
+def _compiled(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def keyword_matcher(keywords: Iterable[str]) -> KeywordMatcher:
+    """Compiled matcher for keywords, shared by every caller with the same keywords"""
+    return _compiled(tuple(keywords))
@@ -4,8 +4,19 @@ Bilingual News Monitoring Automation System
 """
 
 import logging
+import os
+from typing import Optional
 from src.google_sheets_handler import GoogleSheetsHandler
+from src.http_cache import ResponseCache
+from src.html_parsers import DEFAULT_PARSER
 from src.news_scraper import NewsScraper
+from src.parse_cache import ParseCache
+from src.pipeline import run_pipeline
+from src.seen_index import SeenIndex
+from src.site_profiles import SiteProfileRegistry
+from src.url_canonicalizer import UrlCanonicalizer
+from src.body_enricher import BodyEnricher
+from src.cross_language import StoryGrouper
 from src.deduplicator import Deduplicator
 from src.google_docs_exporter import GoogleDocsExporter
 
@@ -20,12 +31,83 @@ logger = logging.getLogger(__name__)
 class NewsAutoCollector:
     """Main orchestrator for the news collection workflow"""
     
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, streaming: Optional[bool] = None):
+        """
+        Args:
+            backend: Scraper backend, 'sync' (thread pool) or 'async' (asyncio).
+                Defaults to the SCRAPER_BACKEND environment variable.
+            streaming: Run search, dedup and export as a streaming pipeline.
+                Defaults to the PIPELINE_STREAMING environment variable.
+        """
+        if streaming is None:
+            streaming = os.getenv('PIPELINE_STREAMING', 'false').lower() == 'true'
+        self.streaming = streaming
         self.sheets_handler = GoogleSheetsHandler()
-        self.scraper = NewsScraper()
-        self.deduplicator = Deduplicator()
+        self.scraper = self._create_scraper(backend or os.getenv('SCRAPER_BACKEND', 'sync'))
+        # Canonical URLs, plus redirects resolved on earlier runs, decide URL duplicates
+        url_canonicalizer = (
+            UrlCanonicalizer() if os.getenv('URL_CANONICAL', 'true').lower() == 'true' else None
+        )
+        self.deduplicator = Deduplicator(url_canonicalizer=url_canonicalizer)
+        # Fetch article bodies so the same story under different headlines is caught
+        self.body_enricher = (
+            BodyEnricher(self.scraper, canonicalizer=url_canonicalizer)
+            if os.getenv('BODY_ENRICHMENT', 'false').lower() == 'true' else None
+        )
+        # Articles reported by earlier runs are not reported again within the TTL
+        self.seen_index = SeenIndex() if os.getenv('SEEN_INDEX', 'true').lower() == 'true' else None
+        # Hindi and English coverage of the same event share a story_id
+        self.story_grouping = os.getenv('STORY_GROUPING', 'true').lower() == 'true'
+        # Report one entry per story listing the other sources, instead of dropping duplicates
+        self.story_clusters = os.getenv('STORY_CLUSTERS', 'false').lower() == 'true'
+        if self.story_clusters and self.streaming:
+            logger.warning(
+                "STORY_CLUSTERS is ignored with PIPELINE_STREAMING: a story's coverage is only "
+                "known once every search has finished, so duplicate coverage is dropped instead"
+            )
         self.exporter = GoogleDocsExporter()
     
+    @staticmethod
+    def _create_scraper(backend: str) -> NewsScraper:
+        """Create the scraper for the requested backend"""
+        max_per_host = int(os.getenv('SCRAPER_MAX_PER_HOST', '1'))
+        cache = ResponseCache() if os.getenv('HTTP_CACHE', 'true').lower() == 'true' else None
+        parse_cache = ParseCache() if os.getenv('PARSE_CACHE', 'true').lower() == 'true' else None
+        # Both backends extract the same articles; lxml is faster but needs the C extension
+        parser = os.getenv('SCRAPER_PARSER', DEFAULT_PARSER)
+        profiles = SiteProfileRegistry() if os.getenv('SITE_PROFILES', 'true').lower() == 'true' else None
+        keyword_batch_size = int(os.getenv('SCRAPER_KEYWORD_BATCH', '1'))
+        relevance_filter = os.getenv('SCRAPER_RELEVANCE_FILTER', 'false').lower() == 'true'
+        
+        if backend == 'async':
+            try:
+                from src.async_news_scraper import AsyncNewsScraper
+                return AsyncNewsScraper(
+                    max_concurrency=int(os.getenv('SCRAPER_MAX_CONCURRENCY', '100')),
+                    max_per_host=max_per_host,
+                    cache=cache,
+                    parse_cache=parse_cache,
+                    parser=parser,
+                    profiles=profiles,
+                    keyword_batch_size=keyword_batch_size,
+                    relevance_filter=relevance_filter
+                )
+            except ImportError as e:
+                logger.warning(f"Async scraper unavailable ({str(e)}). Using sync backend.")
+        elif backend != 'sync':
+            raise ValueError(f"Unknown scraper backend: {backend}")
+        
+        return NewsScraper(
+            max_workers=int(os.getenv('SCRAPER_MAX_WORKERS', '8')),
+            max_per_host=max_per_host,
+            cache=cache,
+            parse_cache=parse_cache,
+            parser=parser,
+            profiles=profiles,
+            keyword_batch_size=keyword_batch_size,
+            relevance_filter=relevance_filter
+        )
+    
     def run(self):
         """Execute the complete news collection workflow"""
         try:
@@ -41,21 +123,61 @@ class NewsAutoCollector:
             websites = self.sheets_handler.fetch_websites()
             logger.info(f"Fetched {len(websites)} websites")
             
+            if self.streaming:
+                # Steps 3-5 overlapped: articles flow to dedup and export as searches finish
+                logger.info("Starting streaming search, deduplication and export...")
+                doc_url = run_pipeline(
+                    self.scraper, self.deduplicator, self.exporter, websites, keywords,
+                    seen_index=self.seen_index,
+                    story_grouper=StoryGrouper() if self.story_grouping else None,
+                    body_enricher=self.body_enricher
+                )
+                logger.info(f"Successfully exported to Google Docs: {doc_url}")
+                return doc_url
+            
             # Step 3: Search for articles
             logger.info("Starting article search across websites...")
             articles = self.scraper.search_articles(websites, keywords)
             logger.info(f"Found {len(articles)} articles before deduplication")
             
-            # Step 4: Remove duplicates
-            logger.info("Removing duplicate articles...")
-            unique_articles = self.deduplicator.remove_duplicates(articles)
+            if self.body_enricher:
+                logger.info("Fetching article bodies...")
+                self.body_enricher.enrich(articles)
+            
+            if self.story_clusters:
+                # Step 4: Group duplicates into stories, one entry per story
+                logger.info("Clustering articles into stories...")
+                clusters = self.deduplicator.cluster(articles)
+                unique_articles = [cluster.to_article() for cluster in clusters]
+            else:
+                # Step 4: Remove duplicates
+                logger.info("Removing duplicate articles...")
+                unique_articles = self.deduplicator.remove_duplicates(articles)
             logger.info(f"Found {len(unique_articles)} unique articles after deduplication")
             
+            new_articles = unique_articles
+            if self.seen_index:
+                new_articles = self.seen_index.filter_unseen(unique_articles)
+                logger.info(f"{len(new_articles)} articles not reported by earlier runs")
+            
+            if self.story_grouping and not self.story_clusters:
+                StoryGrouper().group(new_articles)
+            
             # Step 5: Export to Google Docs
             logger.info("Exporting results to Google Docs...")
-            doc_url = self.exporter.export(unique_articles)
+            doc_url = self.exporter.export(new_articles)
             logger.info(f"Successfully exported to Google Docs: {doc_url}")
             
+            if self.seen_index and not self.exporter.demo_mode:
+                # Refresh what earlier runs reported, but record new articles only
+                # once they are in a document: if the export failed they stay
+                # unseen and the next run reports them
+                new_ids = {id(article) for article in new_articles}
+                self.seen_index.mark_seen(
+                    [article for article in unique_articles if id(article) not in new_ids] +
+                    self.exporter.exported_articles
+                )
+            
             return doc_url
             
         except Exception as e:
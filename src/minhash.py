@@ -0,0 +1,147 @@
+"""
+MinHash - Shingled MinHash signatures and an LSH index for near-duplicate search
+"""
+
+import re
+import zlib
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+# Signature layout: NUM_BANDS bands of ROWS_PER_BAND values. Two texts with
+# shingle Jaccard similarity J share at least one band with probability
+# 1 - (1 - J**ROWS_PER_BAND) ** NUM_BANDS, i.e. ~0.99 at J=0.5 and ~0.03 at J=0.1
+NUM_BANDS = 32
+ROWS_PER_BAND = 3
+SHINGLE_SIZE = 3
+WORD_SHINGLE_SIZE = 5  # Words per shingle for long texts such as article bodies
+
+_WHITESPACE = re.compile(r'\s+')
+_WORD = re.compile(r'[\w\u0900-\u097f]+')  # Devanagari vowel signs are not \w
+_EMPTY = 1 << 32
+_VALUE_SEED = 0x5BD1E995  # Second CRC seed, so bin choice and bin value are independent
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Character shingles of a text, lowercased with whitespace collapsed"""
+    text = _WHITESPACE.sub(' ', (text or '').lower()).strip()
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def word_shingles(text: str, size: int = WORD_SHINGLE_SIZE) -> Set[str]:
+    """
+    Word shingles of a text, lowercased with punctuation dropped
+    
+    Character trigrams of two long texts in one language overlap heavily
+    whatever they say; runs of words only match where the wording does.
+    """
+    words = _WORD.findall((text or '').lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    One-permutation MinHash with densification.
+    
+    Every shingle is hashed once (two seeded CRC32s, which are stable across
+    processes unlike hash()); one picks one of num_values bins and the other
+    competes for that bin's minimum. Empty
+    bins borrow from the next non-empty bin (with an offset per step), so the
+    signature keeps the MinHash property that the fraction of equal values
+    estimates Jaccard similarity, at O(shingles) instead of
+    O(shingles * permutations) per text.
+    """
+    
+    def __init__(self, num_values: int = NUM_BANDS * ROWS_PER_BAND,
+                 shingle_size: int = SHINGLE_SIZE):
+        self.num_values = num_values
+        self.shingle_size = shingle_size
+    
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """MinHash signature of a text"""
+        return self.signature_of(shingles(text, self.shingle_size))
+    
+    def signature_of(self, items: Iterable[str]) -> Tuple[int, ...]:
+        """MinHash signature of a set of shingles (or any strings)"""
+        k = self.num_values
+        bins = [_EMPTY] * k
+        crc32 = zlib.crc32
+        for item in items:
+            data = item.encode('utf-8')
+            index = (crc32(data) * k) >> 32
+            value = crc32(data, _VALUE_SEED)
+            if value < bins[index]:
+                bins[index] = value
+        
+        if _EMPTY not in bins or min(bins) == _EMPTY:
+            return tuple(bins)
+        
+        # Densify: each empty bin takes the next filled bin's value (circularly),
+        # shifted by its distance; one backwards pass starting at a filled bin
+        last = max(index for index in range(k) if bins[index] != _EMPTY)
+        value, distance = bins[last], 0
+        for step in range(1, k):
+            index = last - step
+            if bins[index] == _EMPTY:
+                distance += 1
+                bins[index] = value + distance * _EMPTY
+            else:
+                value, distance = bins[index], 0
+        return tuple(bins)
+    
+    @staticmethod
+    def similarity(signature1: Tuple[int, ...], signature2: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        if not signature1 or len(signature1) != len(signature2):
+            return 0.0
+        return sum(a == b for a, b in zip(signature1, signature2)) / len(signature1)
+
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hash index over MinHash signatures.
+    
+    Integer keys are added incrementally; query returns the keys sharing at
+    least one band with a signature, so only those need an exact similarity
+    check. Bands are stored as their hash() to keep the tables small, so the
+    index lives in memory only.
+    """
+    
+    def __init__(self, num_bands: int = NUM_BANDS, rows_per_band: int = ROWS_PER_BAND):
+        self.num_bands = num_bands
+        self.rows_per_band = rows_per_band
+        # Band hash -> key, or list of keys once several share the band
+        self._tables: List[Dict[int, Union[int, List[int]]]] = [
+            {} for _ in range(num_bands)
+        ]
+    
+    def _bands(self, signature: Tuple[int, ...]):
+        # Bands take every num_bands-th value rather than adjacent ones, because
+        # densification makes neighbouring values of short texts correlated
+        for band in range(self.num_bands):
+            yield band, hash(signature[band::self.num_bands])
+    
+    def add(self, key: int, signature: Tuple[int, ...]):
+        """Index a key under its signature"""
+        for band, value in self._bands(signature):
+            table = self._tables[band]
+            existing = table.get(value)
+            if existing is None:
+                table[value] = key
+            elif isinstance(existing, list):
+                existing.append(key)
+            else:
+                table[value] = [existing, key]
+    
+    def query(self, signature: Tuple[int, ...]) -> List[int]:
+        """Keys that share a band with the signature, in ascending order"""
+        candidates = set()
+        for band, value in self._bands(signature):
+            keys = self._tables[band].get(value)
+            if isinstance(keys, list):
+                candidates.update(keys)
+            elif keys is not None:
+                candidates.add(keys)
+        return sorted(candidates)
@@ -5,26 +5,147 @@ News Scraper - Search news websites for articles matching keywords
 import logging
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from requests.adapters import HTTPAdapter
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 from urllib.parse import urljoin, quote
+import threading
 import time
 import random
 
+from src.html_parsers import DEFAULT_PARSER, candidate_tags, compile_selector, get_parser, make_soup
+from src.http_cache import CacheEntry, ResponseCache, normalize_url
+from src.parse_cache import ParseCache
+from src.keyword_matcher import keyword_matcher
+from src.query_batcher import MAX_QUERY_LENGTH, KeywordQuery, batch_keywords
+from src.rate_limiter import RateLimiter, Throttled, THROTTLE_STATUS_CODES
+from src.site_profiles import SiteProfile, SiteProfileRegistry
+from src.url_canonicalizer import clean_url
+
 logger = logging.getLogger(__name__)
 
+# Bump whenever _parse_articles/_extract_article_data change what they return,
+# so memoized parse results from older code are not reused
+PARSER_VERSION = '5'
+
+# Common article selectors (in order of specificity)
+ARTICLE_SELECTORS = [
+    'article',
+    'div[role="article"]',
+    'div.article-item',
+    'div.news-item',
+    'div.post',
+    'div.story',
+    'div.item',
+    'a[data-trackable="link"]',  # BBC style
+    'div.result',  # Google search
+    'div.g',  # Google search
+    'section.article',
+    'div[class*="article"]',
+    'div[class*="news"]',
+    'li[data-article]',
+]
+
+# Tag names an article container can have: the document walk only visits these
+ARTICLE_TAGS = candidate_tags(ARTICLE_SELECTORS)
+
+# Tried in order inside each article element; a site profile's selector goes first
+TITLE_SELECTORS = [
+    'h1', 'h2', 'h3', 'h4',
+    'a[aria-label]',  # BBC style
+    'span[class*="headline"]',
+    '.title', '.headline', '.heading',
+    '[class*="title"]',
+    '[class*="headline"]',
+]
+SUMMARY_SELECTORS = [
+    '.summary', '.excerpt', '.description',
+    '[class*="summary"]',
+    '[class*="excerpt"]',
+    '[class*="description"]',
+    'p'
+]
+GENERIC_LINK_SELECTOR = 'a[href]'
+
+# Max elements taken per selector and articles returned per search
+MAX_ELEMENTS_PER_SELECTOR = 20
+MAX_ARTICLES_PER_SEARCH = 30
+
+
+def _compile_selector_index(selectors: List[str]) -> Dict[Optional[str], List[Tuple[int, Callable]]]:
+    """Compile selectors and index them by tag name, so each element is only tested
+    against the selectors that could match it (None holds tag-less selectors, which
+    are also merged, in selector order, into the list of every tag name)"""
+    index = {}
+    for position, selector in enumerate(selectors):
+        tags = candidate_tags([selector])
+        index.setdefault(tags[0] if tags else None, []).append(
+            (position, compile_selector(selector))
+        )
+    untagged = index.get(None)
+    if untagged:
+        for tag in index:
+            if tag is not None:
+                index[tag] = sorted(index[tag] + untagged, key=lambda entry: entry[0])
+    return index
+
+
+_ARTICLE_SELECTOR_INDEX = _compile_selector_index(ARTICLE_SELECTORS)
+
+
+@lru_cache(maxsize=256)
+def _compile_profile_selector(selector: str) -> Tuple[List[str], Dict[Optional[str], List[Tuple[int, Callable]]]]:
+    """Candidate tags and selector index for a site profile's article selector"""
+    return candidate_tags([selector]), _compile_selector_index([selector])
+
 
 class NewsScraper:
     """Scrape news articles from websites"""
     
-    def __init__(self, timeout=15, delay=1):
+    def __init__(self, timeout=15, delay=1, max_workers=1, max_per_host=1,
+                 rate_limiter: Optional[RateLimiter] = None, max_requeues=2,
+                 cache: Optional[ResponseCache] = None,
+                 parse_cache: Optional[ParseCache] = None, parser: str = DEFAULT_PARSER,
+                 profiles: Optional[SiteProfileRegistry] = None,
+                 keyword_batch_size=1, max_query_length=MAX_QUERY_LENGTH,
+                 relevance_filter=False):
         self.timeout = timeout
-        self.delay = delay  # Delay between requests in seconds
+        self.delay = delay  # Delay between requests to the same host in seconds
+        self.max_workers = max(1, max_workers)  # Global concurrency limit
+        self.max_per_host = max(1, max_per_host)  # Concurrent requests per host
+        self.max_requeues = max_requeues  # Times a throttled search goes back in the queue
+        self.keyword_batch_size = max(1, keyword_batch_size)  # Keywords OR-ed into one search
+        self.max_query_length = max_query_length  # URL-encoded length budget for a batched query
+        self.relevance_filter = relevance_filter  # Drop results that don't mention their keyword
+        # Per-host token bucket; the politeness delay is the ceiling on its rate
+        self.rate_limiter = rate_limiter or RateLimiter(
+            rate=1.0 / delay if delay else None,
+            jitter=1.0 if delay else 0.0  # Randomize so requests don't follow a fixed rhythm
+        )
         self.headers = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
         ]
+        self.cache = cache  # Optional persistent response cache
+        self.parse_cache = parse_cache  # Optional memo of parsed pages by body hash
+        self.parser = get_parser(parser)  # Tree builder backend, see src/html_parsers.py
+        self.profiles = profiles  # Optional learned per-domain URL templates and selectors
         self.session = requests.Session()
+        if self.max_workers > 1:
+            # Let every worker keep its own pooled connection
+            adapter = HTTPAdapter(
+                pool_connections=self.max_workers,
+                pool_maxsize=self.max_workers
+            )
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        
+        # Per-host concurrency state shared by all workers
+        self._host_lock = threading.Lock()
+        self._host_semaphores = {}
     
     def _get_headers(self):
         """Get random user agent headers"""
@@ -52,14 +173,96 @@ class NewsScraper:
                 'keyword': str
             }
         """
+        # Results are collected in task order, so the output is deterministic
+        # regardless of which host finished first
         articles = []
+        for found_articles in self.iter_articles(websites, keywords):
+            articles.extend(found_articles)
+        
+        logger.info(f"Total articles found: {len(articles)}")
+        return articles
+    
+    def iter_articles(self, websites: List[Dict], keywords: List[Dict]) -> Iterator[List[Dict]]:
+        """
+        Yield the articles of each website/keyword search as it completes
+        
+        Searches run exactly as in search_articles, but each one's articles are
+        released as soon as it and every search planned before it are done, so
+        consumers can start early while still seeing search_articles' order.
+        """
+        tasks = self._plan_tasks(websites, keywords)
+        pending = {}
+        next_index = 0
+        for index, found_articles in self._iter_results(tasks):
+            pending[index] = found_articles
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+        
+        self._log_parse_cache_stats()
+    
+    def _iter_results(self, tasks: List[Tuple[Dict, str]]) -> Iterator[Tuple[int, List[Dict]]]:
+        """Run the searches and yield (task index, articles) in completion order"""
+        requeues = [0] * len(tasks)
+        
+        if self.max_workers > 1 and len(tasks) > 1:
+            logger.info(
+                f"Searching {len(tasks)} website/keyword pairs with "
+                f"{self.max_workers} workers ({self.max_per_host} per host)"
+            )
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # Submit round-robin across hosts so workers don't queue up
+                # behind a single host's politeness delay
+                pending = {
+                    executor.submit(self._run_task, tasks[index]): index
+                    for index in self._interleave_by_host(tasks)
+                }
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = pending.pop(future)
+                        try:
+                            yield index, future.result()
+                        except Throttled as e:
+                            if self._should_requeue(tasks[index], requeues, index, e):
+                                pending[executor.submit(self._run_task, tasks[index])] = index
+                            else:
+                                yield index, []
+        else:
+            queue = deque(range(len(tasks)))
+            while queue:
+                index = queue.popleft()
+                try:
+                    yield index, self._run_task(tasks[index])
+                except Throttled as e:
+                    if self._should_requeue(tasks[index], requeues, index, e):
+                        queue.append(index)
+                    else:
+                        yield index, []
+    
+    def _log_parse_cache_stats(self):
+        """Report how many pages were served from the parse cache"""
+        if self.parse_cache:
+            stats = self.parse_cache.stats()
+            logger.info(
+                f"Parse cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} pages stored)"
+            )
+    
+    def _plan_tasks(self, websites: List[Dict], keywords: List[Dict]) -> List[Tuple[Dict, str]]:
+        """
+        Build the ordered list of (website, keyword) searches to run
+        
+        With keyword_batch_size > 1 a website's keywords are packed into
+        KeywordQuery OR queries, and results are attributed back to the
+        keywords they mention when tagged.
+        """
+        tasks = []
         
         # Group keywords by language
         keywords_by_lang = self._group_by_language(keywords, key='language')
         
-        # Search each website
         for website in websites:
-            logger.info(f"Searching website: {website['name']} ({website['url']})")
             language = website['language']
             keywords_for_lang = keywords_by_lang.get(language, [])
             
@@ -67,26 +270,153 @@ class NewsScraper:
                 logger.warning(f"No keywords found for language: {language}")
                 continue
             
-            for keyword_obj in keywords_for_lang:
-                keyword = keyword_obj['keyword']
-                try:
-                    found_articles = self._search_website(
-                        website['url'],
-                        keyword,
-                        language,
-                        website['name']
-                    )
-                    articles.extend(found_articles)
-                    time.sleep(self.delay + random.uniform(0, 1))  # Randomize delay
-                except Exception as e:
-                    logger.error(
-                        f"Error searching {website['name']} for '{keyword}': {str(e)}"
-                    )
-                    continue
+            queries = batch_keywords(
+                [keyword_obj['keyword'] for keyword_obj in keywords_for_lang],
+                max_terms=self.keyword_batch_size,
+                max_length=self.max_query_length
+            )
+            for query in queries:
+                tasks.append((website, query))
         
-        logger.info(f"Total articles found: {len(articles)}")
+        return tasks
+    
+    def _interleave_by_host(self, tasks: List[Tuple[Dict, str]]) -> List[int]:
+        """Return task indices ordered round-robin across hosts"""
+        indices_by_host = {}
+        for index, task in enumerate(tasks):
+            indices_by_host.setdefault(self._task_host(task), []).append(index)
+        
+        order = []
+        queues = list(indices_by_host.values())
+        for position in range(max((len(queue) for queue in queues), default=0)):
+            for queue in queues:
+                if position < len(queue):
+                    order.append(queue[position])
+        return order
+    
+    def _task_host(self, task: Tuple[Dict, str]) -> str:
+        """Get the host a search task will be sent to"""
+        website, keyword = task
+        return RateLimiter.key_for(self._build_search_url(website['url'], keyword))
+    
+    def _should_requeue(self, task: Tuple[Dict, str], requeues: List[int], index: int,
+                        error: Throttled) -> bool:
+        """Decide whether a throttled search goes back in the queue"""
+        website, keyword = task
+        if requeues[index] >= self.max_requeues:
+            logger.error(
+                f"Giving up on {website['name']} for '{keyword}' after "
+                f"{requeues[index]} re-queues: {str(error)}"
+            )
+            return False
+        requeues[index] += 1
+        logger.info(f"Re-queueing {website['name']} for '{keyword}' ({str(error)})")
+        return True
+    
+    def _run_task(self, task: Tuple[Dict, str]) -> List[Dict]:
+        """
+        Search one website for one keyword, respecting the per-host limits
+        
+        Raises:
+            Throttled: if the host kept answering 429/503, so the task can be re-queued
+        """
+        website, keyword = task
+        host = self._task_host(task)
+        
+        cached = self._fresh_cached_articles(task)
+        if cached is not None:
+            return cached
+        
+        with self._get_host_semaphore(host):
+            self.rate_limiter.acquire(host)
+            logger.info(f"Searching website: {website['name']} ({website['url']}) for '{keyword}'")
+            try:
+                return self._search_website(
+                    website['url'],
+                    keyword,
+                    website['language'],
+                    website['name']
+                )
+            except Throttled:
+                raise
+            except Exception as e:
+                logger.error(
+                    f"Error searching {website['name']} for '{keyword}': {str(e)}"
+                )
+                return []
+    
+    def _fresh_cached_articles(self, task: Tuple[Dict, str]) -> Optional[List[Dict]]:
+        """Articles for a search whose cached response is still within its TTL"""
+        if not self.cache:
+            return None
+        website, keyword = task
+        entry = self.cache.lookup(self._build_search_url(website['url'], keyword))
+        if not entry or not self.cache.is_fresh(entry):
+            return None
+        
+        articles = self._articles_from_cache(
+            entry, website['url'], website['language'], website['name'], keyword
+        )
+        if articles is not None:
+            logger.info(f"Using cached results from {website['name']} for '{keyword}'")
         return articles
     
+    def _articles_from_cache(self, entry: CacheEntry, url: str, language: str,
+                             website_name: str, keyword: str) -> Optional[List[Dict]]:
+        """
+        Articles for a cached response, reusing the stored parse when there is one
+        
+        The stored parse is only reused if it was made by the same parser
+        version, backend and site profile (see _parse_key); otherwise the
+        stored body is parsed again, so such changes apply even while the
+        server keeps answering 304.
+        """
+        parse_key = self._parse_key(self._extraction_profile(url))
+        if 'articles' in entry.meta and entry.meta.get('parse_key') == parse_key:
+            return self._tag_articles(entry.meta['articles'], language, website_name, keyword)
+        
+        content = self.cache.load_body(entry)
+        if content is None:
+            return None
+        articles = self._parse_response(content, url, language, website_name, keyword)
+        self.cache.set_meta(entry, {'articles': articles, 'parse_key': parse_key})
+        return articles
+    
+    def _revalidated_articles(self, entry: CacheEntry, headers, search_url: str, url: str,
+                              language: str, website_name: str, keyword: str) -> Optional[List[Dict]]:
+        """
+        Articles for a cached search page the server answered 304 for
+        
+        Returns None, and drops the entry, if the cached copy can't be read:
+        caching the empty 304 body would hide the search until it expired,
+        so the caller fetches it again without validators.
+        """
+        self.cache.revalidated(entry, headers)
+        articles = self._articles_from_cache(entry, url, language, website_name, keyword)
+        if articles is not None:
+            logger.info(f"{website_name} not modified for '{keyword}', using cached results")
+            return articles
+        logger.debug(f"Cached copy of {search_url} unreadable, fetching it again")
+        self.cache.delete(entry)
+        return None
+    
+    def _store_in_cache(self, search_url: str, content: bytes, headers, articles: List[Dict],
+                        parse_key: str):
+        """Store a fetched search page along with the articles parsed from it (with parse_key)"""
+        if self.cache:
+            try:
+                self.cache.store(search_url, content, headers,
+                                 meta={'articles': articles, 'parse_key': parse_key})
+            except Exception as e:
+                logger.debug(f"Could not cache {search_url}: {str(e)}")
+    
+    def _get_host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        """Get the semaphore limiting concurrent requests to a host"""
+        with self._host_lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_semaphores[host]
+    
     def _search_website(self, url: str, keyword: str, language: str, 
                        website_name: str) -> List[Dict]:
         """
@@ -95,44 +425,37 @@ class NewsScraper:
         try:
             # Construct search URL
             search_url = self._build_search_url(url, keyword)
+            host = RateLimiter.key_for(search_url)
             logger.debug(f"Searching URL: {search_url}")
             
-            # Try to fetch with retries
-            response = None
-            for attempt in range(3):
-                try:
-                    response = self.session.get(
-                        search_url, 
-                        headers=self._get_headers(),
-                        timeout=self.timeout,
-                        allow_redirects=True
-                    )
-                    response.raise_for_status()
-                    break
-                except requests.exceptions.Timeout:
-                    if attempt < 2:
-                        logger.debug(f"Timeout, retrying... (attempt {attempt + 1})")
-                        time.sleep(2)
-                    else:
-                        raise
-                except requests.exceptions.ConnectionError:
-                    if attempt < 2:
-                        logger.debug(f"Connection error, retrying... (attempt {attempt + 1})")
-                        time.sleep(2)
-                    else:
-                        raise
+            # Revalidate a stale cached copy instead of downloading it again
+            entry = self.cache.lookup(search_url) if self.cache else None
+            headers = self._get_headers()
+            headers.update(ResponseCache.conditional_headers(entry))
             
-            if not response:
-                logger.warning(f"No response from {website_name}")
-                return []
+            response = self._fetch(search_url, host, headers)
+            
+            if response.status_code == 304:
+                if entry:
+                    articles = self._revalidated_articles(entry, response.headers, search_url, url,
+                                                          language, website_name, keyword)
+                    if articles is not None:
+                        return articles
+                self.rate_limiter.acquire(host)
+                response = self._fetch(search_url, host, self._get_headers())
+                if response.status_code == 304:
+                    logger.warning(f"{website_name} answered 304 without a cached copy")
+                    return []
             
-            # Parse and extract articles
-            soup = BeautifulSoup(response.content, 'html.parser')
-            articles = self._parse_articles(soup, url, language, website_name, keyword)
+            parse_key = self._parse_key(self._extraction_profile(url))
+            articles = self._parse_response(response.content, url, language, website_name, keyword)
+            self._store_in_cache(search_url, response.content, response.headers, articles, parse_key)
             
             logger.info(f"Found {len(articles)} articles from {website_name} for '{keyword}'")
             return articles
             
+        except Throttled:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error for {website_name}: {type(e).__name__}: {str(e)}")
             return []
@@ -140,13 +463,165 @@ class NewsScraper:
             logger.error(f"Error parsing articles from {website_name}: {str(e)}", exc_info=False)
             return []
     
+    def _fetch(self, search_url: str, host: str, headers: Dict[str, str]) -> requests.Response:
+        """
+        GET a search page, retrying connection errors and throttling responses
+        
+        Raises:
+            Throttled: if the host is still throttling after the retries
+            requests.exceptions.RequestException: on other failures
+        """
+        for attempt in range(3):
+            if attempt:
+                self.rate_limiter.acquire(host)
+            try:
+                response = self.session.get(
+                    search_url, 
+                    headers=headers,
+                    timeout=self.timeout,
+                    allow_redirects=True
+                )
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt < 2:
+                    logger.debug(f"{type(e).__name__}, retrying... (attempt {attempt + 1})")
+                    time.sleep(self.rate_limiter.backoff_delay(attempt))
+                    continue
+                raise
+            
+            retry_after = self.rate_limiter.observe(
+                host, response.status_code, response.headers
+            )
+            if response.status_code in THROTTLE_STATUS_CODES:
+                if attempt < 2:
+                    logger.debug(
+                        f"HTTP {response.status_code}, backing off... (attempt {attempt + 1})"
+                    )
+                    time.sleep(self.rate_limiter.backoff_delay(attempt, retry_after))
+                    continue
+                raise Throttled(host, retry_after)
+            
+            response.raise_for_status()
+            return response
+    
+    def _parse_response(self, content: bytes, url: str, language: str,
+                        website_name: str, keyword: str) -> List[Dict]:
+        """Parse a search results page and tag the extracted articles"""
+        profile = self._extraction_profile(url)
+        
+        key = None
+        articles = None
+        if self.parse_cache:
+            key = ParseCache.key_for(content, url, self._parse_key(profile))
+            articles = self.parse_cache.get(key)
+        
+        if articles is None:
+            soup = make_soup(content, self.parser)
+            articles = []
+            if profile:
+                # Fast path: only the profile's container and selectors
+                articles = self._parse_articles(
+                    soup, url, language, website_name, keyword, profile=profile
+                )
+                if not articles:
+                    logger.debug(f"Site profile for {profile.domain} found nothing, trying all selectors")
+            if not articles:
+                usage = {'article': Counter(), 'title': Counter(), 'link': Counter(),
+                         'summary': Counter()} if self.profiles else None
+                articles = self._parse_articles(
+                    soup, url, language, website_name, keyword, usage=usage
+                )
+                if articles and usage:
+                    self._learn_profile(url, usage)
+            if key:
+                self.parse_cache.put(key, articles)
+        
+        return self._tag_articles(articles, language, website_name, keyword)
+    
+    def _extraction_profile(self, url: str) -> Optional[SiteProfile]:
+        """The site profile whose selectors parse this site's pages, if there is one"""
+        profile = self.profiles.get(url) if self.profiles else None
+        return profile if profile and profile.has_extraction else None
+    
+    def _parse_key(self, profile: Optional[SiteProfile]) -> str:
+        """
+        Everything besides the page itself that a parse depends on: the
+        extraction code version, the parser backend and the site profile
+        """
+        return f"{PARSER_VERSION}:{self.parser}:{profile.signature if profile else 'generic'}"
+    
+    def _tag_articles(self, articles: List[Dict], language: str, website_name: str,
+                      keyword: str) -> List[Dict]:
+        """
+        Tag copies of articles with where they were found, so memoized results stay untagged
+        
+        Results of a batched KeywordQuery get one copy per batch keyword that
+        appears in the title or summary; articles mentioning none of them are
+        dropped. Articles already attributed to one of the batch's keywords
+        (e.g. stored with a cached response) keep that keyword. With
+        relevance_filter, results of a single keyword must mention it too.
+        """
+        tagged = []
+        keywords = keyword.keywords if isinstance(keyword, KeywordQuery) else (keyword,)
+        matcher = keyword_matcher(keywords)
+        for article in articles:
+            if isinstance(keyword, KeywordQuery) and article.get('keyword') in keywords:
+                matched = [article['keyword']]
+            elif isinstance(keyword, KeywordQuery) or self.relevance_filter:
+                matched = matcher.find(article.get('title', ''), article.get('summary', ''))
+            else:
+                matched = [keyword]
+            for matched_keyword in matched:
+                article = dict(article)
+                article.update({
+                    'language': language,
+                    'website': website_name,
+                    'keyword': matched_keyword
+                })
+                tagged.append(article)
+        return tagged
+    
+    def _learn_profile(self, url: str, usage: Dict[str, Counter]):
+        """Remember the search URL and the selectors that produced most articles for a site"""
+        def most_common(counter: Counter) -> Optional[str]:
+            return counter.most_common(1)[0][0] if counter else None
+        
+        try:
+            self.profiles.learn(
+                url,
+                search_url=self._search_url_template(url),
+                article_selector=most_common(usage['article']),
+                title_selector=most_common(usage['title']),
+                link_selector=most_common(usage['link']),
+                summary_selector=most_common(usage['summary'])
+            )
+        except Exception as e:
+            logger.debug(f"Could not learn site profile for {url}: {str(e)}")
+    
+    def _search_url_template(self, base_url: str) -> str:
+        """Turn the search URL built for a site into a {base}/{query} template"""
+        placeholder = 'NEWSCOLLECTORQUERY'
+        search_url = self._build_search_url(base_url, placeholder)
+        return search_url.replace(placeholder, '{query}').replace(
+            base_url.rstrip('/'), '{base}', 1
+        )
+    
     def _build_search_url(self, base_url: str, keyword: str) -> str:
         """
         Build search URL for the website with proper encoding
+        
+        A learned site profile's template is used directly; the domain patterns
+        below are the fallback for sites without one.
         """
         base_url = base_url.rstrip('/')
         keyword_encoded = quote(keyword)
         
+        profile = self.profiles.get(base_url) if self.profiles else None
+        if profile and profile.search_url:
+            try:
+                return profile.search_url.format(base=base_url, query=keyword_encoded)
+            except (KeyError, IndexError, ValueError) as e:
+                logger.warning(f"Bad search URL template for {profile.domain}: {str(e)}")
+                
         # Detect domain and use appropriate search pattern
         domain_lower = base_url.lower()
         
@@ -173,76 +648,95 @@ class NewsScraper:
             return f"{base_url}/search?q={keyword_encoded}"
     
     def _parse_articles(self, soup: BeautifulSoup, base_url: str, language: str,
-                       website_name: str, keyword: str) -> List[Dict]:
+                       website_name: str, keyword: str, profile: Optional[SiteProfile] = None,
+                       usage: Optional[Dict[str, Counter]] = None) -> List[Dict]:
         """
         Parse HTML and extract article information using multiple selector strategies
+        
+        The document is walked once; each element is tested only against the
+        selectors for its tag name and bucketed per selector. Buckets are then
+        processed in selector order, which yields the same candidates as running
+        every selector over the whole document.
+        
+        Args:
+            profile: Site profile whose article selector replaces ARTICLE_SELECTORS
+            usage: Counters filled with the selectors behind each returned article
         """
         articles = []
         
-        # Common article selectors (in order of specificity)
-        article_selectors = [
-            'article',
-            'div[role="article"]',
-            'div.article-item',
-            'div.news-item',
-            'div.post',
-            'div.story',
-            'div.item',
-            'a[data-trackable="link"]',  # BBC style
-            'div.result',  # Google search
-            'div.g',  # Google search
-            'section.article',
-            'div[class*="article"]',
-            'div[class*="news"]',
-            'li[data-article]',
-        ]
+        if profile:
+            selectors = [profile.article_selector]
+            tags, selector_index = _compile_profile_selector(profile.article_selector)
+        else:
+            selectors, tags, selector_index = ARTICLE_SELECTORS, ARTICLE_TAGS, _ARTICLE_SELECTOR_INDEX
         
-        # Try each selector
-        found_elements = set()
-        for selector in article_selectors:
-            try:
-                article_elements = soup.select(selector)[:20]  # Limit to 20 per selector
+        # Single traversal: first MAX_ELEMENTS_PER_SELECTOR matches of each selector
+        buckets = [[] for _ in selectors]
+        untagged = selector_index.get(None, [])
+        for element in soup.find_all(tags or True):
+            for position, selector in selector_index.get(element.name, untagged):
+                bucket = buckets[position]
+                if len(bucket) < MAX_ELEMENTS_PER_SELECTOR and selector(element):
+                    bucket.append(element)
+        
+        # An element matched by several selectors is only extracted once,
+        # and an article URL is only returned once
+        seen_elements = set()
+        seen_urls = set()
+        for position, bucket in enumerate(buckets):
+            for element in bucket:
+                if id(element) in seen_elements:
+                    continue
+                seen_elements.add(id(element))
+                used = {}
+                try:
+                    article = self._extract_article_data(
+                        element, base_url, language, website_name, keyword,
+                        profile=profile, used=used
+                    )
+                except Exception as e:
+                    logger.debug(f"Error extracting article: {str(e)}")
+                    continue
                 
-                for element in article_elements:
-                    elem_str = str(element)[:100]  # Avoid duplicates
-                    if elem_str not in found_elements:
-                        found_elements.add(elem_str)
-                        try:
-                            article = self._extract_article_data(
-                                element, base_url, language, website_name, keyword
-                            )
-                            if article and article not in articles:  # Avoid duplicates
-                                articles.append(article)
-                        except Exception as e:
-                            logger.debug(f"Error extracting article: {str(e)}")
-                            continue
-            except Exception as e:
-                logger.debug(f"Error with selector '{selector}': {str(e)}")
-                continue
+                if article:
+                    url_key = normalize_url(article['url'])
+                    if url_key not in seen_urls:
+                        seen_urls.add(url_key)
+                        articles.append(article)
+                        if usage is not None:
+                            usage['article'][selectors[position]] += 1
+                            for part, selector in used.items():
+                                usage[part][selector] += 1
+                        if len(articles) >= MAX_ARTICLES_PER_SEARCH:
+                            return articles
         
-        return articles[:30]  # Limit to 30 articles per search
+        return articles
     
     def _extract_article_data(self, element, base_url: str, language: str,
-                            website_name: str, keyword: str) -> Optional[Dict]:
+                            website_name: str, keyword: str,
+                            profile: Optional[SiteProfile] = None,
+                            used: Optional[Dict[str, str]] = None) -> Optional[Dict]:
         """
         Extract title, URL, and summary from article element
+        
+        A site profile's selectors are tried first, falling back to the generic
+        ones for elements they don't match. used, if given, records the
+        selector that produced each field.
         """
+        if used is None:
+            used = {}
         try:
             # Try to find title
             title = None
-            title_selectors = [
-                'h1', 'h2', 'h3', 'h4',
-                'a[aria-label]',  # BBC style
-                'span[class*="headline"]',
-                '.title', '.headline', '.heading',
-                '[class*="title"]',
-                '[class*="headline"]',
-            ]
+            title_selectors = TITLE_SELECTORS
+            if profile and profile.title_selector:
+                title_selectors = [profile.title_selector] + TITLE_SELECTORS
             
             for selector in title_selectors:
                 title_elem = element.select_one(selector)
                 if title_elem:
                     title = title_elem.get_text(strip=True)
+                    used['title'] = selector
                     if title and len(title) > 10:  # Ensure reasonable length
                         break
             
@@ -251,43 +745,56 @@ class NewsScraper:
             
             # Try to find URL
             url = None
-            link_elem = element.find('a', href=True)
+            link_elem = None
+            if profile and profile.link_selector and profile.link_selector != GENERIC_LINK_SELECTOR:
+                link_elem = element.select_one(profile.link_selector)
+                if link_elem is not None and link_elem.get('href'):
+                    used['link'] = profile.link_selector
+                else:
+                    link_elem = None
+            if not link_elem:
+                link_elem = element.find('a', href=True)
+                used['link'] = GENERIC_LINK_SELECTOR
             if not link_elem:
                 link_elem = element.select_one('a')
             
             if link_elem:
                 url = link_elem.get('href')
                 if url:
-                    url = urljoin(base_url, url)
-                    # Clean up URL
-                    url = url.split('#')[0].split('?')[0] if url else None
+                    # Drop the fragment and tracking parameters, but keep
+                    # query parameters that may identify the article
+                    url = clean_url(urljoin(base_url, url))
             
             if not url:
                 return None
             
             # Try to find summary
             summary = None
-            summary_selectors = [
-                '.summary', '.excerpt', '.description',
-                '[class*="summary"]',
-                '[class*="excerpt"]',
-                '[class*="description"]',
-                'p'
-            ]
+            summary_selectors = SUMMARY_SELECTORS
+            if profile and profile.summary_selector:
+                summary_selectors = [profile.summary_selector] + SUMMARY_SELECTORS
             
             for selector in summary_selectors:
                 summary_elem = element.select_one(selector)
                 if summary_elem:
                     summary = summary_elem.get_text(strip=True)
                     if summary:
+                        used['summary'] = selector
                         summary = summary[:300]  # Limit to 300 chars
                         break
             
-            return {
+            article = {
                 'title': title.strip(),
                 'url': url,
                 'summary': summary.strip() if summary else '',
             }
+            
+            # Publication time, when the listing has a machine-readable one
+            time_elem = element.find('time', attrs={'datetime': True})
+            if time_elem:
+                article['published'] = time_elem['datetime'].strip()
+            
+            return article
         except Exception as e:
             logger.debug(f"Error extracting article data: {str(e)}")
             return None
@@ -0,0 +1,116 @@
+"""
+Parse Cache - Memoize extracted articles by response body hash
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cache location and size (overridable from .env)
+PARSE_CACHE_FILE = os.getenv('PARSE_CACHE_FILE', os.path.join('.cache', 'parse_cache.sqlite'))
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv('PARSE_CACHE_MAX_ENTRIES', '20000'))
+
+
+class ParseCache:
+    """
+    Content-addressed cache of parsed search pages.
+    
+    The key is a hash of the response body, the page's base URL (relative links
+    are resolved against it) and the parser version, so a byte-identical page
+    is never parsed twice while any change to the extraction code invalidates
+    old results. Entries are kept in SQLite and the least recently used ones
+    are evicted past max_entries.
+    """
+    
+    def __init__(self, path: str = PARSE_CACHE_FILE, max_entries: int = PARSE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS parsed (
+                key TEXT PRIMARY KEY,
+                articles TEXT NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS parsed_accessed ON parsed (accessed_at)")
+        self._db.commit()
+    
+    @staticmethod
+    def key_for(content: bytes, base_url: str, parser_version: str) -> str:
+        """Cache key for a response body parsed by a given parser version"""
+        digest = hashlib.sha256(content)
+        digest.update(b'\0' + base_url.encode('utf-8'))
+        digest.update(b'\0' + parser_version.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Get the articles stored for a key, counting the hit or miss"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT articles FROM parsed WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._db.execute("UPDATE parsed SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+    
+    def put(self, key: str, articles: List[Dict]):
+        """Store the articles extracted from a page"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO parsed VALUES (?, ?, ?)",
+                (key, json.dumps(articles, ensure_ascii=False), time.time())
+            )
+            self._evict()
+            self._db.commit()
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache since it was opened"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM parsed").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'entries': entries,
+        }
+    
+    def _evict(self):
+        """Drop least recently used entries once the cache is over max_entries"""
+        count = self._db.execute("SELECT COUNT(*) FROM parsed").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        
+        # Evict a little extra so we don't evict on every put
+        excess = count - int(self.max_entries * 0.9)
+        self._db.execute(
+            "DELETE FROM parsed WHERE key IN "
+            "(SELECT key FROM parsed ORDER BY accessed_at LIMIT ?)",
+            (excess,)
+        )
+        logger.debug(f"Evicted {excess} parsed pages")
@@ -0,0 +1,202 @@
+"""
+Pipeline - Stream articles from search through dedup to export
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Iterable, Iterator, List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Items buffered between two stages before the faster one waits (overridable from .env)
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '256'))
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception from a stage thread to its consumer"""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class Stage:
+    """
+    Run an iterable in a background thread and hand its items over through a
+    bounded queue.
+    
+    Chaining stages (each one consuming the previous) overlaps network, CPU and
+    export work while the bounded queues keep memory flat: a stage that gets
+    ahead simply blocks until its consumer catches up. Errors are re-raised in
+    the consumer, and closing a stage stops its thread.
+    """
+    
+    def __init__(self, name: str, source: Iterable, maxsize: int = PIPELINE_QUEUE_SIZE):
+        self.name = name
+        self.count = 0
+        self.first_item_at: Optional[float] = None
+        self._source = source
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._stopped = threading.Event()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{name}", daemon=True)
+        self._thread.start()
+    
+    def _put(self, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _run(self):
+        try:
+            for item in self._source:
+                if not self._put(item):
+                    break
+        except BaseException as e:
+            self._put(_Failure(e))
+        else:
+            self._put(_DONE)
+        finally:
+            close = getattr(self._source, 'close', None)
+            if self._stopped.is_set() and close:
+                close()
+    
+    def _received(self):
+        if self.first_item_at is None:
+            self.first_item_at = time.perf_counter() - self._started_at
+        self.count += 1
+    
+    def __iter__(self) -> Iterator:
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                self._received()
+                yield item
+        finally:
+            self.close()
+    
+    def iter_batches(self, max_items: int, max_wait: float) -> Iterator[List]:
+        """
+        Yield the items in lists, each released once it holds max_items or
+        its first item has waited max_wait seconds, whichever comes first
+        
+        A slow source still gets its items through every max_wait seconds,
+        and a fast one in full lists.
+        """
+        batch = []
+        deadline = None
+        try:
+            while True:
+                try:
+                    item = self._queue.get(
+                        timeout=None if deadline is None else max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    yield batch
+                    batch, deadline = [], None
+                    continue
+                if item is _DONE or isinstance(item, _Failure):
+                    if batch:
+                        yield batch
+                    if item is _DONE:
+                        return
+                    raise item.error
+                
+                self._received()
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + max_wait
+                if len(batch) >= max(1, max_items):
+                    yield batch
+                    batch, deadline = [], None
+        finally:
+            self.close()
+    
+    def close(self):
+        """Stop the stage thread without waiting for its source to finish"""
+        self._stopped.set()
+
+
+def flatten(batches: Iterable[List[Dict]]) -> Iterator[Dict]:
+    """Turn per-search article lists into a stream of articles"""
+    for batch in batches:
+        yield from batch
+
+
+def run_pipeline(scraper, deduplicator, exporter, websites: List[Dict], keywords: List[Dict],
+                 queue_size: int = PIPELINE_QUEUE_SIZE, seen_index=None, story_grouper=None,
+                 body_enricher=None) -> str:
+    """
+    Search, deduplicate and export with every stage running concurrently
+    
+    Args:
+        scraper: NewsScraper (or AsyncNewsScraper), streamed with iter_articles
+        deduplicator: Deduplicator, streamed with iter_unique
+        exporter: GoogleDocsExporter, fed with export_stream
+        seen_index: Optional SeenIndex; articles reported by earlier runs are
+            skipped (and refreshed), and new ones are recorded once the exporter
+            has written them to a document
+        story_grouper: Optional StoryGrouper tagging exported articles with story_id
+        body_enricher: Optional BodyEnricher; each search's articles get their
+            body fingerprints (in a stage of their own, while later searches
+            run) before dedup, which then also drops same-body duplicates
+    
+    Returns:
+        URL of the exported document
+    """
+    results = scraper.iter_articles(websites, keywords)
+    searched = None
+    if body_enricher is not None:
+        searched = Stage('search', results, queue_size)
+        results = (body_enricher.enrich(batch) for batch in searched)
+    found = Stage('bodies' if searched else 'search', flatten(results), queue_size)
+    unique = Stage('dedup', deduplicator.iter_unique(found), queue_size)
+    already_reported = []
+    
+    def not_reported(articles: Iterable[Dict]) -> Iterator[Dict]:
+        for article in articles:
+            if seen_index.is_seen(article):
+                already_reported.append(article)
+            else:
+                yield article
+    
+    articles = unique if seen_index is None else not_reported(unique)
+    if story_grouper is not None:
+        articles = story_grouper.iter_assign(articles)
+    
+    try:
+        doc_url = exporter.export_stream(articles)
+    finally:
+        unique.close()
+        found.close()
+        if searched is not None:
+            searched.close()
+    
+    delivered = unique.count - len(already_reported)
+    if len(exporter.exported_articles) < delivered:
+        logger.warning(
+            f"Only {len(exporter.exported_articles)} of {delivered} articles were written to the document"
+        )
+    
+    if seen_index is not None and not exporter.demo_mode:
+        # Articles a failed export did not write stay unseen for the next run
+        seen_index.mark_seen(already_reported + exporter.exported_articles)
+    
+    if found.first_item_at is not None:
+        logger.info(f"First article found after {found.first_item_at:.2f}s")
+    logger.info(
+        f"Pipeline: {found.count} articles found, {unique.count} after deduplication"
+    )
+    return doc_url
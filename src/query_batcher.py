@@ -0,0 +1,64 @@
+"""
+Query Batcher - Pack several keywords into one OR search query per site
+"""
+
+import logging
+from typing import List, Sequence, Union
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the batch budget: terms per query and URL-encoded query length
+MAX_TERMS_PER_QUERY = 8
+MAX_QUERY_LENGTH = 256
+
+
+def build_query(keywords: Sequence[str]) -> str:
+    """Build an OR query matching any of the keywords as a phrase"""
+    return ' OR '.join(f'"{keyword}"' for keyword in keywords)
+
+
+class KeywordQuery(str):
+    """
+    A search query covering several keywords.
+    
+    It is the OR query string itself, so it can go anywhere a single keyword
+    goes (search URLs, cache keys, logs), and remembers the keywords so the
+    results can be attributed back to them.
+    """
+    
+    def __new__(cls, keywords: Sequence[str]):
+        query = super().__new__(cls, build_query(keywords))
+        query.keywords = tuple(keywords)
+        return query
+    
+    def __reduce__(self):
+        return (KeywordQuery, (self.keywords,))
+
+
+def batch_keywords(keywords: Sequence[str], max_terms: int = MAX_TERMS_PER_QUERY,
+                   max_length: int = MAX_QUERY_LENGTH) -> List[Union[str, KeywordQuery]]:
+    """
+    Greedily pack keywords into as few queries as the budget allows
+    
+    A query holds at most max_terms keywords and its URL-encoded form stays
+    within max_length characters (a keyword that is too long on its own gets a
+    query to itself). Keywords that end up alone are returned unchanged, so
+    max_terms=1 reproduces one search per keyword.
+    
+    Returns:
+        Plain keywords and KeywordQuery batches, in keyword order
+    """
+    batches = []
+    current = []
+    for keyword in keywords:
+        candidate = current + [keyword]
+        if current and (len(candidate) > max_terms or
+                        len(quote(build_query(candidate))) > max_length):
+            batches.append(current)
+            candidate = [keyword]
+        current = candidate
+    if current:
+        batches.append(current)
+    
+    return [batch[0] if len(batch) == 1 else KeywordQuery(batch) for batch in batches]
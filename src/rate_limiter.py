@@ -0,0 +1,172 @@
+"""
+Rate Limiter - Per-domain token buckets with adaptive backoff on 429/503
+"""
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Status codes that mean "slow down" rather than "this request is broken"
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class Throttled(Exception):
+    """Raised when a request is still throttled after all retries, so it can be re-queued"""
+    
+    def __init__(self, key: str, retry_after: Optional[float] = None):
+        super().__init__(f"Throttled by {key}")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class _Bucket:
+    """Token bucket state for a single domain"""
+    
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate  # Tokens per second, None means unlimited
+        self.next_slot = 0.0  # Theoretical arrival time of the next token
+        self.blocked_until = 0.0  # Set from Retry-After
+        self.throttled = 0
+        self.succeeded = 0
+
+
+class RateLimiter:
+    """
+    Token bucket per domain whose rate adapts to the responses it observes.
+    
+    The bucket is scheduled GCRA-style: every reservation is given the next free
+    slot and told how long to wait for it, so the same limiter works for threads
+    (time.sleep) and asyncio (asyncio.sleep). 429/503 responses halve the rate
+    and honour Retry-After; successes grow it back additively up to max_rate.
+    """
+    
+    def __init__(self, rate: Optional[float] = 1.0, burst: int = 1,
+                 min_rate: float = 0.05, max_rate: Optional[float] = None,
+                 decrease_factor: float = 0.5, increase_step: Optional[float] = None,
+                 jitter: float = 0.0, backoff_base: float = 1.0, max_backoff: float = 60.0):
+        """
+        Args:
+            rate: Initial requests per second for each domain (None for unlimited)
+            burst: Requests allowed back-to-back before the rate applies
+            min_rate: Floor the rate can shrink to after throttling
+            max_rate: Ceiling the rate can grow to (defaults to the initial rate)
+            decrease_factor: Multiplier applied to the rate on 429/503
+            increase_step: Rate added per successful response (defaults to 10% of rate)
+            jitter: Max random seconds added to every wait
+            backoff_base: First retry delay in seconds, doubled per attempt
+            max_backoff: Cap on a single retry delay in seconds
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step if increase_step is not None else (rate or 1.0) * 0.1
+        self.jitter = jitter
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key_for(url: str) -> str:
+        """Get the rate limiting key (host) for a URL"""
+        return urlparse(url).netloc.lower() or url
+    
+    def _bucket(self, key: str) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.rate)
+        return bucket
+    
+    def reserve(self, key: str) -> float:
+        """Take a token for a domain and return the seconds to wait before using it"""
+        with self._lock:
+            bucket = self._bucket(key)
+            now = time.monotonic()
+            slot = max(now, bucket.blocked_until)
+            
+            if bucket.rate:
+                interval = 1.0 / bucket.rate
+                slot = max(slot, bucket.next_slot - (self.burst - 1) * interval)
+                bucket.next_slot = max(bucket.next_slot, slot) + interval
+        
+        wait = slot - now
+        if self.jitter:
+            wait += random.uniform(0, self.jitter)
+        return wait
+    
+    def acquire(self, key: str):
+        """Block until a token is available for a domain"""
+        wait = self.reserve(key)
+        if wait > 0:
+            time.sleep(wait)
+    
+    def observe(self, key: str, status_code: int, headers=None) -> Optional[float]:
+        """
+        Adapt the domain's rate to a response
+        
+        Returns:
+            Retry-After in seconds for throttling responses, if the server sent one
+        """
+        retry_after = None
+        with self._lock:
+            bucket = self._bucket(key)
+            
+            if status_code in THROTTLE_STATUS_CODES:
+                bucket.throttled += 1
+                current = bucket.rate or self.max_rate or 1.0
+                bucket.rate = max(self.min_rate, current * self.decrease_factor)
+                
+                retry_after = parse_retry_after((headers or {}).get('Retry-After'))
+                if retry_after is not None:
+                    bucket.blocked_until = max(
+                        bucket.blocked_until, time.monotonic() + retry_after
+                    )
+                logger.info(
+                    f"{key} answered {status_code}, slowing down to {bucket.rate:.2f} req/s"
+                    + (f" (Retry-After {retry_after:.0f}s)" if retry_after is not None else "")
+                )
+            elif status_code < 400:
+                bucket.succeeded += 1
+                if bucket.rate is not None and (self.max_rate is None or bucket.rate < self.max_rate):
+                    grown = bucket.rate + self.increase_step
+                    bucket.rate = min(self.max_rate, grown) if self.max_rate else grown
+        
+        return retry_after
+    
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Exponential backoff with full jitter, never shorter than Retry-After"""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+    
+    def current_rate(self, key: str) -> Optional[float]:
+        """Get the current requests per second allowed for a domain"""
+        with self._lock:
+            return self._bucket(key).rate
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,456 @@
+"""
+Report - Format-independent report model and its Docs, DOCX, Markdown, HTML and text renderers
+"""
+
+import html
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    from docx import Document
+    from docx.shared import Pt
+    DOCX_AVAILABLE = True
+except ImportError:  # python-docx is only needed for .docx reports
+    Document = None
+    Pt = None
+    DOCX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Longest merged insertText, so no single Docs request approaches the batch size limit
+MAX_INSERT_CHARS = 50000
+# Links longer than this are shortened for display in Google Docs
+MAX_LINK_DISPLAY = 60
+
+_RULE = '=' * 80
+_SEPARATOR = '-' * 80
+
+
+class Link:
+    """A URL, displayed as text (the URL itself by default)"""
+    
+    def __init__(self, url: str, text: Optional[str] = None):
+        self.url = url
+        self.text = text or url
+
+
+# (label, value): rendered as "label: value", or just the value when label is None
+Field = Tuple[Optional[str], Union[str, Link]]
+
+
+class Entry:
+    """One article: a heading line and its fields, in display order"""
+    
+    def __init__(self, title: str, fields: Optional[List[Field]] = None):
+        self.title = title
+        self.fields = fields or []
+
+
+class Section:
+    """A group of entries under a heading (no heading for an ungrouped report)"""
+    
+    def __init__(self, heading: Optional[str], entries: Optional[List[Entry]] = None):
+        self.heading = heading
+        self.entries = entries or []
+
+
+class Report:
+    """
+    A whole report, built once from the articles and rendered to any format.
+    
+    Renderers only walk the model; grouping, counting and field choice all
+    happen in the build_* functions, in one pass over the articles.
+    """
+    
+    def __init__(self, title: str, meta: Optional[List[str]] = None,
+                 sections: Optional[List[Section]] = None,
+                 empty_message: Optional[str] = None, separators: bool = True):
+        """
+        Args:
+            title: First line of the report
+            meta: Lines under the title (generation time, totals)
+            sections: Grouped entries
+            empty_message: Shown instead of the sections when there are no entries
+            separators: Draw a rule after every entry (otherwise a blank line)
+        """
+        self.title = title
+        self.meta = meta or []
+        self.sections = sections or []
+        self.empty_message = empty_message
+        self.separators = separators
+    
+    def __len__(self) -> int:
+        return sum(len(section.entries) for section in self.sections)
+
+
+def _group(articles: Iterable[Dict], key: str, default: str) -> Dict[str, List[Dict]]:
+    """Articles by the value of a key, groups in order of first appearance"""
+    groups: Dict[str, List[Dict]] = {}
+    for article in articles:
+        groups.setdefault(article.get(key) or default, []).append(article)
+    return groups
+
+
+def stories_of(articles: Iterable[Dict]) -> Dict[int, List[Dict]]:
+    """Articles by the story_id that cross_language.StoryGrouper gave them"""
+    stories: Dict[int, List[Dict]] = {}
+    for article in articles:
+        if article.get('story_id') is not None:
+            stories.setdefault(article['story_id'], []).append(article)
+    return stories
+
+
+def article_entry(article: Dict, with_language: bool = False,
+                  stories: Optional[Dict[int, List[Dict]]] = None) -> Entry:
+    """
+    The collector's entry for an article: website, other coverage, link and summary
+    
+    With stories (see stories_of), articles in other languages that share
+    the article's story_id are listed as "Also in <language>".
+    """
+    fields: List[Field] = []
+    if with_language:
+        fields.append(('Language', article.get('language') or 'Unknown'))
+    fields.append(('Website', article.get('website', 'Unknown')))
+    also_covered_by = article.get('also_covered_by')
+    if also_covered_by:
+        fields.append(('Also covered by', ", ".join(
+            other.get('website', 'Unknown') for other in also_covered_by
+        )))
+    if stories and article.get('story_id') is not None:
+        other_languages = [
+            other for other in stories.get(article['story_id'], ())
+            if other.get('language') != article.get('language')
+        ]
+        for language, others in _group(other_languages, 'language', 'Unknown').items():
+            fields.append((f'Also in {language}', "; ".join(
+                f"{other.get('title', 'No Title')} ({other.get('website', 'Unknown')})"
+                for other in others
+            )))
+    if article.get('url'):
+        fields.append(('Read More', Link(article['url'])))
+    if article.get('summary'):
+        fields.append(('Summary', article['summary']))
+    return Entry(article.get('title', 'No Title'), fields)
+
+
+def build_language_report(articles: List[Dict], generated: Optional[datetime] = None) -> Report:
+    """The collector's report: articles by language, with website, other coverage, link and summary"""
+    timestamp = (generated or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+    by_language = _group(articles, 'language', 'Unknown')
+    stories = stories_of(articles)
+    
+    sections = []
+    for language in sorted(by_language):
+        entries = [article_entry(article, stories=stories) for article in by_language[language]]
+        sections.append(Section(
+            f"{language.upper()} NEWS ({len(entries)} articles)", entries
+        ))
+    
+    return Report(
+        'News Monitoring Report',
+        meta=[f'Generated: {timestamp}', f'Total Articles: {len(articles)}'],
+        sections=sections
+    )
+
+
+def build_index_report(shards: List[Tuple[str, int, Optional[str]]],
+                       generated: Optional[datetime] = None) -> Report:
+    """Index of a sharded report: one entry per (shard name, article count, document URL or None)"""
+    timestamp = (generated or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+    entries = [
+        Entry(f"{name} ({count} articles)", [
+            ('Document', Link(url) if url else 'Export failed')
+        ])
+        for name, count, url in shards
+    ]
+    return Report(
+        'News Monitoring Report',
+        meta=[
+            f'Generated: {timestamp}',
+            f'Total Articles: {sum(count for _, count, _ in shards)}',
+            f'Documents: {len(shards)}'
+        ],
+        sections=[Section(None, entries)],
+        separators=False
+    )
+
+
+def build_keyword_report(articles: List[Dict], generated: Optional[datetime] = None) -> Report:
+    """The tracker's report: Google News results by keyword, with description and link"""
+    date = (generated or datetime.now()).strftime('%Y-%m-%d')
+    sections = [
+        Section(f"Keyword: {keyword}", [
+            Entry(f"[{article['site']}] {article['title']}", [
+                (None, f"{article['desc']} ({article['published']})"),
+                (None, Link(article['link'])),
+            ])
+            for article in group
+        ])
+        for keyword, group in _group(articles, 'keyword', 'Unknown').items()
+    ]
+    return Report(
+        f"News Report - {date}", sections=sections,
+        empty_message="No specific news found for the given keywords and sites in the recent timeframe."
+    )
+
+
+def build_search_report(keyword: str, articles: List[Dict],
+                        generated: Optional[datetime] = None) -> Report:
+    """The bots' report: one search's results with date and link"""
+    timestamp = (generated or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+    entries = [
+        Entry(article.get('title', 'Unknown Title'), [
+            ('Date', article.get('date', 'Unknown Date')),
+            ('Link', Link(article['link']) if article.get('link') else 'No Link'),
+        ])
+        for article in articles
+    ]
+    return Report(
+        f"News Report for '{keyword}'",
+        meta=[f"Generated on: {timestamp}"],
+        sections=[Section(None, entries)],
+        separators=False
+    )
+
+
+def report_segments(report: Report, link_text=lambda link: link.text) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    The plain-text layout of a report as (text, link URL or None) pieces
+    
+    Shared by the text and Google Docs renderers (see DocsRequestWriter),
+    so both produce the same document.
+    """
+    yield f"{report.title}\n", None
+    for line in report.meta:
+        yield f"{line}\n", None
+    yield "\n", None
+    
+    if not len(report) and report.empty_message:
+        yield f"{report.empty_message}\n", None
+        return
+    
+    for section in report.sections:
+        if section.heading:
+            yield f"\n{_RULE}\n{section.heading}\n{_RULE}\n\n", None
+        for i, entry in enumerate(section.entries, 1):
+            yield from entry_segments(entry, i, report.separators, link_text)
+
+
+def entry_segments(entry: Entry, number: int, separator: bool = True,
+                   link_text=lambda link: link.text) -> Iterator[Tuple[str, Optional[str]]]:
+    """The plain-text layout of one numbered entry as (text, link URL or None) pieces"""
+    yield f"{number}. {entry.title}\n", None
+    for label, value in entry.fields:
+        if label:
+            yield f"{label}: ", None
+        if isinstance(value, Link):
+            yield link_text(value), value.url
+        else:
+            yield value, None
+        yield "\n", None
+    yield (f"\n{_SEPARATOR}\n\n" if separator else "\n"), None
+
+
+def render_text(report: Report) -> Iterator[str]:
+    """Plain text, yielded piece by piece"""
+    for text, url in report_segments(report):
+        yield text
+
+
+def render_markdown(report: Report) -> Iterator[str]:
+    """Markdown, yielded piece by piece"""
+    yield f"# {report.title}\n\n"
+    for line in report.meta:
+        yield f"{line}  \n"
+    yield "\n"
+    
+    if not len(report) and report.empty_message:
+        yield f"{report.empty_message}\n"
+        return
+    
+    for section in report.sections:
+        if section.heading:
+            yield f"## {section.heading}\n\n"
+        for i, entry in enumerate(section.entries, 1):
+            yield f"{i}. **{entry.title}**  \n"
+            for label, value in entry.fields:
+                if isinstance(value, Link):
+                    value = f"[{value.text}]({value.url})"
+                yield f"   {label}: {value}  \n" if label else f"   {value}  \n"
+            yield "\n"
+        if report.separators:
+            yield "---\n\n"
+
+
+def render_html(report: Report) -> Iterator[str]:
+    """A standalone HTML page, yielded piece by piece"""
+    escape = html.escape
+    yield (
+        f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f'<title>{escape(report.title)}</title>\n</head>\n<body>\n'
+        f'<h1>{escape(report.title)}</h1>\n'
+    )
+    for line in report.meta:
+        yield f'<p>{escape(line)}</p>\n'
+    
+    if not len(report) and report.empty_message:
+        yield f'<p>{escape(report.empty_message)}</p>\n'
+    else:
+        for section in report.sections:
+            if section.heading:
+                yield f'<h2>{escape(section.heading)}</h2>\n'
+            yield '<ol>\n'
+            for entry in section.entries:
+                yield f'<li><strong>{escape(entry.title)}</strong>'
+                for label, value in entry.fields:
+                    if isinstance(value, Link):
+                        value_html = (
+                            f'<a href="{escape(value.url)}">{escape(value.text)}</a>'
+                        )
+                    else:
+                        value_html = escape(value)
+                    yield f'<br>\n{escape(label)}: {value_html}' if label else f'<br>\n{value_html}'
+                yield '</li>\n'
+            yield '</ol>\n'
+    yield '</body>\n</html>\n'
+
+
+def _utf16_length(text: str) -> int:
+    """Length of text in the UTF-16 code units Docs indexes count"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def docs_link_text(link: Link) -> str:
+    """How a link is displayed in Google Docs (long URLs shortened)"""
+    text = link.text
+    return text if len(text) < MAX_LINK_DISPLAY else text[:MAX_LINK_DISPLAY - 3] + "..."
+
+
+class DocsRequestWriter:
+    """
+    Turns (text, link URL) pieces into Google Docs batchUpdate requests.
+    
+    Text is written in reading order with every index tracked here (in UTF-16
+    code units, as the Docs API counts them), so the requests can be sent in
+    any number of consecutive batches. Adjacent plain text is merged into one
+    insertText; each link adds an updateTextStyle over its text. With append
+    on, text goes to the end of the body (endOfSegmentLocation), and index
+    must be where the body ends, so link ranges line up.
+    """
+    
+    def __init__(self, index: int = 1, append: bool = False):
+        self.index = index  # Where the next text lands
+        self.append = append
+        self.requests: List[Dict] = []
+        self._pending: List[str] = []  # Plain text not turned into a request yet
+        self._pending_chars = 0
+    
+    def write(self, text: str, url: Optional[str] = None):
+        """Add text, as a link to url when given"""
+        if url is None:
+            self._pending.append(text)
+            self._pending_chars += len(text)
+            if self._pending_chars >= MAX_INSERT_CHARS:
+                self.flush()
+            return
+        
+        self.flush()
+        start = self.index
+        self._pending.append(text)
+        self.flush()
+        self.requests.append({
+            'updateTextStyle': {
+                'range': {'startIndex': start, 'endIndex': self.index},
+                'textStyle': {'link': {'url': url}},
+                'fields': 'link'
+            }
+        })
+    
+    def write_segments(self, segments: Iterable[Tuple[str, Optional[str]]]):
+        for text, url in segments:
+            self.write(text, url)
+    
+    def flush(self):
+        """Turn pending plain text into an insertText"""
+        if not self._pending:
+            return
+        text = ''.join(self._pending)
+        location = (
+            {'endOfSegmentLocation': {'segmentId': ''}} if self.append
+            else {'location': {'index': self.index}}
+        )
+        self.requests.append({'insertText': {'text': text, **location}})
+        self.index += _utf16_length(text)
+        self._pending.clear()
+        self._pending_chars = 0
+    
+    def take(self) -> List[Dict]:
+        """All requests written so far, leaving the writer empty"""
+        self.flush()
+        requests, self.requests = self.requests, []
+        return requests
+
+
+def render_docs_requests(report: Report, start_index: int = 1) -> List[Dict]:
+    """Google Docs batchUpdate requests writing the report from start_index on"""
+    writer = DocsRequestWriter(start_index)
+    writer.write_segments(report_segments(report, docs_link_text))
+    return writer.take()
+
+
+def render_docx(report: Report, filepath: str):
+    """Save the report as a Word document (requires python-docx)"""
+    if not DOCX_AVAILABLE:
+        raise RuntimeError("python-docx is not installed, cannot write .docx reports")
+    doc = Document()
+    doc.add_heading(report.title, 0)
+    for line in report.meta:
+        doc.add_paragraph(line)
+    
+    if not len(report) and report.empty_message:
+        doc.add_paragraph(report.empty_message)
+    else:
+        for section in report.sections:
+            if section.heading:
+                doc.add_heading(section.heading, level=1)
+            for entry in section.entries:
+                p_title = doc.add_paragraph(style='List Number')
+                p_title.add_run(entry.title).bold = True
+                for label, value in entry.fields:
+                    paragraph = doc.add_paragraph()
+                    if label:
+                        paragraph.add_run(f"{label}: ")
+                    if isinstance(value, Link):
+                        # Word turns a bare URL into a clickable link
+                        paragraph.add_run(value.url)
+                    else:
+                        paragraph.add_run(value).font.size = Pt(10)
+    
+    doc.save(filepath)
+
+
+_TEXT_RENDERERS = {
+    '.txt': render_text,
+    '.md': render_markdown,
+    '.html': render_html,
+    '.htm': render_html,
+}
+
+
+def save_report(report: Report, filepath: str) -> str:
+    """
+    Write a report to a file in the format given by its extension
+    (.txt, .md, .html or .docx), streaming text formats to disk
+    """
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension == '.docx':
+        render_docx(report, filepath)
+        return filepath
+    if extension not in _TEXT_RENDERERS:
+        raise ValueError(f"Unknown report format: {extension}")
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.writelines(_TEXT_RENDERERS[extension](report))
+    return filepath
@@ -0,0 +1,115 @@
+"""
+Seen Index - Persistent record of already reported articles across runs
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.url_canonicalizer import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Index location and how long a reported article stays suppressed (overridable from .env)
+SEEN_INDEX_FILE = os.getenv('SEEN_INDEX_FILE', os.path.join('.cache', 'seen_index.sqlite'))
+SEEN_INDEX_TTL = int(float(os.getenv('SEEN_INDEX_TTL_HOURS', '48')) * 3600)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+class SeenIndex:
+    """
+    URL hashes and title fingerprints of reported articles, with timestamps.
+    
+    Each article is looked up by primary key in SQLite, so checking is O(1)
+    per article and nothing is loaded into memory up front. Entries expire
+    ttl seconds after an article was last reported or seen again, so a story
+    that stays in the feeds stays suppressed.
+    """
+    
+    def __init__(self, path: str = SEEN_INDEX_FILE, ttl: int = SEEN_INDEX_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS seen (
+                key TEXT PRIMARY KEY,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            ) WITHOUT ROWID"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_last ON seen (last_seen)")
+        self._db.commit()
+        self.evict_expired()
+    
+    @staticmethod
+    def _keys(article: Dict) -> List[str]:
+        """Index keys for an article: its URL hash and its title fingerprint"""
+        keys = []
+        url = article.get('url') or article.get('link')
+        if url:
+            keys.append('u:' + hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest())
+        title = _WHITESPACE.sub(' ', article.get('title') or '').lower().strip()
+        if title:
+            keys.append('t:' + hashlib.md5(title.encode('utf-8')).hexdigest())
+        return keys
+    
+    def is_seen(self, article: Dict) -> bool:
+        """True if the article's URL or title was reported within the TTL"""
+        keys = self._keys(article)
+        if not keys:
+            return False
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT 1 FROM seen WHERE key IN ({', '.join('?' * len(keys))}) AND last_seen >= ? LIMIT 1",
+                (*keys, time.time() - self.ttl)
+            ).fetchone()
+        return row is not None
+    
+    def iter_unseen(self, articles: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield the articles that were not reported before, as they arrive"""
+        for article in articles:
+            if not self.is_seen(article):
+                yield article
+    
+    def filter_unseen(self, articles: List[Dict]) -> List[Dict]:
+        """Drop articles that were already reported within the TTL"""
+        unseen = list(self.iter_unseen(articles))
+        removed = len(articles) - len(unseen)
+        if removed > 0:
+            logger.info(f"Skipped {removed} articles already reported in the last {self.ttl / 3600:g} hours")
+        return unseen
+    
+    def mark_seen(self, articles: Iterable[Dict], now: Optional[float] = None):
+        """Record articles as reported (refreshing the timestamp of known ones)"""
+        now = now or time.time()
+        rows = [(key, now, now) for article in articles for key in self._keys(article)]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany(
+                """INSERT INTO seen (key, first_seen, last_seen) VALUES (?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET last_seen = excluded.last_seen""",
+                rows
+            )
+            self._db.commit()
+    
+    def evict_expired(self):
+        """Delete entries older than the TTL"""
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM seen WHERE last_seen < ?", (time.time() - self.ttl,)
+            ).rowcount
+            self._db.commit()
+        if deleted:
+            logger.debug(f"Evicted {deleted} expired seen-index entries")
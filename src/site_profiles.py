@@ -0,0 +1,140 @@
+"""
+Site Profiles - Per-domain search URL templates and extraction selectors
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Profile store location (overridable from .env)
+SITE_PROFILES_FILE = os.getenv('SITE_PROFILES_FILE', os.path.join('.cache', 'site_profiles.json'))
+
+
+class SiteProfile:
+    """
+    What worked for a domain last time.
+    
+    search_url is a template with {base} (the website URL without a trailing
+    slash) and {query} (the URL-encoded keyword). The selectors are the ones
+    that produced the most articles on the domain's search page.
+    """
+    
+    FIELDS = ('search_url', 'article_selector', 'title_selector',
+              'link_selector', 'summary_selector')
+    
+    def __init__(self, domain: str, search_url: Optional[str] = None,
+                 article_selector: Optional[str] = None, title_selector: Optional[str] = None,
+                 link_selector: Optional[str] = None, summary_selector: Optional[str] = None,
+                 learned_at: Optional[float] = None):
+        self.domain = domain
+        self.search_url = search_url
+        self.article_selector = article_selector
+        self.title_selector = title_selector
+        self.link_selector = link_selector
+        self.summary_selector = summary_selector
+        self.learned_at = learned_at
+    
+    @property
+    def has_extraction(self) -> bool:
+        """True if the profile knows where the articles are on the page"""
+        return bool(self.article_selector and self.title_selector)
+    
+    @property
+    def signature(self) -> str:
+        """Short hash of the extraction selectors, for keying parse results"""
+        selectors = '\0'.join(
+            getattr(self, field) or '' for field in self.FIELDS if field != 'search_url'
+        )
+        return hashlib.sha1(selectors.encode('utf-8')).hexdigest()[:12]
+    
+    def to_dict(self) -> Dict:
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data['learned_at'] = self.learned_at
+        return data
+    
+    @classmethod
+    def from_dict(cls, domain: str, data: Dict) -> 'SiteProfile':
+        return cls(domain, learned_at=data.get('learned_at'),
+                   **{field: data.get(field) for field in cls.FIELDS})
+
+
+class SiteProfileRegistry:
+    """
+    Persistent per-domain profiles, learned from the first successful search.
+    
+    Profiles are kept in a small JSON file so they survive between runs and
+    can be corrected by hand when a site changes its search page.
+    """
+    
+    def __init__(self, path: str = SITE_PROFILES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, SiteProfile] = {}
+        self._load()
+    
+    @staticmethod
+    def domain_for(url: str) -> str:
+        """Profile key for a website URL"""
+        netloc = urlparse(url if '//' in url else f"//{url}").netloc.lower()
+        return netloc[4:] if netloc.startswith('www.') else netloc
+    
+    def get(self, url: str) -> Optional[SiteProfile]:
+        """Get the profile for a website, if one has been learned"""
+        with self._lock:
+            return self._profiles.get(self.domain_for(url))
+    
+    def learn(self, url: str, **fields) -> SiteProfile:
+        """Create or update a website's profile and persist it"""
+        domain = self.domain_for(url)
+        with self._lock:
+            profile = self._profiles.get(domain) or SiteProfile(domain)
+            for field, value in fields.items():
+                if field not in SiteProfile.FIELDS:
+                    raise ValueError(f"Unknown site profile field: {field}")
+                setattr(profile, field, value)
+            profile.learned_at = time.time()
+            self._profiles[domain] = profile
+            self._save()
+        logger.debug(f"Learned site profile for {domain}: {profile.to_dict()}")
+        return profile
+    
+    def forget(self, url: str):
+        """Drop a website's profile"""
+        with self._lock:
+            if self._profiles.pop(self.domain_for(url), None):
+                self._save()
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read site profiles from {self.path}: {str(e)}")
+            return
+        self._profiles = {
+            domain: SiteProfile.from_dict(domain, fields) for domain, fields in data.items()
+        }
+    
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {domain: profile.to_dict() for domain, profile in sorted(self._profiles.items())},
+                    f, ensure_ascii=False, indent=2
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save site profiles to {self.path}: {str(e)}")
@@ -0,0 +1,367 @@
+"""
+URL Canonicalizer - Canonical article URLs and a persistent redirect table
+"""
+
+import base64
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+
+from src.rate_limiter import RateLimiter, THROTTLE_STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+# Redirect table location, how long a resolved redirect is trusted, and
+# whether unknown redirect wrappers are fetched to resolve them (overridable from .env)
+URL_CANONICAL_FILE = os.getenv('URL_CANONICAL_FILE', os.path.join('.cache', 'url_canonical.sqlite'))
+URL_CANONICAL_TTL = int(float(os.getenv('URL_CANONICAL_TTL_DAYS', '30')) * 86400)
+URL_RESOLVE_REDIRECTS = os.getenv('URL_RESOLVE_REDIRECTS', 'false').lower() == 'true'
+
+# Query parameters that only say where a click came from; any other
+# parameter is kept, since it may identify the article
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    'ref', 'ref_src', 'ref_url', 'referrer', 'cmpid', 'cmp', 'intcmp', 'icid', 'ocid',
+    'ito', 'ftag', 'taid', 'smid', 'sr_share', 'spm', 'trk', 'oc', 'guccounter',
+    'guce_referrer', 'guce_referrer_sig', '_ga', 'amp', 'outputtype',
+})
+TRACKING_PREFIXES = ('utm_', 'at_', 'pk_', 'mtm_', 'hsa_')
+
+# Host prefixes of the same site's desktop, mobile and AMP editions
+_HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+_AMP_CACHE_SUFFIX = '.cdn.ampproject.org'
+_GOOGLE_NEWS_HOST = 'news.google.com'
+_GOOGLE_NEWS_ARTICLE = re.compile(r'/(?:__i/rss/rd/|rss/)?articles/([A-Za-z0-9_-]+)')
+# Wrappers that carry the target URL in a query parameter
+_QUERY_REDIRECTS = {
+    'google.com': ('url', 'q'),
+    'l.facebook.com': ('u',),
+    'lm.facebook.com': ('u',),
+}
+_CANONICAL_LINK = re.compile(
+    r'<link\b[^>]*\brel=["\']?canonical["\']?[^>]*>', re.IGNORECASE
+)
+_HREF = re.compile(r'\bhref=["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _strip_host(host: str) -> str:
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix) and host.count('.') > 1:
+            return host[len(prefix):]
+    return host
+
+
+def _strip_amp_path(path: str) -> str:
+    """Path of the regular edition of an AMP page"""
+    segments = path.split('/')
+    if len(segments) > 2 and segments[1] == 'amp':  # /amp/section/story
+        del segments[1]
+    if len(segments) > 2 and segments[-1] == 'amp':  # /story/amp
+        del segments[-1]
+    elif len(segments) > 3 and segments[-2] == 'amp' and segments[-1].isdigit():  # /story/amp/1
+        del segments[-2:]
+    segments = [
+        segment[4:] if segment.startswith('amp_') and len(segment) > 4 else segment
+        for segment in segments
+    ]  # /amp_articleshow/123.cms
+    path = '/'.join(segments)
+    if path.endswith('.amp.html'):
+        path = path[:-len('.amp.html')] + '.html'
+    elif path.endswith('.amp'):
+        path = path[:-len('.amp')]
+    return path
+
+
+def _protobuf_strings(data: bytes) -> Iterator[bytes]:
+    """Length-delimited fields of a protobuf message, top level only"""
+    position = 0
+    
+    def varint():
+        nonlocal position
+        value = shift = 0
+        while position < len(data):
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+        raise ValueError("truncated varint")
+    
+    try:
+        while position < len(data):
+            wire_type = varint() & 7
+            if wire_type == 0:
+                varint()
+            elif wire_type == 1:
+                position += 8
+            elif wire_type == 2:
+                length = varint()
+                yield data[position:position + length]
+                position += length
+            elif wire_type == 5:
+                position += 4
+            else:
+                return
+    except ValueError:
+        return
+
+
+def decode_google_news_url(url: str) -> Optional[str]:
+    """
+    Publisher URL inside a Google News article link, when it can be read offline
+    
+    Older Google News article ids are a base64 protobuf holding the target
+    URL; newer ones are opaque and return None (see UrlCanonicalizer.resolve).
+    """
+    parts = urlsplit(url)
+    if parts.netloc.lower() != _GOOGLE_NEWS_HOST:
+        return None
+    match = _GOOGLE_NEWS_ARTICLE.match(parts.path)
+    if not match:
+        return None
+    article_id = match.group(1)
+    try:
+        data = base64.urlsafe_b64decode(article_id + '=' * (-len(article_id) % 4))
+    except ValueError:
+        return None
+    for value in _protobuf_strings(data):
+        if value.startswith((b'http://', b'https://')):
+            try:
+                return value.decode('utf-8')
+            except UnicodeDecodeError:
+                return None
+    return None
+
+
+def _unwrap(url: str) -> str:
+    """Target of a redirect wrapper that can be read without fetching it"""
+    for _ in range(3):  # Wrappers can be nested
+        parts = urlsplit(url)
+        host = _strip_host(parts.netloc.lower())
+        target = None
+        if host == _GOOGLE_NEWS_HOST:
+            target = decode_google_news_url(url)
+        elif host.endswith(_AMP_CACHE_SUFFIX):
+            # https://example-com.cdn.ampproject.org/c/s/example.com/story
+            match = re.match(r'/[cvi]/(s/)?(.+)', parts.path)
+            if match:
+                target = ('https://' if match.group(1) else 'http://') + match.group(2)
+        elif host in _QUERY_REDIRECTS and parts.path in ('/url', '/l.php'):
+            params = dict(parse_qsl(parts.query))
+            target = next((params[name] for name in _QUERY_REDIRECTS[host] if params.get(name)), None)
+        if not target or not target.startswith(('http://', 'https://')):
+            return url
+        url = target
+    return url
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of an article URL
+    
+    Unwraps redirect wrappers that carry their target (Google News, the AMP
+    cache, google.com/url), then normalizes scheme (https) and host case,
+    default ports and www./m./amp. hosts, AMP paths, duplicate and trailing
+    slashes, tracking parameters, query order and the fragment. Anything it
+    can't parse is returned stripped but otherwise unchanged.
+    """
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(_unwrap(url))
+        port = parts.port
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in ('http', 'https') or not parts.hostname:
+        return url
+    
+    host = _strip_host(parts.hostname.rstrip('.'))
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    path = _strip_amp_path(path) if path else path
+    
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(name)
+    ))
+    return urlunsplit(('https', host, path or '/', query, ''))
+
+
+def clean_url(url: str) -> str:
+    """
+    A working URL for an article: the fragment and tracking parameters removed
+    
+    Unlike canonicalize_url, the host and path are left alone, since not
+    every site serves its pages without www. or over https.
+    """
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in ('http', 'https') or not parts.netloc:
+        return url
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    kept = [(name, value) for name, value in params if not _is_tracking(name)]
+    query = urlencode(kept) if len(kept) < len(params) else parts.query
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+
+def is_redirect_wrapper(url: str) -> bool:
+    """True for URLs of link wrappers that only redirect to the article"""
+    parts = urlsplit(url)
+    host = _strip_host(parts.netloc.lower())
+    return (host == _GOOGLE_NEWS_HOST or host.endswith(_AMP_CACHE_SUFFIX)
+            or (host in _QUERY_REDIRECTS and parts.path in ('/url', '/l.php')))
+
+
+def canonical_link(html: str, base_url: str) -> Optional[str]:
+    """The page's <link rel="canonical"> URL, if it declares one"""
+    head = html[:200000]
+    for tag in _CANONICAL_LINK.findall(head):
+        href = _HREF.search(tag)
+        if href:
+            return urljoin(base_url, href.group(1).strip())
+    return None
+
+
+class UrlCanonicalizer:
+    """
+    canonicalize_url plus a persistent table of resolved redirects.
+    
+    The table maps a canonical URL to the working URL it leads to, learned
+    from resolve() following a wrapper to the article or from a fetched
+    page's <link rel="canonical">. canonical() never touches the network: it
+    is the canonical form of wherever the table says a URL leads. Entries are
+    kept for ttl seconds, so later runs get the same answers without
+    fetching again.
+    """
+    
+    def __init__(self, path: str = URL_CANONICAL_FILE, ttl: int = URL_CANONICAL_TTL,
+                 resolve_redirects: bool = URL_RESOLVE_REDIRECTS, timeout: float = 10):
+        self.path = path
+        self.ttl = ttl
+        self.resolve_redirects = resolve_redirects
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._memo: Dict[str, str] = {}
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS redirects (
+                source TEXT PRIMARY KEY,
+                target TEXT NOT NULL,
+                resolved_at REAL NOT NULL
+            ) WITHOUT ROWID"""
+        )
+        self._db.execute(
+            "DELETE FROM redirects WHERE resolved_at < ?", (time.time() - ttl,)
+        )
+        self._db.commit()
+    
+    def __call__(self, url: str) -> str:
+        return self.canonical(url)
+    
+    def _lookup(self, key: str) -> Optional[str]:
+        """Table entry for a canonicalized URL, if it has an unexpired one"""
+        if key not in self._memo:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT target FROM redirects WHERE source = ? AND resolved_at >= ?",
+                    (key, time.time() - self.ttl)
+                ).fetchone()
+            self._memo[key] = row[0] if row else None
+        return self._memo[key]
+    
+    def canonical(self, url: str) -> str:
+        """Canonical URL from the rules and the redirect table, without fetching"""
+        key = canonicalize_url(url)
+        target = self._lookup(key)
+        return canonicalize_url(target) if target else key
+    
+    def record(self, url: str, target: str):
+        """
+        Remember that a URL leads to target
+        
+        A URL recorded as leading to itself is one resolve() could not follow,
+        which is kept too so it isn't fetched again within the TTL.
+        """
+        source = canonicalize_url(url)
+        target = clean_url(target)
+        if not target:
+            return
+        with self._lock:
+            self._db.execute(
+                """INSERT INTO redirects (source, target, resolved_at) VALUES (?, ?, ?)
+                   ON CONFLICT(source) DO UPDATE SET target = excluded.target,
+                                                     resolved_at = excluded.resolved_at""",
+                (source, target, time.time())
+            )
+            self._db.commit()
+        self._memo[source] = target
+    
+    def learn_page(self, url: str, html: str, final_url: Optional[str] = None):
+        """Record where a fetched page says it lives (redirect target and rel=canonical)"""
+        target = canonical_link(html, final_url or url) or final_url
+        if target and not is_redirect_wrapper(target):
+            self.record(url, target)
+            if final_url and canonicalize_url(final_url) != canonicalize_url(url):
+                self.record(final_url, target)
+    
+    def resolve(self, url: str, session: Optional[requests.Session] = None,
+                rate_limiter: Optional[RateLimiter] = None) -> str:
+        """
+        Working URL of the article behind a link, fetching a redirect wrapper
+        the table doesn't know yet
+        
+        Only wrappers are fetched, and only with resolve_redirects on. A
+        wrapper that can't be followed is remembered as unresolvable and
+        returned as it is (cleaned).
+        """
+        key = canonicalize_url(url)
+        known = self._lookup(key)
+        if known:
+            return known
+        unwrapped = clean_url(_unwrap(url))
+        if not self.resolve_redirects or not is_redirect_wrapper(unwrapped):
+            return unwrapped
+        
+        host = RateLimiter.key_for(url)
+        try:
+            if rate_limiter:
+                rate_limiter.acquire(host)
+            response = (session or requests).get(
+                url, timeout=self.timeout, allow_redirects=True,
+                headers={'User-Agent': 'Mozilla/5.0 (compatible; NewsAutoCollector)'}
+            )
+            if rate_limiter:
+                rate_limiter.observe(host, response.status_code, response.headers)
+            if response.status_code in THROTTLE_STATUS_CODES:
+                return unwrapped  # Try again another time
+            html = response.text if 'html' in response.headers.get('Content-Type', '') else ''
+            self.learn_page(url, html, response.url)
+        except Exception as e:
+            logger.debug(f"Could not resolve {url}: {str(e)}")
+            return unwrapped
+        
+        if self._lookup(key) is None:
+            logger.debug(f"No article URL found behind {url}")
+            self.record(url, unwrapped)
+        return self._lookup(key)
@@ -0,0 +1,156 @@
+"""
+Shared fixtures: in-memory stand-ins for the Google Docs and Drive APIs and for a scraper
+"""
+
+import threading
+import time
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import src.google_docs_exporter as google_docs_exporter
+from src.rate_limiter import RateLimiter
+
+
+class _Request:
+    """What the client library's request objects offer: execute()"""
+    
+    def __init__(self, run):
+        self._run = run
+    
+    def execute(self):
+        return self._run()
+
+
+class FakeDocsService:
+    """
+    Local Docs API: documents are kept as UTF-16 code units, the unit the
+    real API indexes by, and every call is counted.
+    
+    latency makes each call take that long (to observe concurrency), and
+    fail(request, document_title) may raise to simulate API errors.
+    """
+    
+    def __init__(self, latency: float = 0.0, fail=None):
+        self.latency = latency
+        self.fail = fail
+        self.calls = {'create': 0, 'get': 0, 'batchUpdate': 0}
+        self.batches = []  # Requests of each batchUpdate call
+        self.titles = {}
+        self.links = {}  # Linked text and URL, per document
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._units = {}
+        self._lock = threading.Lock()
+    
+    def documents(self):
+        return self
+    
+    def text(self, doc_id: str) -> str:
+        return b''.join(self._units[doc_id]).decode('utf-16-le')
+    
+    def _call(self, name, doc_id, apply):
+        def run():
+            with self._lock:
+                self.calls[name] += 1
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                time.sleep(self.latency)
+                if self.fail:
+                    self.fail(name, self.titles.get(doc_id))
+                with self._lock:
+                    return apply()
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+        return _Request(run)
+    
+    def create(self, body):
+        def apply():
+            doc_id = f'doc{len(self.titles)}'
+            self.titles[doc_id] = body['title']
+            self._units[doc_id] = []
+            self.links[doc_id] = []
+            return {'documentId': doc_id}
+        return self._call('create', None, apply)
+    
+    def get(self, documentId, fields=None):
+        def apply():
+            # Section break, then the text and the body's final newline
+            return {'body': {'content': [{'endIndex': 1},
+                                         {'endIndex': len(self._units[documentId]) + 2}]}}
+        return self._call('get', documentId, apply)
+    
+    def batchUpdate(self, documentId, body):
+        def apply():
+            self.batches.append(body['requests'])
+            units = self._units[documentId]
+            for request in body['requests']:
+                if 'insertText' in request:
+                    insert = request['insertText']
+                    if 'endOfSegmentLocation' in insert:
+                        position = len(units)
+                    else:
+                        position = insert['location']['index'] - 1
+                    assert 0 <= position <= len(units), f"index {position + 1} outside the document"
+                    encoded = insert['text'].encode('utf-16-le')
+                    units[position:position] = [encoded[i:i + 2] for i in range(0, len(encoded), 2)]
+                elif 'updateTextStyle' in request:
+                    style = request['updateTextStyle']
+                    start, end = style['range']['startIndex'] - 1, style['range']['endIndex'] - 1
+                    assert 0 <= start < end <= len(units), "link range outside the document"
+                    self.links[documentId].append(
+                        (b''.join(units[start:end]).decode('utf-16-le'), style['textStyle']['link']['url'])
+                    )
+            return {}
+        return self._call('batchUpdate', documentId, apply)
+
+
+class FakePool:
+    """google_clients pool handing out the fake services"""
+    
+    def __init__(self, docs_service):
+        self.docs_service = docs_service
+    
+    def service(self, api, version, scopes, **kwargs):
+        return self.docs_service if api == 'docs' else None
+    
+    def credentials(self, scopes, **kwargs):
+        return None
+
+
+class ListScraper:
+    """Scraper whose searches return fixed article lists"""
+    
+    def __init__(self, *batches):
+        self.batches = batches
+    
+    def iter_articles(self, websites, keywords):
+        yield from self.batches
+
+
+def http_error(status: int, headers=None) -> HttpError:
+    """An HttpError as the client library raises it (httplib2 lowercases header names)"""
+    response = httplib2.Response(dict(headers or {}, status=status))
+    return HttpError(response, b'{}')
+
+
+@pytest.fixture
+def docs_service():
+    return FakeDocsService()
+
+
+@pytest.fixture
+def make_exporter(monkeypatch):
+    """GoogleDocsExporter talking to a given FakeDocsService, with no write quota"""
+    def make(service):
+        monkeypatch.setattr(google_docs_exporter, 'get_pool', lambda: FakePool(service))
+        exporter = google_docs_exporter.GoogleDocsExporter()
+        exporter.output_folder_id = 'root'
+        exporter.shard_by = None
+        exporter.incremental = False
+        exporter.rate_limiter = RateLimiter(rate=None)
+        return exporter
+    return make
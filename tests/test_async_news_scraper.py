@@ -0,0 +1,100 @@
+"""
+AsyncNewsScraper: cache work stays off the event loop
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from src.async_news_scraper import AsyncNewsScraper  # noqa: E402
+from src.http_cache import ResponseCache  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'benchmarks', 'fixtures', 'bbc_search.html')
+WEBSITE = {'name': 'BBC', 'url': 'https://www.bbc.com', 'language': 'English'}
+
+
+class FakeResponse:
+    def __init__(self, status, body=b'', headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+    
+    def raise_for_status(self):
+        pass
+    
+    async def read(self):
+        return self.body
+
+
+class FakeSession:
+    """aiohttp.ClientSession answering from a list of responses"""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+    
+    def get(self, url, **kwargs):
+        return self.responses.pop(0)
+
+
+class ThreadRecordingCache(ResponseCache):
+    """ResponseCache noting which threads its methods were called on"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = {}
+    
+    def _record(self, name):
+        self.threads.setdefault(name, set()).add(threading.get_ident())
+    
+    def lookup(self, url):
+        self._record('lookup')
+        return super().lookup(url)
+    
+    def load_body(self, entry):
+        self._record('load_body')
+        return super().load_body(entry)
+    
+    def store(self, *args, **kwargs):
+        self._record('store')
+        return super().store(*args, **kwargs)
+    
+    def revalidated(self, *args, **kwargs):
+        self._record('revalidated')
+        return super().revalidated(*args, **kwargs)
+
+
+def test_cache_is_only_touched_from_worker_threads(tmp_path):
+    with open(FIXTURE, 'rb') as f:
+        page = f.read()
+    cache = ThreadRecordingCache(cache_dir=str(tmp_path), ttl=0)
+    scraper = AsyncNewsScraper(delay=0, cache=cache)
+    # A full download, then a 304 for an entry whose stored parse is outdated
+    session = FakeSession(FakeResponse(200, page, {'ETag': '"v1"'}), FakeResponse(304))
+    
+    async def search_twice():
+        loop_thread = threading.get_ident()
+        first = await scraper._search_website_async(session, WEBSITE['url'], 'election', 'English', 'BBC')
+        assert set(cache.threads) == {'lookup', 'store'}
+        assert all(loop_thread not in threads for threads in cache.threads.values())
+        entry = cache.lookup(scraper._build_search_url(WEBSITE['url'], 'election'))
+        cache.set_meta(entry, {'articles': [], 'parse_key': 'outdated'})
+        cache.threads.clear()
+        second = await scraper._search_website_async(session, WEBSITE['url'], 'election', 'English', 'BBC')
+        return loop_thread, first, second
+    
+    loop_thread, first, second = asyncio.run(search_twice())
+    
+    assert len(first) == 20 and second == first
+    assert set(cache.threads) == {'lookup', 'revalidated', 'load_body'}
+    assert all(loop_thread not in threads for threads in cache.threads.values())
@@ -0,0 +1,117 @@
+"""
+Deduplicator similarity strategies against the original all-pairs title comparison
+"""
+
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+import src.deduplicator as deduplicator
+from src.body_enricher import body_fingerprint
+from src.deduplicator import EXHAUSTIVE_MAX_TITLES, Deduplicator
+
+THRESHOLD = 0.85
+WORDS = ['budget', 'election', 'cricket', 'monsoon', 'parliament', 'minister', 'rupee',
+         'farmers', 'metro', 'vaccine', 'summit', 'railway', 'court', 'stocks', 'policy',
+         'चुनाव', 'बजट', 'संसद', 'मंत्री', 'बारिश']
+
+
+def original_remove_similar_titles(articles, threshold=THRESHOLD):
+    """_remove_similar_titles as it was before the similarity strategies"""
+    unique_articles = []
+    processed_indices = set()
+    for i, article in enumerate(articles):
+        if i in processed_indices:
+            continue
+        unique_articles.append(article)
+        current_title = article.get('title', '').lower().strip()
+        for j in range(i + 1, len(articles)):
+            if j in processed_indices:
+                continue
+            other_title = articles[j].get('title', '').lower().strip()
+            if not current_title or not other_title:
+                continue
+            if SequenceMatcher(None, current_title, other_title).ratio() >= threshold:
+                processed_indices.add(j)
+    return unique_articles
+
+
+def make_articles(n, seed):
+    """Headlines where about a third are small character edits of an earlier one"""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(n):
+        if titles and rng.random() < 0.35:
+            chars = list(rng.choice(titles))
+            for _ in range(rng.randint(1, 3)):
+                chars[rng.randrange(len(chars))] = rng.choice('abcdefghijklmnopqrstuvwxyz ')
+            titles.append(''.join(chars))
+        else:
+            titles.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 9))))
+    return [{'title': title, 'url': f'https://example.com/{index}'}
+            for index, title in enumerate(titles)]
+
+
+@pytest.mark.parametrize('n', [20, 200, EXHAUSTIVE_MAX_TITLES])
+@pytest.mark.parametrize('strategy', ['exhaustive', 'auto'])
+def test_exact_strategies_match_original(n, strategy):
+    articles = make_articles(n, seed=n)
+    dedup = Deduplicator(title_similarity_threshold=THRESHOLD, strategy=strategy)
+    
+    assert dedup._remove_similar_titles(articles) == original_remove_similar_titles(articles)
+
+
+def test_exhaustive_matches_original_without_numpy(monkeypatch):
+    articles = make_articles(300, seed=3)
+    monkeypatch.setattr(deduplicator, 'NUMPY_AVAILABLE', False)
+    dedup = Deduplicator(title_similarity_threshold=THRESHOLD, strategy='exhaustive')
+    
+    assert dedup._remove_similar_titles(articles) == original_remove_similar_titles(articles)
+
+
+def test_streaming_matches_original_for_small_runs():
+    articles = make_articles(200, seed=11)
+    dedup = Deduplicator(title_similarity_threshold=THRESHOLD, strategy='exhaustive')
+    
+    assert list(dedup.iter_unique(articles)) == original_remove_similar_titles(articles)
+
+
+def test_streaming_matches_batch_when_a_body_duplicate_has_a_similar_title():
+    wire_copy = ' '.join(f'sentence {i} of the wire story about the monsoon session' for i in range(40))
+    other_story = ' '.join(f'line {i} of an unrelated report on cricket scores' for i in range(40))
+    articles = [
+        {'title': 'Parliament monsoon session begins', 'url': 'https://a.example/1',
+         'body_fingerprint': body_fingerprint(wire_copy)},
+        # Same wire copy under another headline: dropped for its body...
+        {'title': 'Opposition walks out on first day', 'url': 'https://b.example/2',
+         'body_fingerprint': body_fingerprint(wire_copy)},
+        # ...but its title was kept by the title checks, so this rewrite goes too
+        {'title': 'Opposition walks out on first day!', 'url': 'https://c.example/3',
+         'body_fingerprint': body_fingerprint(other_story)},
+    ]
+    dedup = Deduplicator(title_similarity_threshold=THRESHOLD)
+    
+    batch = dedup.remove_duplicates(articles)
+    assert batch == articles[:1]
+    assert list(dedup.iter_unique(articles)) == batch
+
+
+@pytest.mark.parametrize('strategy', ['lsh', 'auto'])
+def test_index_strategies_find_nearly_every_near_duplicate(strategy):
+    articles = make_articles(2 * EXHAUSTIVE_MAX_TITLES, seed=5)
+    all_urls = {article['url'] for article in articles}
+    
+    def removed(strategy):
+        dedup = Deduplicator(title_similarity_threshold=THRESHOLD, strategy=strategy)
+        kept = dedup._remove_similar_titles(articles)
+        return all_urls - {article['url'] for article in kept}
+    reference = removed('exhaustive')
+    found = removed(strategy)
+    
+    assert len(found & reference) >= 0.98 * len(reference)
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        Deduplicator(strategy='simhash')
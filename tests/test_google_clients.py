@@ -0,0 +1,93 @@
+"""
+ClientPool: credentials loaded once and refreshed ahead of expiry, services cached per thread
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import src.google_clients as google_clients
+from src.google_clients import ClientPool
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # google-auth keeps expiry as naive UTC
+
+
+class FakeCredentials:
+    def __init__(self, expires_in):
+        self.expiry = utcnow() + timedelta(seconds=expires_in)
+        self.refresh_token = 'refresh'
+        self.refreshes = 0
+    
+    @property
+    def valid(self):
+        return self.expiry > utcnow()
+    
+    def refresh(self, request):
+        self.refreshes += 1
+        self.expiry = utcnow() + timedelta(hours=1)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = ClientPool(refresh_margin=300)
+    pool.loads = []
+    pool.saves = []
+    
+    def load(token_file, scopes):
+        pool.loads.append(token_file)
+        return pool.stored
+    monkeypatch.setattr(pool, '_load', load)
+    monkeypatch.setattr(pool, '_save', lambda token_file, creds: pool.saves.append(token_file))
+    monkeypatch.setattr(google_clients, 'get_static_doc', lambda api, version: '{"name": "%s"}' % api)
+    monkeypatch.setattr(google_clients, 'build_from_document',
+                        lambda document, credentials: (document['name'], credentials, object()))
+    return pool
+
+
+def test_token_file_is_read_once(pool):
+    pool.stored = FakeCredentials(expires_in=3600)
+    
+    first = pool.credentials(['scope-a'])
+    assert pool.credentials(['scope-b']) is first
+    
+    assert pool.loads == ['token.pickle']
+    assert pool.saves == [] and first.refreshes == 0
+    pool.invalidate()
+    pool.credentials(['scope-a'])
+    assert len(pool.loads) == 2
+
+
+def test_credentials_are_refreshed_before_they_expire(pool):
+    pool.stored = FakeCredentials(expires_in=120)  # Valid, but inside the refresh margin
+    
+    creds = pool.credentials(['scope-a'])
+    
+    assert creds.refreshes == 1
+    assert pool.saves == ['token.pickle']
+    pool.credentials(['scope-a'])
+    assert creds.refreshes == 1
+
+
+def test_services_are_built_once_per_thread(pool):
+    pool.stored = FakeCredentials(expires_in=3600)
+    main_docs = pool.service('docs', 'v1', ['scope-a'])
+    
+    assert pool.service('docs', 'v1', ['scope-a']) is main_docs
+    assert pool.service('drive', 'v3', ['scope-a'])[0] == 'drive'
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.service('docs', 'v1', ['scope-a'])))
+    thread.start()
+    thread.join()
+    # Same credentials, but the HTTP client under a service object is not thread-safe
+    assert other[0] is not main_docs and other[0][1] is main_docs[1]
+
+
+def test_consent_is_needed_without_a_usable_token(pool, tmp_path):
+    pool.stored = None
+    pool.credentials_file = str(tmp_path / 'missing-credentials.json')
+    
+    with pytest.raises(FileNotFoundError):
+        pool.credentials(['scope-a'], interactive=False)
@@ -0,0 +1,198 @@
+"""
+GoogleDocsExporter against the in-memory Docs API (see conftest.FakeDocsService)
+"""
+
+import json
+import re
+
+from src.google_docs_exporter import GoogleDocsExporter, MAX_BATCH_REQUESTS
+from src.report import build_language_report, docs_link_text, render_docs_requests, report_segments
+from src.rate_limiter import RateLimiter
+
+from tests.conftest import FakeDocsService, http_error
+
+_GENERATED = re.compile(r'Generated: [^\n]*')
+
+
+def make_articles(n, languages=('English', 'Hindi')):
+    titles = {
+        'English': 'Budget session: opposition walks out 🏛️ over fuel prices',
+        'Hindi': 'बजट सत्र में विपक्ष का वॉकआउट 🏛️ ईंधन की कीमतों पर हंगामा',
+        'Marathi': 'अर्थसंकल्प अधिवेशनात विरोधकांचा सभात्याग',
+    }
+    return [
+        {
+            'title': f"{titles[languages[i % len(languages)]]} #{i}",
+            'url': f'https://news.example/{i}/स्टोरी-{i}',
+            'summary': f'सारांश {i} — summary with emoji 🙂 and a combining mark क़',
+            'website': 'Example News',
+            'language': languages[i % len(languages)],
+            'keyword': 'budget',
+        }
+        for i in range(n)
+    ]
+
+
+def expected_document(articles):
+    """Text and links the exporter should produce, from the shared report layout"""
+    segments = list(report_segments(build_language_report(articles), docs_link_text))
+    return ''.join(text for text, _ in segments), [(text, url) for text, url in segments if url]
+
+
+def doc_ids(docs_service):
+    return sorted(docs_service.titles, key=lambda doc_id: int(doc_id[3:]))
+
+
+# Chunked batchUpdate export
+
+def test_export_writes_the_report_in_few_batch_updates(docs_service, make_exporter):
+    articles = make_articles(300)
+    url = make_exporter(docs_service).export(articles)
+    
+    requests = render_docs_requests(build_language_report(articles))
+    assert url == 'https://docs.google.com/document/d/doc0/edit'
+    assert docs_service.calls['create'] == 1
+    assert len(requests) > MAX_BATCH_REQUESTS
+    assert docs_service.calls['batchUpdate'] == -(-len(requests) // MAX_BATCH_REQUESTS)
+    assert [request for batch in docs_service.batches for request in batch] == requests
+
+
+def test_utf16_offsets_for_devanagari_and_emoji(docs_service, make_exporter):
+    articles = make_articles(40, languages=('English', 'Hindi', 'Marathi'))
+    make_exporter(docs_service).export(articles)
+    
+    text, links = expected_document(articles)
+    assert _GENERATED.sub('', docs_service.text('doc0')) == _GENERATED.sub('', text)
+    assert docs_service.links['doc0'] == links
+    assert {url for _, url in links} == {article['url'] for article in articles}
+
+
+def test_chunks_split_at_the_request_limit():
+    requests = [{'insertText': {'location': {'index': 1}, 'text': 'x'}}] * 1201
+    
+    batches = list(GoogleDocsExporter._chunk_requests(requests, max_requests=500))
+    
+    assert [len(batch) for batch in batches] == [500, 500, 201]
+
+
+def test_chunks_split_at_the_byte_limit():
+    requests = [{'insertText': {'location': {'index': 1}, 'text': 'स' * n}} for n in range(1, 60)]
+    sizes = [len(json.dumps(request, ensure_ascii=False).encode('utf-8')) for request in requests]
+    max_bytes = 1000
+    
+    batches = list(GoogleDocsExporter._chunk_requests(requests, max_bytes=max_bytes))
+    
+    assert [request for batch in batches for request in batch] == requests
+    position = 0
+    for batch in batches:
+        batch_size = sum(sizes[position:position + len(batch)])
+        assert batch_size <= max_bytes
+        if position + len(batch) < len(requests):
+            # Only split when the next request would not have fit
+            assert batch_size + sizes[position + len(batch)] > max_bytes
+        position += len(batch)
+    assert len(batches) > 1
+
+
+def test_a_request_over_the_byte_limit_goes_alone():
+    small = {'insertText': {'location': {'index': 1}, 'text': 'a'}}
+    large = {'insertText': {'location': {'index': 1}, 'text': 'b' * 5000}}
+    
+    batches = list(GoogleDocsExporter._chunk_requests([small, large, small], max_bytes=1000))
+    
+    assert batches == [[small], [large], [small]]
+
+
+# Sharded export
+
+def test_shards_are_written_concurrently_with_an_index(make_exporter):
+    docs_service = FakeDocsService(latency=0.05)
+    exporter = make_exporter(docs_service)
+    articles = make_articles(30, languages=('English', 'Hindi', 'Marathi'))
+    
+    url = exporter.export_sharded(articles, 'language', max_workers=3)
+    
+    assert docs_service.max_in_flight >= 2
+    assert docs_service.calls['create'] == 4
+    index_id = doc_ids(docs_service)[-1]
+    assert url == f'https://docs.google.com/document/d/{index_id}/edit'
+    assert docs_service.titles[index_id].endswith(' - Index')
+    shard_ids = {docs_service.titles[doc_id].rsplit(' - ', 1)[1]: doc_id
+                 for doc_id in doc_ids(docs_service)[:-1]}
+    assert sorted(shard_ids) == ['English', 'Hindi', 'Marathi']
+    assert [url for _, url in docs_service.links[index_id]] == [
+        f'https://docs.google.com/document/d/{shard_ids[name]}/edit'
+        for name in ('English', 'Hindi', 'Marathi')
+    ]
+    for name, doc_id in shard_ids.items():
+        shard = [article for article in articles if article['language'] == name]
+        assert docs_service.links[doc_id] == expected_document(shard)[1]
+
+
+def test_a_failed_shard_is_marked_in_the_index(make_exporter):
+    def fail(call, title):
+        if call == 'batchUpdate' and title and title.endswith(' - Hindi'):
+            raise http_error(500)
+    docs_service = FakeDocsService(fail=fail)
+    articles = make_articles(20, languages=('English', 'Hindi'))
+    
+    make_exporter(docs_service).export_sharded(articles, 'language')
+    
+    index_id = doc_ids(docs_service)[-1]
+    index = docs_service.text(index_id)
+    assert re.search(r'English \(10 articles\)\nDocument: https://', index)
+    assert 'Hindi (10 articles)\nDocument: Export failed' in index
+    assert len(docs_service.links[index_id]) == 1
+
+
+def test_throttled_call_is_retried_after_retry_after(make_exporter):
+    throttled = []
+    
+    def fail(call, title):
+        if call == 'batchUpdate' and not throttled:
+            throttled.append(call)
+            raise http_error(429, {'Retry-After': '7'})
+    docs_service = FakeDocsService(fail=fail)
+    exporter = make_exporter(docs_service)
+    exporter.rate_limiter = RateLimiter(rate=10.0, burst=5)
+    sleeps = []
+    exporter.sleep = sleeps.append
+    articles = make_articles(30, languages=('English', 'Hindi'))
+    
+    exporter.export_sharded(articles, 'language', max_workers=2)
+    
+    assert throttled
+    assert max(sleeps) >= 7
+    assert all(docs_service.links[doc_id] for doc_id in doc_ids(docs_service))
+    assert 'Export failed' not in docs_service.text(doc_ids(docs_service)[-1])
+
+
+# Incremental export
+
+def test_incremental_export_appends_in_batches(docs_service, make_exporter):
+    exporter = make_exporter(docs_service)
+    articles = make_articles(12)
+    
+    url = exporter.export_incremental(iter(articles), max_articles=5, max_wait=60)
+    
+    assert url == 'https://docs.google.com/document/d/doc0/edit'
+    # Header, three article batches, totals
+    assert docs_service.calls['batchUpdate'] == 5
+    assert exporter.exported_articles == articles
+    assert [url for _, url in docs_service.links['doc0']] == [article['url'] for article in articles]
+    assert 'Total Articles: 12' in docs_service.text('doc0')
+
+
+def test_partial_incremental_export_reports_what_was_written(docs_service, make_exporter):
+    def fail(call, title):
+        if call == 'batchUpdate' and docs_service.calls['batchUpdate'] == 3:
+            raise http_error(500)
+    docs_service.fail = fail
+    exporter = make_exporter(docs_service)
+    articles = make_articles(12)
+    
+    exporter.export_incremental(iter(articles), max_articles=5, max_wait=60)
+    
+    assert exporter.exported_articles == articles[:5]
+    assert len(docs_service.links['doc0']) == 5
+    assert 'Total Articles' not in docs_service.text('doc0')
@@ -0,0 +1,120 @@
+"""
+GoogleSheetsHandler: cached config reuse and the Drive revision check
+"""
+
+import json
+import logging
+
+import pytest
+
+import src.google_sheets_handler as google_sheets_handler
+from src.google_clients import ClientPool
+from src.google_sheets_handler import GoogleSheetsHandler, SCOPES
+
+from tests.conftest import _Request
+
+KEYWORD_ROWS = [['Keyword', 'Language'], ['election', 'English'], ['चुनाव', 'Hindi']]
+WEBSITE_ROWS = [['Name', 'URL', 'Language'], ['BBC', 'https://www.bbc.com', 'English']]
+
+
+class FakeSheetsPool:
+    """google_clients pool with a Sheets batchGet and a Drive files().get, both counted"""
+    
+    def __init__(self, granted=None):
+        self.granted = granted
+        self.version = '1'
+        self.calls = {'batchGet': 0, 'drive': 0}
+    
+    def service(self, api, version, scopes, **kwargs):
+        return self
+    
+    def granted_scopes(self, token_file=None):
+        return self.granted
+    
+    def spreadsheets(self):
+        return self
+    
+    def values(self):
+        return self
+    
+    def files(self):
+        return self
+    
+    def batchGet(self, spreadsheetId, ranges):
+        def run():
+            self.calls['batchGet'] += 1
+            return {'valueRanges': [{'values': KEYWORD_ROWS}, {'values': WEBSITE_ROWS}]}
+        return _Request(run)
+    
+    def get(self, fileId, fields, supportsAllDrives):
+        def run():
+            self.calls['drive'] += 1
+            return {'version': self.version, 'modifiedTime': '2026-10-18T00:00:00Z'}
+        return _Request(run)
+
+
+@pytest.fixture
+def make_handler(monkeypatch, tmp_path):
+    monkeypatch.setenv('KEYWORDS_SHEET_ID', 'sheet1')
+    monkeypatch.setenv('WEBSITES_SHEET_ID', 'sheet1')
+    monkeypatch.setattr(google_sheets_handler, 'SHEETS_CONFIG_FILE', str(tmp_path / 'sheets.json'))
+    monkeypatch.setattr(GoogleSheetsHandler, '_reauthorization_logged', False)
+    
+    def make(pool):
+        monkeypatch.setattr(google_sheets_handler, 'get_pool', lambda: pool)
+        return GoogleSheetsHandler()
+    return make
+
+
+def test_first_run_downloads_without_a_revision_check(make_handler):
+    pool = FakeSheetsPool(granted=set(SCOPES))
+    
+    config = make_handler(pool).load_config()
+    
+    assert config['keywords'][1] == {'keyword': 'चुनाव', 'language': 'Hindi'}
+    assert config['websites'] == [{'name': 'BBC', 'url': 'https://www.bbc.com', 'language': 'English'}]
+    assert pool.calls == {'batchGet': 1, 'drive': 0}
+
+
+def test_unchanged_sheets_are_not_downloaded_again(make_handler):
+    pool = FakeSheetsPool(granted=set(SCOPES))
+    first = make_handler(pool).load_config()
+    # The first cached copy has no revisions yet, so the second run downloads once more
+    make_handler(pool).load_config()
+    
+    assert make_handler(pool).load_config() == first
+    assert pool.calls == {'batchGet': 2, 'drive': 2}
+    pool.version = '2'
+    make_handler(pool).load_config()
+    assert pool.calls == {'batchGet': 3, 'drive': 3}
+
+
+def test_token_without_drive_scope_skips_the_check_and_says_so_once(make_handler, caplog):
+    pool = FakeSheetsPool(granted={SCOPES[0]})
+    make_handler(pool).load_config()
+    
+    with caplog.at_level(logging.WARNING, logger=google_sheets_handler.__name__):
+        make_handler(pool).load_config()
+        make_handler(pool).load_config()
+    
+    assert pool.calls == {'batchGet': 3, 'drive': 0}
+    assert len([r for r in caplog.records if 'sign in again' in r.getMessage()]) == 1
+
+
+def test_full_drive_scope_covers_the_metadata_check(make_handler):
+    pool = FakeSheetsPool(granted={SCOPES[0], 'https://www.googleapis.com/auth/drive'})
+    make_handler(pool).load_config()
+    
+    make_handler(pool).load_config()
+    
+    assert pool.calls['drive'] == 1
+
+
+def test_granted_scopes_of_a_json_token_come_from_the_file(tmp_path):
+    token_file = str(tmp_path / 'token.json')
+    with open(token_file, 'w') as f:
+        json.dump({'scopes': [SCOPES[0]]}, f)
+    pool = ClientPool()
+    
+    assert pool.granted_scopes(token_file) == {SCOPES[0]}
+    assert pool.granted_scopes(str(tmp_path / 'token.pickle')) is None
@@ -0,0 +1,51 @@
+"""
+Parser backends: html.parser and lxml extract the same articles
+"""
+
+import glob
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src.html_parsers import LXML_AVAILABLE, make_soup
+from src.news_scraper import NewsScraper
+
+FIXTURES = sorted(glob.glob(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures', '*.html'
+)))
+
+needs_lxml = pytest.mark.skipif(not LXML_AVAILABLE, reason="lxml is not installed")
+
+
+@needs_lxml
+@pytest.mark.parametrize('path', FIXTURES, ids=os.path.basename)
+def test_backends_extract_the_same_articles(path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    
+    results = {
+        parser: NewsScraper(parser=parser)._parse_response(
+            content, 'https://example.com', 'English', 'Fixture', 'fixture'
+        )
+        for parser in ('html.parser', 'lxml')
+    }
+    
+    assert results['html.parser']
+    assert results['html.parser'] == results['lxml']
+
+
+@needs_lxml
+@pytest.mark.parametrize('markup', [
+    '<div><p class="summary">text<p class="byline">by</div>',
+    '<div><p>a<div>x</div>tail</div>',
+    '<div><p>a<p>b<p>c</div>',
+    '<ul><li>a<li>b<li>c</ul>',
+    '<div><a href="/1">a<a href="/2">b</a></div>',
+    '<table><tr><td>a<td>b<tr><td>c</table>',
+    '<div><p>a <b>bold</b> <span>inline</span> stays</p></div>',
+])
+def test_unclosed_elements_are_closed_like_lxml(markup):
+    html = f'<html><body>{markup}</body></html>'.encode()
+    
+    assert str(make_soup(html, 'html.parser').body) == str(BeautifulSoup(html, 'lxml').body)
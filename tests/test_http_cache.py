@@ -0,0 +1,162 @@
+"""
+HTTP response cache: fresh hits, 304 revalidation and invalidation of stored parses
+"""
+
+import os
+
+import pytest
+import requests
+
+import src.news_scraper as news_scraper
+from src.body_enricher import BodyEnricher, BodyStore
+from src.http_cache import ResponseCache
+from src.news_scraper import NewsScraper
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'benchmarks', 'fixtures', 'bbc_search.html')
+WEBSITE = {'name': 'BBC', 'url': 'https://www.bbc.com', 'language': 'English'}
+TASK = (WEBSITE, 'election')
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', headers=None, url=''):
+        self.status_code = status_code
+        self.content = content
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        self.url = url
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """requests.Session answering from a list of responses, recording request headers"""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+    
+    def get(self, url, headers=None, **kwargs):
+        self.sent.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def page():
+    with open(FIXTURE, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def make_scraper(tmp_path, monkeypatch):
+    """NewsScraper with a response cache (given TTL) whose parses are counted"""
+    def make(*responses, ttl=600, parser='html.parser'):
+        scraper = NewsScraper(delay=0, parser=parser,
+                              cache=ResponseCache(cache_dir=str(tmp_path / 'http'), ttl=ttl))
+        scraper.session = FakeSession(*responses)
+        scraper.parses = 0
+        parse = scraper._parse_response
+        
+        def counted(*args):
+            scraper.parses += 1
+            return parse(*args)
+        monkeypatch.setattr(scraper, '_parse_response', counted)
+        return scraper
+    return make
+
+
+def test_fresh_entry_is_served_without_a_request(make_scraper, page):
+    first = make_scraper(FakeResponse(200, page, {'ETag': '"v1"'}))
+    articles = first._run_task(TASK)
+    assert len(articles) == 20
+    
+    again = make_scraper()
+    assert again._run_task(TASK) == articles
+    assert again.session.sent == [] and again.parses == 0
+
+
+def test_stale_entry_is_revalidated_and_its_parse_reused(make_scraper, page):
+    make_scraper(FakeResponse(200, page, {'ETag': '"v1"'}))._run_task(TASK)
+    scraper = make_scraper(FakeResponse(304, headers={'ETag': '"v1"'}), ttl=0)
+    stored_at = scraper.cache.lookup(scraper._build_search_url(WEBSITE['url'], 'election')).stored_at
+    
+    articles = scraper._run_task(TASK)
+    
+    assert len(articles) == 20
+    assert scraper.session.sent[0]['If-None-Match'] == '"v1"'
+    assert scraper.parses == 0
+    entry = scraper.cache.lookup(scraper._build_search_url(WEBSITE['url'], 'election'))
+    assert entry.stored_at > stored_at
+
+
+def test_stored_parse_from_older_extraction_code_is_not_reused(make_scraper, page, monkeypatch):
+    make_scraper(FakeResponse(200, page, {'ETag': '"v1"'}))._run_task(TASK)
+    monkeypatch.setattr(news_scraper, 'PARSER_VERSION', 'next')
+    scraper = make_scraper(FakeResponse(304), FakeResponse(304), ttl=0)
+    
+    assert len(scraper._run_task(TASK)) == 20
+    # The stored body was parsed again, and that parse is reused from then on
+    assert scraper.parses == 1
+    assert len(scraper._run_task(TASK)) == 20
+    assert scraper.parses == 1
+
+
+def test_304_with_an_unreadable_copy_refetches_without_validators(make_scraper, page, monkeypatch):
+    first = make_scraper(FakeResponse(200, page, {'ETag': '"v1"'}))
+    first._run_task(TASK)
+    entry = first.cache.lookup(first._build_search_url(WEBSITE['url'], 'election'))
+    with open(first.cache._body_path(entry.key), 'wb') as f:
+        f.write(b'not zlib')
+    monkeypatch.setattr(news_scraper, 'PARSER_VERSION', 'next')
+    scraper = make_scraper(FakeResponse(304), FakeResponse(200, page, {'ETag': '"v2"'}), ttl=0)
+    
+    assert len(scraper._run_task(TASK)) == 20
+    assert 'If-None-Match' in scraper.session.sent[0]
+    assert 'If-None-Match' not in scraper.session.sent[1]
+    assert scraper.cache.lookup(scraper._build_search_url(WEBSITE['url'], 'election')).etag == '"v2"'
+
+
+def test_body_enricher_refetches_when_a_304_finds_no_readable_copy(make_scraper, tmp_path):
+    url = 'https://news.example/story'
+    body = b'<html><body><article>' + b'<p>' + b'word ' * 60 + b'</p></article></body></html>'
+    scraper = make_scraper(FakeResponse(200, body, {'ETag': '"v1"', 'Content-Type': 'text/html'}, url),
+                           FakeResponse(304),
+                           FakeResponse(200, body, {'ETag': '"v2"', 'Content-Type': 'text/html'}, url),
+                           ttl=0)
+    enricher = BodyEnricher(scraper, store=BodyStore(str(tmp_path / 'bodies.sqlite')))
+    assert enricher._fetch_page(url) == (body, url)
+    entry = scraper.cache.lookup(url)
+    with open(scraper.cache._body_path(entry.key), 'wb') as f:
+        f.write(b'not zlib')
+    
+    assert enricher._fetch_page(url) == (body, url)
+    assert 'If-None-Match' not in scraper.session.sent[2]
+    assert scraper.cache.lookup(url).etag == '"v2"'
+
+
+def test_entries_expire_and_are_evicted_least_recently_used(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_age=3600, max_bytes=2500)
+    for n in range(3):
+        cache.store(f'https://a.example/{n}', os.urandom(1000))
+    # The 2.9 KB over max_bytes: the least recently used entry went first
+    assert cache.lookup('https://a.example/0') is None
+    assert cache.lookup('https://a.example/2') is not None
+    
+    cache.max_age = -1
+    assert cache.lookup('https://a.example/2') is None
+
+
+def test_urls_differing_only_in_form_share_an_entry(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    cache.store('https://A.example:443/search?q=x&page=2#top', b'body',
+                {'ETag': '"e"', 'Last-Modified': 'Sat, 17 Oct 2026 10:00:00 GMT'})
+    
+    entry = cache.lookup('https://a.example/search?page=2&q=x')
+    
+    assert cache.load_body(entry) == b'body'
+    assert ResponseCache.conditional_headers(entry) == {
+        'If-None-Match': '"e"', 'If-Modified-Since': 'Sat, 17 Oct 2026 10:00:00 GMT'
+    }
+    cache.delete(entry)
+    assert cache.lookup('https://a.example/search?page=2&q=x') is None
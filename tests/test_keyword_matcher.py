@@ -0,0 +1,46 @@
+"""
+KeywordMatcher against a naive substring search
+"""
+
+import random
+
+from src.keyword_matcher import KeywordMatcher, keyword_matcher, normalize_text
+
+ALPHABET = 'abcmodi नरेंद्र मोदी'
+
+
+def naive_find(keywords, *texts):
+    """Every keyword that is a substring of one of the texts"""
+    texts = [normalize_text(text) for text in texts]
+    return [keyword for keyword in keywords if any(normalize_text(keyword) in text for text in texts)]
+
+
+def test_matches_the_naive_search_on_random_texts():
+    rng = random.Random(25)
+    for _ in range(200):
+        keywords = list(dict.fromkeys(
+            ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 12))
+        ))
+        texts = [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40))) for _ in range(2)]
+        
+        assert KeywordMatcher(keywords).find(*texts) == naive_find(keywords, *texts)
+
+
+def test_overlapping_nested_and_cased_keywords():
+    matcher = KeywordMatcher(['Narendra Modi', 'modi', 'MODI govt', 'rahul', ''])
+    
+    assert matcher.find('PM NARENDRA MODI speaks') == ['Narendra Modi', 'modi', '']
+    # Texts are scanned separately: no match across the title/summary boundary
+    assert matcher.find('Speech by Narendra', 'Modi govt plans') == ['modi', 'MODI govt', '']
+
+
+def test_composed_and_decomposed_devanagari_agree():
+    composed, decomposed = 'क़', 'क़'  # क़ as one code point and as क + nukta
+    
+    assert KeywordMatcher([f'{composed}ानून']).find(f'नया {decomposed}ानून लागू') == [f'{composed}ानून']
+    assert KeywordMatcher([f'{decomposed}ानून']).find(f'{composed}ानून') == [f'{decomposed}ानून']
+
+
+def test_compiled_matchers_are_reused():
+    assert keyword_matcher(['budget', 'election']) is keyword_matcher(('budget', 'election'))
@@ -0,0 +1,83 @@
+"""
+NewsScraper: the single-walk selector index, and concurrent searches
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+
+from bs4 import BeautifulSoup
+
+import src.news_scraper as news_scraper
+from src.html_parsers import candidate_tags
+from src.news_scraper import NewsScraper, _compile_selector_index
+
+PAGE = b"""<html><body>
+<div class="story"><h3><a href="/a">Monsoon session of Parliament opens</a></h3></div>
+<div class="card"><h3><a href="/b">Sensex closes at a record high</a></h3></div>
+<article class="card"><h3><a href="/c">India wins the third Test in Chennai</a></h3></article>
+</body></html>"""
+
+
+def test_untagged_selectors_apply_to_every_tag():
+    index = _compile_selector_index(['div.story', '.card', 'article'])
+    
+    assert [position for position, _ in index['div']] == [0, 1]
+    assert [position for position, _ in index['article']] == [1, 2]
+    assert [position for position, _ in index[None]] == [1]
+
+
+def test_a_tagless_selector_finds_elements_whose_tag_has_other_selectors(monkeypatch):
+    selectors = ['div.story', '.card']
+    monkeypatch.setattr(news_scraper, 'ARTICLE_SELECTORS', selectors)
+    monkeypatch.setattr(news_scraper, 'ARTICLE_TAGS', candidate_tags(selectors))
+    monkeypatch.setattr(news_scraper, '_ARTICLE_SELECTOR_INDEX', _compile_selector_index(selectors))
+    soup = BeautifulSoup(PAGE, 'html.parser')
+    
+    articles = NewsScraper()._parse_articles(soup, 'https://news.example', 'English', 'Example', 'india')
+    
+    assert [article['url'] for article in articles] == [
+        'https://news.example/a', 'https://news.example/b', 'https://news.example/c'
+    ]
+
+
+WEBSITES = [{'name': f'Site {n}', 'url': f'https://site{n}.example', 'language': 'English'} for n in range(4)]
+KEYWORDS = [{'keyword': f'keyword{n}', 'language': 'English'} for n in range(6)]
+
+
+class SlowSearches:
+    """Stands in for _search_website, tracking how many searches run at once per host"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = Counter()
+        self.max_per_host = Counter()
+        self.max_total = 0
+    
+    def __call__(self, url, keyword, language, website_name):
+        with self.lock:
+            self.in_flight[url] += 1
+            self.max_per_host[url] = max(self.max_per_host[url], self.in_flight[url])
+            self.max_total = max(self.max_total, sum(self.in_flight.values()))
+        # Later searches finish first, so completion order differs from task order
+        time.sleep(0.02 * (6 - int(keyword[-1])) * random.random())
+        with self.lock:
+            self.in_flight[url] -= 1
+        return [{'title': f'{website_name} {keyword} {n}'} for n in range(2)]
+
+
+def test_hosts_run_in_parallel_within_the_per_host_limit(monkeypatch):
+    serial = NewsScraper(delay=0)
+    monkeypatch.setattr(serial, '_search_website', SlowSearches())
+    concurrent = NewsScraper(delay=0, max_workers=8, max_per_host=2)
+    searches = SlowSearches()
+    monkeypatch.setattr(concurrent, '_search_website', searches)
+    
+    articles = concurrent.search_articles(WEBSITES, KEYWORDS)
+    
+    assert max(searches.max_per_host.values()) <= 2
+    assert searches.max_total > 2
+    # Same articles in the same order as one search after another
+    assert articles == serial.search_articles(WEBSITES, KEYWORDS)
+    assert articles[:2] == [{'title': 'Site 0 keyword0 0'}, {'title': 'Site 0 keyword0 1'}]
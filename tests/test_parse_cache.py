@@ -0,0 +1,65 @@
+"""
+Parse cache: byte-identical pages are parsed once, extraction changes invalidate
+"""
+
+import os
+
+import pytest
+
+import src.news_scraper as news_scraper
+from src.news_scraper import NewsScraper
+from src.parse_cache import ParseCache
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       'benchmarks', 'fixtures', 'bbc_search.html')
+
+
+@pytest.fixture
+def parse_cache(tmp_path):
+    return ParseCache(path=str(tmp_path / 'parse.sqlite'))
+
+
+@pytest.fixture
+def page():
+    with open(FIXTURE, 'rb') as f:
+        return f.read()
+
+
+def parse(scraper, content, url='https://www.bbc.com'):
+    return scraper._parse_response(content, url, 'English', 'BBC', 'election')
+
+
+def test_identical_page_is_served_from_the_cache(parse_cache, page, monkeypatch):
+    scraper = NewsScraper(parse_cache=parse_cache)
+    articles = parse(scraper, page)
+    
+    monkeypatch.setattr(news_scraper, 'make_soup', pytest.fail)
+    assert parse(scraper, page) == articles
+    assert parse_cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 1}
+
+
+def test_any_change_to_the_inputs_is_a_miss(parse_cache, page, monkeypatch):
+    scraper = NewsScraper(parse_cache=parse_cache)
+    parse(scraper, page)
+    
+    # Changed body, another base URL (relative links resolve differently), new extraction code
+    parse(scraper, page + b'<!-- ad slot -->')
+    parse(scraper, page, url='https://www.bbc.co.uk')
+    monkeypatch.setattr(news_scraper, 'PARSER_VERSION', 'next')
+    parse(scraper, page)
+    
+    assert parse_cache.hits == 0 and parse_cache.misses == 4
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ParseCache(path=str(tmp_path / 'parse.sqlite'), max_entries=10)
+    for n in range(10):
+        cache.put(f'key{n}', [{'title': str(n)}])
+    assert cache.get('key0') == [{'title': '0'}]
+    
+    cache.put('key10', [])
+    
+    # Evicts down to 90% of max_entries, oldest access first
+    assert cache.stats()['entries'] == 9
+    assert cache.get('key0') is not None
+    assert cache.get('key1') is None and cache.get('key2') is None
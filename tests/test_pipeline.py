@@ -0,0 +1,45 @@
+"""
+Streaming pipeline: body enrichment between search and dedup
+"""
+
+import threading
+
+from src.body_enricher import body_fingerprint
+from src.deduplicator import Deduplicator
+from src.pipeline import run_pipeline
+
+from tests.conftest import FakeDocsService, ListScraper
+
+WIRE_COPY = ' '.join(f'sentence {i} of the wire story about the monsoon session' for i in range(40))
+OTHER_STORY = ' '.join(f'line {i} of an unrelated report on cricket scores' for i in range(40))
+
+
+class DictEnricher:
+    """BodyEnricher whose article bodies come from a dict, noting the threads it ran on"""
+    
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.threads = set()
+    
+    def enrich(self, articles):
+        self.threads.add(threading.current_thread().name)
+        for article in articles:
+            article['body_fingerprint'] = body_fingerprint(self.bodies[article['url']])
+        return articles
+
+
+def test_same_body_under_another_headline_is_dropped(make_exporter):
+    articles = [
+        {'title': 'Parliament monsoon session begins', 'url': 'https://a.example/1', 'language': 'English'},
+        {'title': 'Cricket: India take the series', 'url': 'https://b.example/2', 'language': 'English'},
+        {'title': 'Opposition walks out on first day', 'url': 'https://c.example/3', 'language': 'English'},
+    ]
+    enricher = DictEnricher({'https://a.example/1': WIRE_COPY, 'https://b.example/2': OTHER_STORY,
+                             'https://c.example/3': WIRE_COPY})
+    exporter = make_exporter(FakeDocsService())
+    
+    run_pipeline(ListScraper(articles[:2], articles[2:]), Deduplicator(), exporter, [], [],
+                 body_enricher=enricher)
+    
+    assert [a['url'] for a in exporter.exported_articles] == ['https://a.example/1', 'https://b.example/2']
+    assert enricher.threads == {'pipeline-bodies'}
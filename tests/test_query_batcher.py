@@ -0,0 +1,73 @@
+"""
+Keyword batching: OR queries within the budget, and results attributed back to keywords
+"""
+
+import pickle
+from urllib.parse import quote
+
+from src.news_scraper import NewsScraper
+from src.query_batcher import KeywordQuery, batch_keywords, build_query
+
+KEYWORDS = ['election', 'budget', 'cricket', 'चुनाव', 'बजट']
+
+
+def test_batches_respect_the_term_and_length_budget():
+    batches = batch_keywords(KEYWORDS, max_terms=2, max_length=1000)
+    assert [list(batch.keywords) for batch in batches[:2]] == [['election', 'budget'], ['cricket', 'चुनाव']]
+    assert batches[2] == 'बजट' and not isinstance(batches[2], KeywordQuery)
+    
+    # Devanagari is 9 URL-encoded characters per letter, so it fills the budget fast
+    batches = batch_keywords(KEYWORDS, max_terms=8, max_length=60)
+    assert all(len(quote(batch)) <= 60 for batch in batches if isinstance(batch, KeywordQuery))
+    flattened = [keyword for batch in batches
+                 for keyword in (batch.keywords if isinstance(batch, KeywordQuery) else [batch])]
+    assert flattened == KEYWORDS
+
+
+def test_one_term_per_query_is_one_search_per_keyword():
+    assert batch_keywords(KEYWORDS, max_terms=1) == KEYWORDS
+    # A keyword over the length budget still gets a query of its own
+    assert batch_keywords(['x' * 300, 'budget'], max_length=50) == ['x' * 300, 'budget']
+
+
+def test_keyword_query_is_its_or_query():
+    query = KeywordQuery(['budget', 'monsoon session'])
+    
+    assert query == build_query(['budget', 'monsoon session']) == '"budget" OR "monsoon session"'
+    assert pickle.loads(pickle.dumps(query)).keywords == ('budget', 'monsoon session')
+
+
+def test_batched_results_are_attributed_to_the_keywords_they_mention():
+    query = KeywordQuery(['budget', 'cricket', 'election'])
+    articles = [
+        {'title': 'Budget day: cricket board gets more funds', 'url': 'https://a.example/1'},
+        {'title': 'Weather update', 'summary': 'Election commission visits', 'url': 'https://a.example/2'},
+        {'title': 'Weather update', 'url': 'https://a.example/3'},
+        # Attributed already (e.g. stored with a cached response)
+        {'title': 'Budget and cricket', 'url': 'https://a.example/4', 'keyword': 'cricket'},
+    ]
+    
+    tagged = NewsScraper()._tag_articles(articles, 'English', 'Example', query)
+    
+    assert [(article['url'][-1], article['keyword']) for article in tagged] == [
+        ('1', 'budget'), ('1', 'cricket'), ('2', 'election'), ('4', 'cricket')
+    ]
+    assert all(article['website'] == 'Example' for article in tagged)
+    assert 'keyword' not in articles[0]
+
+
+def test_relevance_filter_applies_to_single_keyword_searches():
+    articles = [{'title': 'Budget passed', 'url': 'https://a.example/1'},
+                {'title': 'Weather update', 'url': 'https://a.example/2'}]
+    
+    assert len(NewsScraper()._tag_articles(articles, 'English', 'Example', 'budget')) == 2
+    filtered = NewsScraper(relevance_filter=True)._tag_articles(articles, 'English', 'Example', 'budget')
+    assert [article['url'] for article in filtered] == ['https://a.example/1']
+
+
+def test_batching_cuts_the_searches_per_site():
+    websites = [{'name': 'BBC', 'url': 'https://www.bbc.com', 'language': 'English'}]
+    keywords = [{'keyword': keyword, 'language': 'English'} for keyword in KEYWORDS]
+    
+    assert len(NewsScraper()._plan_tasks(websites, keywords)) == 5
+    assert len(NewsScraper(keyword_batch_size=8)._plan_tasks(websites, keywords)) == 1
@@ -0,0 +1,90 @@
+"""
+RateLimiter: token reservations, adaptive rate and Retry-After
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from src.rate_limiter import RateLimiter, parse_retry_after
+
+
+def test_burst_then_one_slot_per_interval():
+    limiter = RateLimiter(rate=10.0, burst=2)
+    
+    waits = [limiter.reserve('a.example') for _ in range(4)]
+    
+    assert waits[:2] == [pytest.approx(0, abs=0.01)] * 2
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_domains_have_separate_buckets():
+    limiter = RateLimiter(rate=1.0)
+    
+    assert limiter.reserve('a.example') == pytest.approx(0, abs=0.01)
+    assert limiter.reserve('b.example') == pytest.approx(0, abs=0.01)
+    assert limiter.reserve('a.example') == pytest.approx(1.0, abs=0.01)
+
+
+def test_unlimited_rate_never_waits():
+    limiter = RateLimiter(rate=None)
+    
+    assert all(limiter.reserve('a.example') <= 0 for _ in range(100))
+
+
+def test_throttling_halves_the_rate_and_successes_restore_it():
+    limiter = RateLimiter(rate=2.0, increase_step=0.5)
+    
+    assert limiter.observe('a.example', 429) is None
+    assert limiter.current_rate('a.example') == 1.0
+    limiter.observe('a.example', 503)
+    assert limiter.current_rate('a.example') == 0.5
+    for _ in range(5):
+        limiter.observe('a.example', 200)
+    # Grows back additively, but never past the initial rate
+    assert limiter.current_rate('a.example') == 2.0
+    limiter.observe('a.example', 404)
+    assert limiter.current_rate('a.example') == 2.0
+
+
+def test_rate_never_drops_below_min_rate():
+    limiter = RateLimiter(rate=1.0, min_rate=0.2)
+    
+    for _ in range(10):
+        limiter.observe('a.example', 429)
+    
+    assert limiter.current_rate('a.example') == 0.2
+
+
+def test_retry_after_blocks_the_domain():
+    limiter = RateLimiter(rate=None)
+    
+    assert limiter.observe('a.example', 429, {'Retry-After': '5'}) == 5.0
+    
+    assert limiter.reserve('a.example') == pytest.approx(5.0, abs=0.05)
+    assert limiter.reserve('b.example') <= 0
+    # Retry-After is only honoured on throttling responses
+    assert limiter.observe('b.example', 200, {'Retry-After': '5'}) is None
+    assert limiter.reserve('b.example') <= 0
+
+
+def test_retry_after_formats():
+    in_a_minute = datetime.now(timezone.utc) + timedelta(seconds=60)
+    
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after('-3') == 0.0
+    assert parse_retry_after(format_datetime(in_a_minute, usegmt=True)) == pytest.approx(60, abs=2)
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff_grows_with_jitter_and_honours_retry_after():
+    limiter = RateLimiter(backoff_base=1.0, max_backoff=8.0)
+    
+    for attempt in range(6):
+        delays = [limiter.backoff_delay(attempt) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= min(8.0, 2 ** attempt)
+        assert max(delays) > 0.5 * min(8.0, 2 ** attempt)
+    assert all(limiter.backoff_delay(0, retry_after=30) >= 30 for _ in range(20))
@@ -0,0 +1,25 @@
+"""
+Report model: cross-language story lines
+"""
+
+from src.cross_language import StoryGrouper
+from src.report import build_language_report, render_text
+
+
+def test_language_report_lists_coverage_in_the_other_language():
+    articles = [
+        {'title': 'Modi inaugurates Mumbai metro line 3', 'language': 'English',
+         'website': 'NDTV', 'url': 'https://ndtv.com/mumbai-metro-line-3-modi'},
+        {'title': 'मोदी ने मुंबई मेट्रो लाइन 3 का उद्घाटन किया', 'language': 'Hindi',
+         'website': 'Aaj Tak', 'url': 'https://aajtak.in/mumbai-metro-line-3-modi'},
+        {'title': 'Monsoon reaches Kerala early', 'language': 'English',
+         'website': 'BBC', 'url': 'https://bbc.com/monsoon-kerala'},
+    ]
+    StoryGrouper().group(articles)
+    report = build_language_report(articles)
+    
+    fields = {entry.title: dict(entry.fields) for section in report.sections for entry in section.entries}
+    assert fields[articles[0]['title']]['Also in Hindi'] == f"{articles[1]['title']} (Aaj Tak)"
+    assert fields[articles[1]['title']]['Also in English'] == f"{articles[0]['title']} (NDTV)"
+    assert not any(name.startswith('Also in') for name in fields[articles[2]['title']])
+    assert 'Also in Hindi' in ''.join(render_text(report))
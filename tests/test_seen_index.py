@@ -0,0 +1,88 @@
+"""
+Seen index: lookups, expiry, and recording only what an export really wrote
+"""
+
+import time
+
+import pytest
+
+from src.deduplicator import Deduplicator
+from src.pipeline import run_pipeline
+from src.seen_index import SeenIndex
+
+from tests.conftest import FakeDocsService, ListScraper, http_error
+
+
+@pytest.fixture
+def seen_index(tmp_path):
+    return SeenIndex(path=str(tmp_path / 'seen.sqlite'), ttl=3600)
+
+
+HEADLINES = ['Monsoon session of Parliament opens', 'Sensex closes at a record high',
+             'India wins the third Test in Chennai', 'Metro line 3 opens for commuters']
+
+
+def article(n):
+    return {'title': HEADLINES[n], 'url': f'https://news.example/story/{n}?utm_source=rss',
+            'language': 'English'}
+
+
+def test_url_and_title_are_both_keys(seen_index):
+    seen_index.mark_seen([article(1)])
+    
+    assert seen_index.is_seen(article(1))
+    # Same URL once the tracking parameter is canonicalized away
+    assert seen_index.is_seen({'url': 'https://news.example/story/1', 'title': 'Other headline'})
+    # Same headline at another URL
+    assert seen_index.is_seen({'url': 'https://other.example/x', 'title': article(1)['title'].upper()})
+    assert not seen_index.is_seen(article(2))
+
+
+def test_entries_expire_after_the_ttl(seen_index):
+    seen_index.mark_seen([article(1)], now=time.time() - 7200)
+    seen_index.mark_seen([article(2)])
+    
+    assert seen_index.filter_unseen([article(1), article(2), article(3)]) == [article(1), article(3)]
+    seen_index.evict_expired()
+    assert seen_index._db.execute('SELECT COUNT(*) FROM seen').fetchone()[0] == 2
+
+
+def test_pipeline_records_exported_articles(seen_index, make_exporter):
+    seen_index.mark_seen([article(1)], now=time.time() - 1800)
+    exporter = make_exporter(FakeDocsService())
+    
+    run_pipeline(ListScraper([article(1), article(2)], [article(3)]), Deduplicator(), exporter,
+                 [], [], seen_index=seen_index)
+    
+    assert [a['url'] for a in exporter.exported_articles] == [article(2)['url'], article(3)['url']]
+    assert all(seen_index.is_seen(article(n)) for n in (1, 2, 3))
+    # The article reported by an earlier run was refreshed, not re-reported
+    last_seen = seen_index._db.execute('SELECT MIN(last_seen) FROM seen').fetchone()[0]
+    assert last_seen > time.time() - 60
+
+
+def test_failed_export_leaves_new_articles_unseen(seen_index, make_exporter):
+    def fail(call, title):
+        if call == 'batchUpdate':
+            raise http_error(500)
+    exporter = make_exporter(FakeDocsService(fail=fail))
+    
+    doc_url = run_pipeline(ListScraper([article(1), article(2)]), Deduplicator(), exporter,
+                           [], [], seen_index=seen_index)
+    
+    assert '/demo_' in doc_url
+    assert exporter.exported_articles == []
+    assert not seen_index.is_seen(article(1)) and not seen_index.is_seen(article(2))
+
+
+def test_demo_mode_marks_nothing(seen_index, make_exporter):
+    seen_index.mark_seen([article(1)], now=time.time() - 1800)
+    exporter = make_exporter(FakeDocsService())
+    exporter.demo_mode = True
+    
+    run_pipeline(ListScraper([article(1), article(2)]), Deduplicator(), exporter,
+                 [], [], seen_index=seen_index)
+    
+    assert not seen_index.is_seen(article(2))
+    last_seen = seen_index._db.execute('SELECT MAX(last_seen) FROM seen').fetchone()[0]
+    assert last_seen < time.time() - 1700
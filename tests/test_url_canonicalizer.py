@@ -0,0 +1,98 @@
+"""
+URL canonicalizer: canonical forms, offline unwrapping and the redirect table
+"""
+
+import base64
+
+import pytest
+
+from src.url_canonicalizer import UrlCanonicalizer, canonicalize_url, clean_url, decode_google_news_url
+
+ARTICLE = 'https://example.com/india/monsoon-session-opens'
+
+
+def google_news_link(target: str) -> str:
+    """Google News article link in the older format, a base64 protobuf holding the target"""
+    data = b'\x08\x13\x22' + bytes([len(target)]) + target.encode() + b'\xd2\x01\x00'
+    article_id = base64.urlsafe_b64encode(data).decode().rstrip('=')
+    return f'https://news.google.com/rss/articles/{article_id}?oc=5'
+
+
+@pytest.mark.parametrize('variant', [
+    'http://www.example.com/india/monsoon-session-opens',
+    'https://m.example.com/india/monsoon-session-opens/',
+    'https://EXAMPLE.com:443//india/monsoon-session-opens#comments',
+    'https://example.com/india/monsoon-session-opens?utm_source=rss&fbclid=abc',
+    'https://amp.example.com/amp/india/monsoon-session-opens',
+    'https://example.com/india/monsoon-session-opens/amp',
+    'https://example-com.cdn.ampproject.org/c/s/example.com/india/monsoon-session-opens',
+    'https://www.google.com/url?q=https://example.com/india/monsoon-session-opens&sa=t',
+    google_news_link('https://example.com/india/monsoon-session-opens?utm_medium=feed'),
+])
+def test_variants_of_one_article_share_a_canonical_url(variant):
+    assert canonicalize_url(variant) == ARTICLE
+
+
+def test_parameters_that_identify_an_article_are_kept():
+    first = canonicalize_url('https://example.com/story?id=1&page=2')
+    
+    assert first == canonicalize_url('https://example.com/story?page=2&id=1&utm_campaign=x')
+    assert first != canonicalize_url('https://example.com/story?id=2&page=2')
+    assert canonicalize_url('https://example.com:8080/story') == 'https://example.com:8080/story'
+    assert canonicalize_url('not a url') == 'not a url'
+
+
+def test_clean_url_only_drops_tracking_and_the_fragment():
+    assert clean_url('http://www.Example.com/Story?utm_source=x&id=7#top') == 'http://www.example.com/Story?id=7'
+    assert clean_url('https://example.com/a?b=1&c=2') == 'https://example.com/a?b=1&c=2'
+
+
+def test_opaque_google_news_ids_are_not_decoded():
+    assert decode_google_news_url('https://news.google.com/rss/articles/CBMiX0FVX3lxTE5vcGFxdWU?oc=5') is None
+    assert decode_google_news_url(ARTICLE) is None
+
+
+class RedirectSession:
+    """requests.Session whose every GET lands on one final URL"""
+    
+    def __init__(self, final_url, html=''):
+        self.final_url = final_url
+        self.html = html
+        self.requests = []
+    
+    def get(self, url, **kwargs):
+        self.requests.append(url)
+        session = self
+        
+        class Response:
+            status_code = 200
+            headers = {'Content-Type': 'text/html'}
+            url = session.final_url
+            text = session.html
+        return Response()
+
+
+def test_resolved_redirects_are_remembered_across_runs(tmp_path):
+    path = str(tmp_path / 'canonical.sqlite')
+    wrapper = 'https://news.google.com/rss/articles/CBMiX0FVX3lxTE5vcGFxdWU?oc=5'
+    session = RedirectSession('https://www.example.com/india/monsoon-session-opens?utm_source=gn',
+                              html=f'<head><link rel="canonical" href="{ARTICLE}"></head>')
+    canonicalizer = UrlCanonicalizer(path=path, resolve_redirects=True)
+    
+    assert canonicalizer.resolve(wrapper, session=session) == ARTICLE
+    assert canonicalizer.canonical(wrapper) == ARTICLE
+    
+    later_run = UrlCanonicalizer(path=path, resolve_redirects=True)
+    assert later_run.resolve(wrapper, session=session) == ARTICLE
+    assert later_run(wrapper) == ARTICLE
+    assert len(session.requests) == 1
+
+
+def test_without_resolving_wrappers_are_left_alone(tmp_path):
+    canonicalizer = UrlCanonicalizer(path=str(tmp_path / 'canonical.sqlite'), resolve_redirects=False)
+    wrapper = 'https://news.google.com/rss/articles/CBMiX0FVX3lxTE5vcGFxdWU?oc=5'
+    session = RedirectSession(ARTICLE)
+    
+    # Cleaned of its tracking parameter (oc), but not followed
+    assert canonicalizer.resolve(wrapper, session=session) == clean_url(wrapper)
+    assert session.requests == []
@@ -4,6 +4,7 @@ from flask import Flask, request
 from twilio.twiml.messaging_response import MessagingResponse
 from GoogleNews import GoogleNews
 import local_report_helper
+from src.keyword_matcher import keyword_matcher
 
 logging.basicConfig(level=logging.INFO)
 
@@ -42,12 +43,13 @@ def webhook():
     gn = GoogleNews(start=start_date.strftime('%m/%d/%Y'), end=end_date.strftime('%m/%d/%Y'), lang='en')
     gn.search(f"{keyword} {site}")
     
+    matcher = keyword_matcher([keyword])
     results = []
     for page in range(1, 3):  # Top 2 pages
         gn.getpage(page)
         results.extend(gn.result())
     
-    recent_articles = [r for r in results if r.get('datetime') is not None and keyword.lower() in (r.get('title', '').lower() + r.get('desc', '').lower())]
+    recent_articles = [r for r in results if r.get('datetime') is not None and matcher.find(r.get('title', ''), r.get('desc', ''))]
     
     if recent_articles:
         doc_link = local_report_helper.generate_news_report(f"{keyword} {site}", recent_articles)